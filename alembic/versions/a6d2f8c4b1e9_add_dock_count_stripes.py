@@ -0,0 +1,43 @@
+"""Add dock count stripes and backfill docks.available_count
+
+Revision ID: a6d2f8c4b1e9
+Revises: f3c7a9d1e5b2
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6d2f8c4b1e9'
+down_revision = 'f3c7a9d1e5b2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'dock_count_stripes',
+        sa.Column('dock_id', sa.Uuid(), nullable=False),
+        sa.Column('stripe', sa.Integer(), nullable=False),
+        sa.Column('delta', sa.Integer(), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('dock_id', 'stripe'),
+        if_not_exists=True,
+    )
+    # Counts were never maintained before; start from the real numbers
+    op.execute("""
+        UPDATE docks SET available_count = COALESCE(actual.available, 0)
+        FROM docks d
+        LEFT JOIN (
+            SELECT dock_id, COUNT(*) AS available
+            FROM bikes
+            WHERE status = 'available' AND dock_id IS NOT NULL
+            GROUP BY dock_id
+        ) actual ON actual.dock_id = d.id
+        WHERE docks.id = d.id AND docks.available_count IS DISTINCT FROM COALESCE(actual.available, 0)
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('dock_count_stripes', if_exists=True)
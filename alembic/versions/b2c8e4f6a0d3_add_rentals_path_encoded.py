@@ -0,0 +1,24 @@
+"""Add packed path column to rentals
+
+Revision ID: b2c8e4f6a0d3
+Revises: a6d2f8c4b1e9
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b2c8e4f6a0d3'
+down_revision = 'a6d2f8c4b1e9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('rentals', sa.Column('path_encoded', sa.LargeBinary(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('rentals', 'path_encoded')
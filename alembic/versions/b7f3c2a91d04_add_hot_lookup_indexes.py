@@ -0,0 +1,52 @@
+"""Add indexes for hot router lookups
+
+Revision ID: b7f3c2a91d04
+Revises: your_new_revision_id
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7f3c2a91d04'
+down_revision = 'your_new_revision_id'
+branch_labels = None
+depends_on = None
+
+
+# (name, table, columns, partial index predicate)
+INDEXES = [
+    ('ix_rentals_client_rental_id_user_id', 'rentals', ['client_rental_id', 'user_id'], 'client_rental_id IS NOT NULL'),
+    ('ix_users_reset_token', 'users', ['reset_token'], 'reset_token IS NOT NULL'),
+    ('ix_bikes_dock_id_status', 'bikes', ['dock_id', 'status'], None),
+    ('ix_bikes_owner_id', 'bikes', ['owner_id'], None),
+    ('ix_events_occurred_at', 'events', ['occurred_at'], None),
+    ('ix_events_event_type_dock_id', 'events', ['event_type', 'dock_id'], None),
+    ('ix_notifications_user_id_created_at', 'notifications', ['user_id', 'created_at'], None),
+    ('ix_devices_user_id_expo_push_token', 'devices', ['user_id', 'expo_push_token'], None),
+    ('ix_verification_docs_user_id', 'verification_docs', ['user_id'], None),
+    ('ix_payments_status_created_at', 'payments', ['status', 'created_at'], None),
+]
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block, and
+    # keeps the tables writable while the indexes build
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                postgresql_concurrently=True,
+                postgresql_where=sa.text(where) if where else None,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
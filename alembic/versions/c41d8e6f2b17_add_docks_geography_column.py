@@ -0,0 +1,38 @@
+"""Add stored geography column and GiST index to docks
+
+Revision ID: c41d8e6f2b17
+Revises: b7f3c2a91d04
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41d8e6f2b17'
+down_revision = 'b7f3c2a91d04'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Generated from geom so every write path keeps it in sync without code changes
+    op.execute(
+        "ALTER TABLE docks ADD COLUMN IF NOT EXISTS geog geography(Point, 4326) "
+        "GENERATED ALWAYS AS (geom::geography) STORED"
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_docks_geog',
+            'docks',
+            ['geog'],
+            postgresql_using='gist',
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_docks_geog', table_name='docks', postgresql_concurrently=True, if_exists=True)
+    op.drop_column('docks', 'geog')
@@ -0,0 +1,43 @@
+"""Add trip metrics columns to rentals
+
+Revision ID: c9f1a3e5d7b4
+Revises: b2c8e4f6a0d3
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c9f1a3e5d7b4'
+down_revision = 'b2c8e4f6a0d3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('rentals', sa.Column('distance_m', sa.Float(), nullable=True))
+    op.add_column('rentals', sa.Column('avg_speed_kmh', sa.Float(), nullable=True))
+    op.add_column('rentals', sa.Column('co2_saved_g', sa.Float(), nullable=True))
+    op.add_column('rentals', sa.Column('eco_points_awarded', sa.Integer(), nullable=True))
+    op.add_column('rentals', sa.Column('metrics_processed_at', sa.DateTime(), nullable=True))
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_rentals_metrics_pending',
+            'rentals',
+            ['end_at'],
+            postgresql_where=sa.text("status = 'CLOSED' AND metrics_processed_at IS NULL"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_rentals_metrics_pending', table_name='rentals', postgresql_concurrently=True, if_exists=True)
+    op.drop_column('rentals', 'metrics_processed_at')
+    op.drop_column('rentals', 'eco_points_awarded')
+    op.drop_column('rentals', 'co2_saved_g')
+    op.drop_column('rentals', 'avg_speed_kmh')
+    op.drop_column('rentals', 'distance_m')
@@ -0,0 +1,34 @@
+"""Add keyset pagination indexes to bikes
+
+Revision ID: d5a9e0b3c6f8
+Revises: c41d8e6f2b17
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5a9e0b3c6f8'
+down_revision = 'c41d8e6f2b17'
+branch_labels = None
+depends_on = None
+
+
+# GET /bikes/ seeks on (created_at, id), optionally behind a status filter
+INDEXES = [
+    ('ix_bikes_created_at_id', ['created_at', 'id']),
+    ('ix_bikes_status_created_at_id', ['status', 'created_at', 'id']),
+]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, columns in INDEXES:
+            op.create_index(name, 'bikes', columns, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, _ in reversed(INDEXES):
+            op.drop_index(name, table_name='bikes', postgresql_concurrently=True, if_exists=True)
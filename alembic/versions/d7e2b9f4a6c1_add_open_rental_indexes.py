@@ -0,0 +1,42 @@
+"""Add partial indexes for open rental lookups
+
+Revision ID: d7e2b9f4a6c1
+Revises: c9f1a3e5d7b4
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7e2b9f4a6c1'
+down_revision = 'c9f1a3e5d7b4'
+branch_labels = None
+depends_on = None
+
+
+# Active rental registry: database fallback by rider / bike, and the rebuild's open-ride scan
+INDEXES = [
+    ('ix_rentals_open_user_id', ['user_id']),
+    ('ix_rentals_open_bike_id', ['bike_id']),
+]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, columns in INDEXES:
+            op.create_index(
+                name,
+                'rentals',
+                columns,
+                postgresql_where=sa.text("status = 'OPEN'"),
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, _ in reversed(INDEXES):
+            op.drop_index(name, table_name='rentals', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,42 @@
+"""Add dock tombstones and updated_at index for delta sync
+
+Revision ID: e8b14f7a2c39
+Revises: d5a9e0b3c6f8
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8b14f7a2c39'
+down_revision = 'd5a9e0b3c6f8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'dock_tombstones',
+        sa.Column('dock_id', sa.Uuid(), nullable=False),
+        sa.Column('deleted_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('dock_id'),
+        if_not_exists=True,
+    )
+    op.create_index('ix_dock_tombstones_deleted_at', 'dock_tombstones', ['deleted_at'], if_not_exists=True)
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_docks_updated_at',
+            'docks',
+            ['updated_at'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_docks_updated_at', table_name='docks', postgresql_concurrently=True, if_exists=True)
+    op.drop_index('ix_dock_tombstones_deleted_at', table_name='dock_tombstones', if_exists=True)
+    op.drop_table('dock_tombstones', if_exists=True)
@@ -0,0 +1,27 @@
+"""Add global zone version sequence and index
+
+Revision ID: f3c7a9d1e5b2
+Revises: e8b14f7a2c39
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3c7a9d1e5b2'
+down_revision = 'e8b14f7a2c39'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE SEQUENCE IF NOT EXISTS zone_version_seq")
+    # Continue after any versions already handed out
+    op.execute("SELECT setval('zone_version_seq', COALESCE((SELECT max(version) FROM zones), 0) + 1, false)")
+    op.create_index('ix_zones_version', 'zones', ['version'], if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_zones_version', table_name='zones', if_exists=True)
+    op.execute("DROP SEQUENCE IF EXISTS zone_version_seq")
@@ -1,5 +1,5 @@
 from .jwt import create_access_token, create_refresh_token, verify_token
-from .password import get_password_hash, verify_password
+from .password import get_password_hash, verify_password, get_password_hash_async, verify_password_async
 from .dependencies import get_current_user, get_current_active_user, get_current_admin_user
 
 __all__ = [
@@ -8,6 +8,8 @@ __all__ = [
     "verify_token",
     "get_password_hash",
     "verify_password",
+    "get_password_hash_async",
+    "verify_password_async",
     "get_current_user",
     "get_current_active_user",
     "get_current_admin_user"
@@ -0,0 +1,127 @@
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+import redis
+from app.config import settings
+from app.models.user import User
+from app.services.metrics import metrics
+from app.services.redis_client import get_async_redis, get_redis
+
+logger = logging.getLogger(__name__)
+
+REDIS_KEY = "principal:{user_id}"
+
+# Secrets never leave the database row
+_EXCLUDED_FIELDS = {"password_hash", "reset_token", "reset_token_expires"}
+
+
+class TTLCache:
+    """Small thread-safe LRU with a per-entry time-to-live"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+local_cache = TTLCache(maxsize=settings.principal_cache_size, ttl=settings.principal_cache_local_ttl)
+metrics.register_gauge("principal_cache.local_size", lambda: len(local_cache))
+
+
+def _serialize(user: User) -> Dict[str, Any]:
+    return user.model_dump(mode="json", exclude=_EXCLUDED_FIELDS)
+
+
+def _to_user(data: Dict[str, Any]) -> User:
+    # A fresh detached instance per request so handlers cannot mutate the cache
+    return User.model_validate({**data, "password_hash": ""})
+
+
+async def get_cached_user(user_id: str) -> Optional[User]:
+    """Resolve a user from the local LRU, then Redis; None on a miss"""
+    key = str(user_id)
+    data = local_cache.get(key)
+    if data is not None:
+        metrics.inc("principal_cache.local_hit")
+        return _to_user(data)
+
+    try:
+        raw = await get_async_redis().get(REDIS_KEY.format(user_id=key))
+    except redis.RedisError:
+        logger.warning("Principal cache unavailable, falling back to database", exc_info=True)
+        raw = None
+    if raw is not None:
+        data = json.loads(raw)
+        local_cache.set(key, data)
+        metrics.inc("principal_cache.redis_hit")
+        return _to_user(data)
+
+    metrics.inc("principal_cache.miss")
+    return None
+
+
+async def cache_user(user: User) -> None:
+    """Store a freshly loaded user in both cache levels"""
+    key = str(user.id)
+    data = _serialize(user)
+    local_cache.set(key, data)
+    try:
+        await get_async_redis().set(
+            REDIS_KEY.format(user_id=key), json.dumps(data), ex=settings.principal_cache_redis_ttl
+        )
+    except redis.RedisError:
+        logger.warning("Could not write principal cache", exc_info=True)
+
+
+async def invalidate_user(user_id: Any) -> None:
+    """Drop a user from both cache levels after their row changed"""
+    key = str(user_id)
+    local_cache.pop(key)
+    try:
+        await get_async_redis().delete(REDIS_KEY.format(user_id=key))
+    except redis.RedisError:
+        logger.warning("Could not invalidate principal cache for %s", key, exc_info=True)
+
+
+def invalidate_user_sync(user_id: Any) -> None:
+    """Sync variant of invalidate_user for Celery tasks"""
+    key = str(user_id)
+    local_cache.pop(key)
+    try:
+        get_redis().delete(REDIS_KEY.format(user_id=key))
+    except redis.RedisError:
+        logger.warning("Could not invalidate principal cache for %s", key, exc_info=True)
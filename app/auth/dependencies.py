@@ -1,17 +1,19 @@
 from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlmodel import Session, select
-from app.database import get_db
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.database import get_async_db
 from app.models.user import User, UserRole
 from app.auth.jwt import verify_token
+from app.auth.cache import get_cached_user, cache_user
 
 security = HTTPBearer()
 
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> User:
     """Get current authenticated user"""
     credentials_exception = HTTPException(
@@ -29,10 +31,15 @@ async def get_current_user(
     if user_id is None:
         raise credentials_exception
     
-    user = db.exec(select(User).where(User.id == user_id)).first()
+    user = await get_cached_user(user_id)
+    if user is not None:
+        return user
+    
+    user = (await db.exec(select(User).where(User.id == user_id))).first()
     if user is None:
         raise credentials_exception
     
+    await cache_user(user)
     return user
 
 
@@ -1,8 +1,19 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional
+from fastapi import HTTPException, status
 from passlib.context import CryptContext
 from app.config import settings
+from app.services.metrics import metrics
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+_executor: Optional[Executor] = None
+_executor_lock = threading.Lock()
+_in_flight = 0
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
@@ -12,3 +23,72 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     """Generate password hash"""
     return pwd_context.hash(password)
+
+
+def _timed_verify(submitted_at: float, plain_password: str, hashed_password: str):
+    # Wall clock so the wait can be measured across process boundaries
+    return time.time() - submitted_at, verify_password(plain_password, hashed_password)
+
+
+def _timed_hash(submitted_at: float, password: str):
+    return time.time() - submitted_at, get_password_hash(password)
+
+
+def get_password_executor() -> Executor:
+    """Bounded executor that keeps bcrypt off the event loop"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                workers = max(1, settings.password_hash_workers)
+                if settings.password_hash_executor == "process":
+                    _executor = ProcessPoolExecutor(max_workers=workers)
+                else:
+                    _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+    return _executor
+
+
+def shutdown_password_executor() -> None:
+    """Stop the password executor (called on app shutdown)"""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True, cancel_futures=True)
+            _executor = None
+
+
+async def _run_bounded(fn, *args):
+    global _in_flight
+    capacity = max(1, settings.password_hash_workers) + settings.password_hash_max_queue
+    if _in_flight >= capacity:
+        metrics.inc("password_hash.rejected")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Authentication is busy, please retry shortly",
+            headers={"Retry-After": "1"},
+        )
+
+    _in_flight += 1
+    try:
+        loop = asyncio.get_running_loop()
+        waited, result = await loop.run_in_executor(get_password_executor(), fn, time.time(), *args)
+    finally:
+        _in_flight -= 1
+
+    metrics.observe("password_hash.queue_wait", max(0.0, waited))
+    return result
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the bounded executor"""
+    with metrics.timer("password_hash.verify"):
+        return await _run_bounded(_timed_verify, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password on the bounded executor"""
+    with metrics.timer("password_hash.hash"):
+        return await _run_bounded(_timed_hash, password)
+
+
+metrics.register_gauge("password_hash.in_flight", lambda: _in_flight)
@@ -18,11 +18,83 @@ class Settings(BaseSettings):
     postgres_user: str = Field(default="user", env="POSTGRES_USER")
     postgres_password: str = Field(default="password", env="POSTGRES_PASSWORD")
     
+    # Connection pool (per engine, per process: size the sum across API and
+    # Celery processes below Postgres max_connections)
+    db_pool_size: int = Field(default=5, env="DB_POOL_SIZE")
+    db_max_overflow: int = Field(default=10, env="DB_MAX_OVERFLOW")
+    db_pool_timeout: float = Field(default=30.0, env="DB_POOL_TIMEOUT")
+    db_pool_recycle: int = Field(default=300, env="DB_POOL_RECYCLE")
+    db_statement_timeout_ms: int = Field(default=0, env="DB_STATEMENT_TIMEOUT_MS")  # 0 = server default
+    db_pool_pre_ping: str = Field(default="idle", env="DB_POOL_PRE_PING")  # always | idle | never
+    db_pool_pre_ping_idle: float = Field(default=30.0, env="DB_POOL_PRE_PING_IDLE")
+    
     # Redis
     redis_url: str = Field(env="REDIS_URL")
     redis_host: str = Field(default="192.168.100.6", env="REDIS_HOST")
     redis_port: int = Field(default=6379, env="REDIS_PORT")
     redis_db: int = Field(default=0, env="REDIS_DB")
+    redis_socket_timeout: float = Field(default=0.25, env="REDIS_SOCKET_TIMEOUT")
+    
+    # Principal cache (resolved users for get_current_user)
+    principal_cache_size: int = Field(default=10000, env="PRINCIPAL_CACHE_SIZE")
+    principal_cache_local_ttl: float = Field(default=5.0, env="PRINCIPAL_CACHE_LOCAL_TTL")
+    principal_cache_redis_ttl: int = Field(default=300, env="PRINCIPAL_CACHE_REDIS_TTL")
+    
+    # Nearby lookups: "memory" answers from the in-process dock index, "postgis" always queries
+    nearby_backend: str = Field(default="memory", env="NEARBY_BACKEND")
+    dock_index_cell_degrees: float = Field(default=0.01, env="DOCK_INDEX_CELL_DEGREES")
+    dock_index_check_interval: float = Field(default=5.0, env="DOCK_INDEX_CHECK_INTERVAL")
+    dock_index_max_age: float = Field(default=300.0, env="DOCK_INDEX_MAX_AGE")
+    # Deepest zoom with clusters (deeper zooms list single docks); cells per tile edge, a power of two
+    cluster_max_zoom: int = Field(default=16, env="CLUSTER_MAX_ZOOM")
+    cluster_cells_per_tile: int = Field(default=8, env="CLUSTER_CELLS_PER_TILE")
+    dock_bikes_cache_ttl: float = Field(default=2.0, env="DOCK_BIKES_CACHE_TTL")
+    dock_bikes_cache_size: int = Field(default=50000, env="DOCK_BIKES_CACHE_SIZE")
+    # Empty nearby searches: precomputed by the worker every refresh interval, expires if it stops
+    nearby_fallback_refresh_interval: float = Field(default=60.0, env="NEARBY_FALLBACK_REFRESH_INTERVAL")
+    nearby_fallback_ttl: int = Field(default=600, env="NEARBY_FALLBACK_TTL")
+    nearby_fallback_local_ttl: float = Field(default=10.0, env="NEARBY_FALLBACK_LOCAL_TTL")
+    # Shared Redis cache for PostGIS nearby lookups, keyed by geohash cell and radius bucket (TTL 0 disables)
+    nearby_cache_ttl: int = Field(default=15, env="NEARBY_CACHE_TTL")
+    nearby_cache_precision: int = Field(default=6, env="NEARBY_CACHE_PRECISION")
+    nearby_cache_superset_cap: int = Field(default=500, env="NEARBY_CACHE_SUPERSET_CAP")
+    # Dock.available_count: 0 updates the dock row directly; N spreads deltas over N stripe rows per dock,
+    # folded into the row every fold interval (counts then lag by up to that long)
+    dock_count_stripes: int = Field(default=0, env="DOCK_COUNT_STRIPES")
+    dock_count_fold_interval: float = Field(default=10.0, env="DOCK_COUNT_FOLD_INTERVAL")
+    dock_count_reconcile_interval: float = Field(default=3600.0, env="DOCK_COUNT_RECONCILE_INTERVAL")
+    zone_engine_check_interval: float = Field(default=5.0, env="ZONE_ENGINE_CHECK_INTERVAL")
+    # Ride ends parked in a red zone / outside green zones: "flag" records it, "reject" refuses the end
+    zone_parking_enforcement: str = Field(default="flag", env="ZONE_PARKING_ENFORCEMENT")
+    # Ride paths are simplified (Douglas-Peucker, metres) before being packed for storage
+    path_simplify_tolerance_m: float = Field(default=5.0, env="PATH_SIMPLIFY_TOLERANCE_M")
+    # Ride metrics worker: eco points per km, CO2 a car would have emitted, and the speed above which
+    # a trace is treated as bogus (metrics kept, no points)
+    eco_points_per_km: float = Field(default=10.0, env="ECO_POINTS_PER_KM")
+    co2_saved_g_per_km: float = Field(default=150.0, env="CO2_SAVED_G_PER_KM")
+    eco_max_speed_kmh: float = Field(default=45.0, env="ECO_MAX_SPEED_KMH")
+    ride_metrics_batch_size: int = Field(default=500, env="RIDE_METRICS_BATCH_SIZE")
+    ride_metrics_interval: float = Field(default=60.0, env="RIDE_METRICS_INTERVAL")
+    # Active rental registry: rebuilt from the database this often to repair writes lost after a commit
+    active_rentals_reconcile_interval: float = Field(default=300.0, env="ACTIVE_RENTALS_RECONCILE_INTERVAL")
+    # Offline ride sync: most start + end records accepted by one POST /rides/sync
+    ride_sync_max_items: int = Field(default=200, env="RIDE_SYNC_MAX_ITEMS")
+    # Idempotency-Key replay: how long finished responses are kept (0 disables), how long a running
+    # request holds its key (keep above the slowest request), how long a duplicate waits for it
+    idempotency_ttl: int = Field(default=86400, env="IDEMPOTENCY_TTL")
+    idempotency_lock_ttl: int = Field(default=60, env="IDEMPOTENCY_LOCK_TTL")
+    idempotency_wait_timeout: float = Field(default=10.0, env="IDEMPOTENCY_WAIT_TIMEOUT")
+    # Vector tiles: cached in Redis up to this zoom, rendered on demand above it
+    tile_cache_max_zoom: int = Field(default=16, env="TILE_CACHE_MAX_ZOOM")
+    tile_cache_ttl: int = Field(default=86400, env="TILE_CACHE_TTL")
+    # Sync watermarks trail the clock so rows from transactions still in flight are not skipped
+    sync_watermark_lag: float = Field(default=5.0, env="SYNC_WATERMARK_LAG")
+    
+    # Event buffer (write-behind for analytics events; "sync" writes inline, e.g. for tests)
+    event_buffer_mode: str = Field(default="buffered", env="EVENT_BUFFER_MODE")
+    event_buffer_flush_size: int = Field(default=200, env="EVENT_BUFFER_FLUSH_SIZE")
+    event_buffer_flush_interval: float = Field(default=1.0, env="EVENT_BUFFER_FLUSH_INTERVAL")
+    event_buffer_max_pending: int = Field(default=10000, env="EVENT_BUFFER_MAX_PENDING")
     
     # JWT
     jwt_secret_key: str = Field(env="JWT_SECRET_KEY")
@@ -62,6 +134,9 @@ class Settings(BaseSettings):
     # Security
     secret_key: str = Field(env="SECRET_KEY")
     password_min_length: int = Field(default=8, env="PASSWORD_MIN_LENGTH")
+    password_hash_executor: str = Field(default="thread", env="PASSWORD_HASH_EXECUTOR")  # thread | process
+    password_hash_workers: int = Field(default=2, env="PASSWORD_HASH_WORKERS")
+    password_hash_max_queue: int = Field(default=64, env="PASSWORD_HASH_MAX_QUEUE")
     
     class Config:
         env_file = ".env"
@@ -1,11 +1,132 @@
+import time
 from sqlmodel import SQLModel, Session, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from app.config import settings
+from app.services.metrics import metrics
 
-engine = create_engine(
-    settings.database_url,
-    pool_pre_ping=True,
-    pool_recycle=300,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.database_url else {}
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection"""
+
+    metric_name = "db_pool"
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            metrics.inc(f"{self.metric_name}.timeouts")
+            raise
+        finally:
+            metrics.observe(f"{self.metric_name}.checkout_wait", time.perf_counter() - start)
+
+
+class TimedAsyncQueuePool(TimedQueuePool, AsyncAdaptedQueuePool):
+    """asyncio flavour of TimedQueuePool"""
+
+
+def get_async_database_url(url: str) -> str:
+    """Map a sync DATABASE_URL onto its asyncio driver (asyncpg / aiosqlite)"""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend == "postgresql":
+        # asyncpg does not understand libpq-only query options
+        query = dict(parsed.query)
+        sslmode = query.pop("sslmode", None)
+        query.pop("channel_binding", None)
+        if sslmode:
+            query["ssl"] = sslmode
+        parsed = parsed.set(drivername="postgresql+asyncpg", query=query)
+    elif backend == "sqlite":
+        parsed = parsed.set(drivername="sqlite+aiosqlite")
+    return parsed.render_as_string(hide_password=False)
+
+
+def _engine_options(url: str, asyncio: bool = False) -> dict:
+    """Pool and connect arguments for `url` from settings"""
+    backend = make_url(url).get_backend_name()
+    if backend == "sqlite":
+        return {"connect_args": {} if asyncio else {"check_same_thread": False}}
+
+    options = {
+        "poolclass": TimedAsyncQueuePool if asyncio else TimedQueuePool,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping == "always",
+    }
+    if backend == "postgresql" and settings.db_statement_timeout_ms > 0:
+        timeout = str(settings.db_statement_timeout_ms)
+        if asyncio:
+            options["connect_args"] = {"server_settings": {"statement_timeout": timeout}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={timeout}"}
+    return options
+
+
+def _ping_idle_connections(engine: Engine, idle_seconds: float) -> None:
+    """
+    Ping a pooled connection on checkout only if it sat idle for longer than
+    `idle_seconds`, instead of a round-trip on every checkout.
+    """
+
+    @event.listens_for(engine.pool, "checkin")
+    def _checkin(dbapi_connection, connection_record):
+        connection_record.info["checked_in_at"] = time.monotonic()
+
+    @event.listens_for(engine.pool, "checkout")
+    def _checkout(dbapi_connection, connection_record, connection_proxy):
+        checked_in_at = connection_record.info.get("checked_in_at")
+        if checked_in_at is None or time.monotonic() - checked_in_at < idle_seconds:
+            return
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute("SELECT 1")
+        except Exception as e:
+            metrics.inc("db_pool.stale_connections")
+            # The pool discards this connection and retries with a fresh one
+            raise exc.DisconnectionError() from e
+        finally:
+            try:
+                cursor.close()
+            except Exception:
+                pass
+
+
+def _register_pool_metrics(name: str, engine: Engine) -> None:
+    pool = engine.pool
+    if not isinstance(pool, TimedQueuePool):
+        return
+    pool.metric_name = f"db_pool.{name}"
+    metrics.register_gauge(f"db_pool.{name}.size", pool.size)
+    metrics.register_gauge(f"db_pool.{name}.checked_out", pool.checkedout)
+    metrics.register_gauge(f"db_pool.{name}.checked_in", pool.checkedin)
+    metrics.register_gauge(f"db_pool.{name}.overflow", lambda: max(0, pool.overflow()))
+    if settings.db_pool_pre_ping == "idle":
+        _ping_idle_connections(engine, settings.db_pool_pre_ping_idle)
+
+
+engine = create_engine(settings.database_url, **_engine_options(settings.database_url))
+
+async_engine = create_async_engine(
+    get_async_database_url(settings.database_url),
+    **_engine_options(settings.database_url, asyncio=True)
+)
+
+_register_pool_metrics("sync", engine)
+_register_pool_metrics("async", async_engine.sync_engine)
+
+# expire_on_commit=False so ORM objects stay readable after commit without
+# triggering a lazy refresh (which would need I/O outside the event loop)
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
 )
 
 
@@ -15,6 +136,12 @@ def get_db():
         yield session
 
 
+async def get_async_db():
+    """Dependency to get an async SQLModel session (non-blocking on the event loop)"""
+    async with AsyncSessionLocal() as session:
+        yield session
+
+
 def init_db():
     """Initialize database tables"""
     SQLModel.metadata.create_all(bind=engine)
@@ -1,13 +1,21 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 from contextlib import asynccontextmanager
 import time
 import uuid
 from app.config import settings
-from app.database import init_db
-from app.routers import auth, bikes, docks, zones, rentals, payments, notifications, verification, admin, sync
+from app.database import init_db, async_engine, AsyncSessionLocal
+from app.auth.password import shutdown_password_executor
+from app.services.metrics import metrics
+from app.services import active_rentals
+from app.services.dock_index import dock_index
+from app.services.events import event_buffer
+from app.services.idempotency import IdempotencyMiddleware
+from app.services.zone_engine import zone_engine
+from app.services.redis_client import close_redis
+from app.routers import auth, bikes, docks, zones, rentals, payments, notifications, verification, admin, sync, tiles
 from app.worker.celery import celery_app
 
 
@@ -15,8 +23,18 @@ from app.worker.celery import celery_app
 async def lifespan(app: FastAPI):
     # Startup
     init_db()
+    event_buffer.start()
+    async with AsyncSessionLocal() as session:
+        if settings.nearby_backend == "memory":
+            await dock_index.ensure_fresh(session)
+        await zone_engine.ensure_fresh(session)
+        await active_rentals.rebuild(session)
     yield
     # Shutdown
+    event_buffer.stop()
+    shutdown_password_executor()
+    await close_redis()
+    await async_engine.dispose()
 
 
 app = FastAPI(
@@ -25,10 +43,13 @@ app = FastAPI(
     description="Cycle - Offline-first bicycle rental platform API",
     docs_url="/docs" if settings.debug else None,
     redoc_url="/redoc" if settings.debug else None,
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
-# Middleware
+# Middleware (last added runs first; idempotent replays still get CORS and request-id headers)
+app.add_middleware(IdempotencyMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.cors_origins,
@@ -84,6 +105,7 @@ app.include_router(notifications.router, prefix="/notifications", tags=["Notific
 app.include_router(verification.router, prefix="/verification", tags=["Verification"])
 app.include_router(admin.router, prefix="/admin", tags=["Admin"])
 app.include_router(sync.router, prefix="/sync", tags=["Sync"])
+app.include_router(tiles.router, prefix="/tiles", tags=["Tiles"])
 
 
 @app.get("/")
@@ -106,12 +128,13 @@ async def health_check():
 
 
 @app.get("/metrics")
-async def metrics():
+async def metrics_endpoint():
     # Basic metrics endpoint - can be enhanced with Prometheus
     return {
         "success": True,
         "metrics": {
             "uptime": time.time(),
-            "version": settings.app_version
+            "version": settings.app_version,
+            **metrics.snapshot()
         }
     }
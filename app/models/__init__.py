@@ -1,6 +1,8 @@
 from .user import User
 from .device import Device
 from .dock import Dock
+from .dock_tombstone import DockTombstone
+from .dock_count_stripe import DockCountStripe
 from .zone import Zone
 from .bike import Bike
 from .rental import Rental
@@ -17,6 +19,8 @@ __all__ = [
     "User",
     "Device",
     "Dock",
+    "DockTombstone",
+    "DockCountStripe",
     "Zone",
     "Bike",
     "Rental",
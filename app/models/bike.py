@@ -7,7 +7,7 @@ from uuid import UUID, uuid4
 
 
 from sqlmodel import SQLModel, Field, Column
-from sqlalchemy import Enum as SQLEnum, JSON
+from sqlalchemy import Enum as SQLEnum, JSON, Index
 
 class BikeType(str, Enum):
     standard = "standard"
@@ -27,6 +27,12 @@ class BikeStatus(str, Enum):
 
 class Bike(SQLModel, table=True):
     __tablename__ = "bikes"
+    __table_args__ = (
+        Index("ix_bikes_dock_id_status", "dock_id", "status"),
+        Index("ix_bikes_owner_id", "owner_id"),
+        Index("ix_bikes_created_at_id", "created_at", "id"),
+        Index("ix_bikes_status_created_at_id", "status", "created_at", "id"),
+    )
 
     id: UUID = Field(default_factory=uuid4, primary_key=True, nullable=False)
     owner_id: Optional[UUID] = Field(default=None, foreign_key="users.id")
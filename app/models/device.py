@@ -2,10 +2,14 @@ from datetime import datetime
 from typing import Optional
 from sqlmodel import SQLModel, Field
 from uuid import UUID, uuid4
+from sqlalchemy import Index
 
 
 class Device(SQLModel, table=True):
     __tablename__ = "devices"
+    __table_args__ = (
+        Index("ix_devices_user_id_expo_push_token", "user_id", "expo_push_token"),
+    )
     
     id: UUID = Field(default_factory=uuid4, primary_key=True)
     user_id: UUID = Field(foreign_key="users.id")
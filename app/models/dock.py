@@ -2,16 +2,28 @@ from datetime import datetime
 from typing import Optional
 from sqlmodel import SQLModel, Field
 from uuid import UUID, uuid4
-from sqlalchemy import Column, Integer
-from geoalchemy2 import Geometry
+from sqlalchemy import Column, Computed, Index, Integer
+from geoalchemy2 import Geography, Geometry
 
 
 class Dock(SQLModel, table=True):
     __tablename__ = "docks"
+    __table_args__ = (
+        Index("ix_docks_geog", "geog", postgresql_using="gist"),
+        Index("ix_docks_updated_at", "updated_at"),
+    )
     
     id: UUID = Field(default_factory=uuid4, primary_key=True)
     name: str
     geom: bytes = Field(sa_column=Column(Geometry('POINT', srid=4326)))
+    # Maintained by Postgres from geom; indexed for ST_DWithin and <-> KNN lookups
+    geog: Optional[bytes] = Field(
+        default=None,
+        sa_column=Column(
+            Geography('POINT', srid=4326, spatial_index=False),
+            Computed("geom::geography", persisted=True),
+        ),
+    )
     capacity: int = Field(default=10)
     available_count: int = Field(default=0)
     address: Optional[str] = None
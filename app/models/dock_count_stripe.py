@@ -0,0 +1,11 @@
+from sqlmodel import SQLModel, Field
+from uuid import UUID
+
+
+class DockCountStripe(SQLModel, table=True):
+    """Pending available_count deltas for a dock, spread over stripes to avoid row-lock contention"""
+    __tablename__ = "dock_count_stripes"
+
+    dock_id: UUID = Field(primary_key=True)
+    stripe: int = Field(primary_key=True)
+    delta: int = Field(default=0, nullable=False)
@@ -0,0 +1,15 @@
+from datetime import datetime
+from sqlmodel import SQLModel, Field
+from uuid import UUID
+from sqlalchemy import Index
+
+
+class DockTombstone(SQLModel, table=True):
+    """Deleted dock ids, so delta syncs can tell clients to drop them"""
+    __tablename__ = "dock_tombstones"
+    __table_args__ = (
+        Index("ix_dock_tombstones_deleted_at", "deleted_at"),
+    )
+    
+    dock_id: UUID = Field(primary_key=True)
+    deleted_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
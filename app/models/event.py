@@ -2,11 +2,15 @@ from datetime import datetime
 from typing import Optional, Dict, Any
 from sqlmodel import SQLModel, Field
 from uuid import UUID, uuid4
-from sqlalchemy import Column, JSON
+from sqlalchemy import Column, JSON, Index
 
 
 class Event(SQLModel, table=True):
     __tablename__ = "events"
+    __table_args__ = (
+        Index("ix_events_occurred_at", "occurred_at"),
+        Index("ix_events_event_type_dock_id", "event_type", "dock_id"),
+    )
     
     id: UUID = Field(default_factory=uuid4, primary_key=True)
     user_id: Optional[UUID] = Field(default=None, foreign_key="users.id")
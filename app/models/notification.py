@@ -6,7 +6,7 @@ from typing import Optional, Dict, Any
 from uuid import uuid4
 
 from sqlmodel import SQLModel, Field, Column
-from sqlalchemy import Enum as SQLEnum, JSON
+from sqlalchemy import Enum as SQLEnum, JSON, Index
 
 class NotificationChannel(str, Enum):
     push = "push"
@@ -21,6 +21,9 @@ class NotificationStatus(str, Enum):
 
 class Notification(SQLModel, table=True):
     __tablename__ = "notifications"
+    __table_args__ = (
+        Index("ix_notifications_user_id_created_at", "user_id", "created_at"),
+    )
 
     id: Optional[str] = Field(default_factory=lambda: str(uuid4()), primary_key=True, nullable=False)
     user_id: str = Field(foreign_key="users.id", nullable=False)
@@ -7,7 +7,7 @@ from typing import Optional
 from uuid import uuid4
 
 from sqlmodel import SQLModel, Field
-from sqlalchemy import Column, Enum as SQLEnum, Numeric
+from sqlalchemy import Column, Enum as SQLEnum, Numeric, Index
 
 
 class PaymentMethod(str, Enum):
@@ -24,6 +24,9 @@ class PaymentStatus(str, Enum):
 
 class Payment(SQLModel, table=True):
     __tablename__ = "payments"
+    __table_args__ = (
+        Index("ix_payments_status_created_at", "status", "created_at"),
+    )
 
     id: Optional[str] = Field(default_factory=lambda: str(uuid4()), primary_key=True, nullable=False)
     rental_id: str = Field(foreign_key="rentals.id", nullable=False)
@@ -4,7 +4,7 @@ from sqlmodel import SQLModel, Field
 from uuid import UUID, uuid4
 from decimal import Decimal
 from enum import Enum as PyEnum
-from sqlalchemy import Column, JSON, Numeric, Enum as SAEnum
+from sqlalchemy import Column, JSON, LargeBinary, Numeric, Enum as SAEnum, Index, text
 
 class RentalStatus(PyEnum):
     OPEN = "open"
@@ -13,6 +13,23 @@ class RentalStatus(PyEnum):
 
 class Rental(SQLModel, table=True):
     __tablename__ = "rentals"
+    __table_args__ = (
+        Index(
+            "ix_rentals_client_rental_id_user_id",
+            "client_rental_id",
+            "user_id",
+            postgresql_where=text("client_rental_id IS NOT NULL"),
+        ),
+        # Closed rides still waiting for distance/eco-point processing
+        Index(
+            "ix_rentals_metrics_pending",
+            "end_at",
+            postgresql_where=text("status = 'CLOSED' AND metrics_processed_at IS NULL"),
+        ),
+        # Open ride by rider / bike when the active rental registry is unavailable
+        Index("ix_rentals_open_user_id", "user_id", postgresql_where=text("status = 'OPEN'")),
+        Index("ix_rentals_open_bike_id", "bike_id", postgresql_where=text("status = 'OPEN'")),
+    )
     
     id: UUID = Field(default_factory=uuid4, primary_key=True)
     client_rental_id: Optional[str] = None
@@ -27,7 +44,15 @@ class Rental(SQLModel, table=True):
         default=RentalStatus.OPEN,
         sa_column=Column(SAEnum(RentalStatus, native_enum=False), nullable=False),
     )
+    # Legacy raw samples; new rides store the simplified, packed form in path_encoded
     path_sample: Optional[List[dict]] = Field(default=None, sa_column=Column(JSON))
+    path_encoded: Optional[bytes] = Field(default=None, sa_column=Column(LargeBinary))
+    # Filled in by the ride metrics worker after the ride closes
+    distance_m: Optional[float] = None
+    avg_speed_kmh: Optional[float] = None
+    co2_saved_g: Optional[float] = None
+    eco_points_awarded: Optional[int] = None
+    metrics_processed_at: Optional[datetime] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
     
@@ -5,7 +5,7 @@ from typing import Optional
 from uuid import uuid4
 
 from sqlmodel import SQLModel, Field, Column
-from sqlalchemy import Enum as SQLEnum, String
+from sqlalchemy import Enum as SQLEnum, String, Index, text
 
 class VerificationStatus(str, Enum):
     unverified = "unverified"
@@ -21,6 +21,9 @@ class UserRole(str, Enum):
 
 class User(SQLModel, table=True):
     __tablename__ = "users"
+    __table_args__ = (
+        Index("ix_users_reset_token", "reset_token", postgresql_where=text("reset_token IS NOT NULL")),
+    )
 
     id: Optional[str] = Field(default_factory=lambda: str(uuid4()), primary_key=True, nullable=False)
     email: str = Field(index=True, nullable=False)
@@ -3,7 +3,7 @@ from typing import Optional
 from sqlmodel import SQLModel, Field
 from uuid import UUID, uuid4
 from enum import Enum as PyEnum
-from sqlalchemy import Column, Enum as SAEnum
+from sqlalchemy import Column, Enum as SAEnum, Index
 
 class VerificationStatus(PyEnum):
     PENDING = "pending"
@@ -12,6 +12,9 @@ class VerificationStatus(PyEnum):
 
 class VerificationDoc(SQLModel, table=True):
     __tablename__ = "verification_docs"
+    __table_args__ = (
+        Index("ix_verification_docs_user_id", "user_id"),
+    )
     
     id: UUID = Field(default_factory=uuid4, primary_key=True)
     user_id: UUID = Field(foreign_key="users.id")
@@ -3,7 +3,7 @@ from typing import Optional
 from sqlmodel import SQLModel, Field
 from uuid import UUID, uuid4
 from enum import Enum as PyEnum
-from sqlalchemy import Column, Enum as SAEnum
+from sqlalchemy import Column, Enum as SAEnum, Index, Sequence
 from geoalchemy2 import Geometry
 
 
@@ -12,13 +12,25 @@ class ZoneKind(PyEnum):
     RED = "red"
 
 
+# Global, monotonically increasing zone version: every create/update takes the
+# next value, so clients can sync with "zones newer than version N"
+ZONE_VERSION_SEQ = Sequence("zone_version_seq", metadata=SQLModel.metadata)
+
+
 class Zone(SQLModel, table=True):
     __tablename__ = "zones"
+    __table_args__ = (
+        Index("ix_zones_version", "version"),
+    )
     
     id: UUID = Field(default_factory=uuid4, primary_key=True)
     kind: ZoneKind = Field(
         default=ZoneKind.GREEN,
-        sa_column=Column(SAEnum(ZoneKind, native_enum=False), nullable=False),
+        # Stored by value ('green'/'red'), as the zones_kind_check constraint expects
+        sa_column=Column(
+            SAEnum(ZoneKind, native_enum=False, values_callable=lambda kinds: [kind.value for kind in kinds]),
+            nullable=False,
+        ),
     )
     polygon: bytes = Field(sa_column=Column(Geometry("POLYGON", srid=4326)))
     label: Optional[str] = None
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlmodel import Session, select
 from sqlalchemy import func, cast, Date
 from app.database import get_db
@@ -7,10 +7,13 @@ from app.models.event import Event
 from app.models.bike import Bike, BikeStatus
 from app.models.dock import Dock
 from app.models.zone import Zone
-from app.models.rental import Rental
+from app.models.rental import Rental, RentalStatus
 from app.models.payment import Payment, PaymentStatus
 from app.auth import get_current_admin_user
+from app.auth.cache import invalidate_user
 from app.schemas.common import ResponseModel
+from app.services import active_rentals
+from app.services.streaming import ndjson_response, wants_ndjson
 
 router = APIRouter()
 
@@ -150,6 +153,14 @@ async def get_admin_overview(
             select(func.count(Rental.id)).where(cast(Rental.start_at, Date) == today)
         ).one() or 0
 
+        # Rides in progress, from the active rental registry when it is ready
+        try:
+            live_rides = await active_rentals.live_count()
+        except active_rentals.RegistryUnavailable:
+            live_rides = db.exec(
+                select(func.count(Rental.id)).where(Rental.status == RentalStatus.OPEN)
+            ).one() or 0
+
         today_revenue = db.exec(
             select(func.coalesce(func.sum(Payment.amount), 0)).where(
                 Payment.status == PaymentStatus.success,
@@ -179,6 +190,7 @@ async def get_admin_overview(
                 "availableDocks": int(available_docks),
                 "activeZones": int(active_zones),
                 "todayTrips": int(today_trips),
+                "liveRides": int(live_rides),
                 "revenue": float(today_revenue),
                 "growth": round(growth, 2),
             },
@@ -227,27 +239,31 @@ async def get_recent_activities(
         return ResponseModel(success=False, error=str(e))
 
 
+def _user_row(u: User) -> dict:
+    return {
+        "id": str(u.id),
+        "email": u.email,
+        "name": u.name,
+        "phone": u.phone,
+        "verified_status": u.verified_status,
+        "email_verified": bool(u.email_verified),
+        "eco_points": int(u.eco_points or 0),
+        "created_at": u.created_at.isoformat() if getattr(u, "created_at", None) else None,
+    }
+
+
 @router.get("/users", response_model=ResponseModel)
 async def list_users(
+    request: Request,
     current_user: User = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
-    """Very protected: list all users (admin only)."""
+    """Very protected: list all users (admin only). Streams NDJSON on `Accept: application/x-ndjson`."""
+    if wants_ndjson(request):
+        return ndjson_response(select(User), _user_row)
     try:
         users = db.exec(select(User)).all()
-        data = [
-            {
-                "id": str(u.id),
-                "email": u.email,
-                "name": u.name,
-                "phone": u.phone,
-                "verified_status": u.verified_status,
-                "email_verified": bool(u.email_verified),
-                "eco_points": int(u.eco_points or 0),
-                "created_at": u.created_at.isoformat() if getattr(u, "created_at", None) else None,
-            }
-            for u in users
-        ]
+        data = [_user_row(u) for u in users]
         return ResponseModel(success=True, data={"users": data})
     except Exception as e:
         return ResponseModel(success=False, error=str(e))
@@ -271,6 +287,7 @@ async def update_user_policy(
     user.owner_max_bikes = owner_max_bikes
     db.add(user)
     db.commit()
+    await invalidate_user(user_id)
     
     return ResponseModel(
         success=True,
@@ -311,4 +328,5 @@ async def update_user_role(
     user.role = role
     db.add(user)
     db.commit()
+    await invalidate_user(user_id)
     return ResponseModel(success=True, message="User role updated", data={"user_id": user_id, "role": role})
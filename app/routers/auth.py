@@ -4,16 +4,19 @@ import secrets
 from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
 from sqlmodel import Session, select
-from app.database import get_db
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.config import settings
+from app.database import get_db, get_async_db
 from app.models.user import User, UserRole
 from app.models.event import Event
 from app.auth import (
-    get_password_hash, 
-    verify_password, 
+    get_password_hash_async,
+    verify_password_async,
     create_access_token, 
     create_refresh_token,
     get_current_user
 )
+from app.auth.cache import invalidate_user
 from app.schemas.auth import (
     SignupRequest, 
     SignupResponse, 
@@ -29,7 +32,7 @@ from app.schemas.auth import (
 )
 from app.schemas.common import ResponseModel
 from app.services.email import send_password_reset_email, send_verification_email
-from app.services.events import track_event
+from app.services.events import track_event, track_event_async
 from fastapi.responses import HTMLResponse
 
 
@@ -39,12 +42,12 @@ router = APIRouter()
 @router.post("/signup", response_model=ResponseModel[SignupResponse])
 async def signup(
     request: SignupRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     background_tasks: BackgroundTasks = None
 ):
     """User signup endpoint"""
     # Check if user already exists
-    existing_user = db.exec(select(User).where(User.email == request.email)).first()
+    existing_user = (await db.exec(select(User).where(User.email == request.email))).first()
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -54,7 +57,7 @@ async def signup(
     # Create user
     user = User(
         email=request.email,
-        password_hash=get_password_hash(request.password),
+        password_hash=await get_password_hash_async(request.password),
         name=request.name,
         phone=request.phone,
         school=request.school,
@@ -62,15 +65,15 @@ async def signup(
     )
     
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
     
     # Send verification email in background
     if background_tasks:
         background_tasks.add_task(send_verification_email, user.email, user.id)
     
     # Track event
-    track_event(db, user_id=user.id, event_type="user_signup")
+    await track_event_async(db, user_id=user.id, event_type="user_signup")
     
     return ResponseModel(
         success=True,
@@ -84,12 +87,12 @@ async def signup(
 @router.post("/login", response_model=ResponseModel[LoginResponse])
 async def login(
     request: LoginRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """User login endpoint"""
     # Find user
-    user = db.exec(select(User).where(User.email == request.email)).first()
-    if not user or not verify_password(request.password, user.password_hash):
+    user = (await db.exec(select(User).where(User.email == request.email))).first()
+    if not user or not await verify_password_async(request.password, user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
@@ -100,7 +103,7 @@ async def login(
     refresh_token = create_refresh_token(data={"sub": str(user.id)})
     
     # Track event
-    track_event(db, user_id=user.id, event_type="user_login")
+    await track_event_async(db, user_id=user.id, event_type="user_login")
     
     return ResponseModel(
         success=True,
@@ -122,7 +125,7 @@ async def login(
 @router.post("/refresh", response_model=ResponseModel[RefreshResponse])
 async def refresh_token(
     request: RefreshRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Refresh access token"""
     from app.auth.jwt import verify_token
@@ -135,7 +138,7 @@ async def refresh_token(
         )
     
     user_id = payload.get("sub")
-    user = db.exec(select(User).where(User.id == user_id)).first()
+    user = (await db.exec(select(User).where(User.id == user_id))).first()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -358,6 +361,7 @@ async def verify_email(
         user.verified_status = "verified"
         db.add(user)
         db.commit()
+        await invalidate_user(user.id)
         
         # Track event
         track_event(db, user_id=user.id, event_type="email_verified")
@@ -584,6 +588,42 @@ async def forgot_password(
     )
 
 
+@router.post("/reset-password", response_model=ResponseModel)
+async def reset_password(
+    request: ResetPasswordRequest,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Reset password using a token from the reset email"""
+    user = (await db.exec(select(User).where(User.reset_token == request.token))).first()
+    if not user or not user.reset_token_expires or user.reset_token_expires < datetime.datetime.utcnow():
+        return ResponseModel(
+            success=False,
+            message="This password reset link is invalid or has expired"
+        )
+    
+    if len(request.password) < settings.password_min_length:
+        return ResponseModel(
+            success=False,
+            message=f"Password must be at least {settings.password_min_length} characters"
+        )
+    
+    user.password_hash = await get_password_hash_async(request.password)
+    user.reset_token = None
+    user.reset_token_expires = None
+    user.updated_at = datetime.datetime.utcnow()
+    
+    db.add(user)
+    await db.commit()
+    await invalidate_user(user.id)
+    
+    await track_event_async(db, user_id=user.id, event_type="password_reset")
+    
+    return ResponseModel(
+        success=True,
+        message="Password reset successfully"
+    )
+
+
 @router.get("/reset-password", response_class=HTMLResponse)
 async def reset_password_page(
     token: str,
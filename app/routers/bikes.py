@@ -1,8 +1,13 @@
+import math
+from datetime import datetime
+from functools import partial
 from typing import Optional, List
-from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
+from uuid import UUID
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, UploadFile, File
 from sqlmodel import Session, select
-from app.database import get_db
-from app.models.user import User
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.database import get_db, get_async_db
+from app.models.user import User, UserRole
 from app.models.bike import Bike, BikeStatus
 from app.auth import get_current_user, get_current_admin_user
 from app.schemas.bike import (
@@ -12,9 +17,18 @@ from app.schemas.bike import (
     BikeListResponse,
     BatchPricingRequest
 )
-from app.schemas.common import ResponseModel
+from app.schemas.common import ResponseModel, envelope_response
+from app.services import active_rentals
 from app.services.events import track_event
 from app.services.cloudinary_service import cloudinary_service
+from app.config import settings
+from app.services.dock_counts import adjust_counts, change_bike_status
+from app.services.dock_index import dock_index, invalidate_dock_bikes, nearby_bikes
+from app.services.fallback import get_fallback
+from app.services.nearby_cache import cached_nearby, invalidate_docks, nearest
+from app.services.geo import point_geography
+from app.services.pagination import apply_keyset, paginate
+from app.services.streaming import ndjson_response, wants_ndjson
 from sqlalchemy import func
 
 from app.models.dock import Dock
@@ -22,14 +36,26 @@ from app.models.dock import Dock
 router = APIRouter()
 
 
+def _bike_response(bike: Bike) -> BikeResponse:
+    return BikeResponse.model_validate(bike)
+
+
 @router.get("/", response_model=ResponseModel[BikeListResponse])
 async def get_bikes(
+    request: Request,
     dock_id: Optional[str] = Query(None, description="Filter by dock ID"),
     type: Optional[str] = Query(None, description="Filter by bike type"),
     status: Optional[str] = Query(None, description="Filter by bike status"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(50, ge=1, le=200, description="Page size"),
     db: Session = Depends(get_db)
 ):
-    """Get list of bikes with optional filters"""
+    """
+    Get a page of bikes (newest first) with optional filters.
+
+    With `Accept: application/x-ndjson` every matching bike from `cursor`
+    onwards is streamed instead, one per line, and `limit` is ignored.
+    """
     query = select(Bike)
     
     if dock_id:
@@ -39,24 +65,19 @@ async def get_bikes(
     if status:
         query = query.where(Bike.status == status)
     
-    bikes = db.exec(query).all()
+    if wants_ndjson(request):
+        query = apply_keyset(query, Bike.created_at, Bike.id, cursor, limit).limit(None)
+        return ndjson_response(query, lambda bike: _bike_response(bike).model_dump(mode="json"))
     
-    return ResponseModel(
-        success=True,
-        data=BikeListResponse(
-            bikes=[BikeResponse(
-                id=bike.id,
-                owner_id=bike.owner_id,
-                type=bike.type,
-                condition=bike.condition,
-                hourly_rate=bike.hourly_rate,
-                dock_id=bike.dock_id,
-                status=bike.status,
-                photos=bike.photos,
-                created_at=bike.created_at.isoformat(),
-                updated_at=bike.updated_at.isoformat()
-            ) for bike in bikes]
-        )
+    query = apply_keyset(query, Bike.created_at, Bike.id, cursor, limit)
+    page = paginate(db.exec(query).all(), limit, "created_at")
+    
+    return envelope_response(
+        BikeListResponse(
+            next_cursor=page.next_cursor,
+            bikes=[_bike_response(bike) for bike in page.items]
+        ),
+        BikeListResponse
     )
 
 
@@ -86,27 +107,16 @@ async def create_bike(
     )
     
     db.add(bike)
+    adjust_counts(db, [((None, None), (bike.dock_id, bike.status))])
     db.commit()
     db.refresh(bike)
+    invalidate_dock_bikes(bike.dock_id)
+    await invalidate_docks(bike.dock_id)
     
     # Track event
     track_event(db, user_id=current_user.id, bike_id=bike.id, event_type="bike_created")
     
-    return ResponseModel(
-        success=True,
-        data=BikeResponse(
-            id=bike.id,
-            owner_id=bike.owner_id,
-            type=bike.type,
-            condition=bike.condition,
-            hourly_rate=bike.hourly_rate,
-            dock_id=bike.dock_id,
-            status=bike.status,
-            photos=bike.photos,
-            created_at=bike.created_at.isoformat(),
-            updated_at=bike.updated_at.isoformat()
-        )
-    )
+    return envelope_response(_bike_response(bike), BikeResponse)
 
 
 @router.patch("/owner/bikes/{bike_id}", response_model=ResponseModel[BikeResponse])
@@ -132,32 +142,23 @@ async def update_bike(
         )
     
     # Update fields
+    previous_dock_id = bike.dock_id
+    previous_status = bike.status
     update_data = request.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(bike, field, value)
     
     db.add(bike)
+    adjust_counts(db, [((previous_dock_id, previous_status), (bike.dock_id, bike.status))])
     db.commit()
     db.refresh(bike)
+    invalidate_dock_bikes(previous_dock_id, bike.dock_id)
+    await invalidate_docks(previous_dock_id, bike.dock_id)
     
     # Track event
     track_event(db, user_id=current_user.id, bike_id=bike.id, event_type="bike_updated")
     
-    return ResponseModel(
-        success=True,
-        data=BikeResponse(
-            id=bike.id,
-            owner_id=bike.owner_id,
-            type=bike.type,
-            condition=bike.condition,
-            hourly_rate=bike.hourly_rate,
-            dock_id=bike.dock_id,
-            status=bike.status,
-            photos=bike.photos,
-            created_at=bike.created_at.isoformat(),
-            updated_at=bike.updated_at.isoformat()
-        )
-    )
+    return envelope_response(_bike_response(bike), BikeResponse)
 
 
 @router.patch("/admin/bikes/batch-pricing", response_model=ResponseModel)
@@ -318,16 +319,39 @@ async def get_bike_by_id(
 ):
     """Get a bike by ID"""
     bike = db.get(Bike, bike_id)
-    return ResponseModel(
-        success=True,
-        data=bike)
+    if not bike:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Bike not found"
+        )
+    return envelope_response(_bike_response(bike), BikeResponse)
+
+def bikes_near_query(latitude: float, longitude: float, radius_m: float, limit: int):
+    """Available bikes within radius_m with their dock's position, nearest docks first"""
+    point = point_geography(latitude, longitude)
+    return (
+        select(Bike, func.ST_Y(Dock.geom), func.ST_X(Dock.geom))
+        .join(Dock, Bike.dock_id == Dock.id)
+        .where(func.ST_DWithin(Dock.geog, point, radius_m))
+        .where(Bike.status == BikeStatus.available)
+        .order_by(Dock.geog.op('<->')(point))
+        .limit(limit)
+    )
+
+
+async def _bikes_near(db: AsyncSession, latitude: float, longitude: float, radius_m: float, limit: int):
+    """Available bikes within radius_m via PostGIS, nearest docks first, located at their dock"""
+    rows = (await db.exec(bikes_near_query(latitude, longitude, radius_m, limit))).all()
+    return [(dock_lat, dock_lng, _bike_response(bike).model_dump(mode="json")) for bike, dock_lat, dock_lng in rows]
+
 
 @router.get("/find/nearby", response_model=ResponseModel[BikeListResponse])
 async def get_bikes_nearby(
     latitude: float = Query(..., description="Latitude coordinate"),
     longitude: float = Query(..., description="Longitude coordinate"),
     radius: float = Query(1.0, description="Search radius in kilometers"),
-    db: Session = Depends(get_db)
+    limit: int = Query(50, ge=1, le=200, description="Maximum number of bikes to return"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get bikes nearby using spatial query"""
     if radius <= 0:
@@ -338,71 +362,37 @@ async def get_bikes_nearby(
     
     # Convert radius from kilometers to meters
     radius_meters = radius * 1000
-    user_point = func.ST_GeogFromText(f'POINT({longitude} {latitude})')
     
-    # Find bikes within radius by joining with docks table
-    nearby_bikes_query = (
-        select(Bike)
-        .join(Dock, Bike.dock_id == Dock.id)
-        .where(func.ST_DWithin(Dock.geom, user_point, radius_meters))
-        .where(Bike.status == BikeStatus.available)
-    )
-    
-    nearby_bikes = db.exec(nearby_bikes_query).all()
+    if settings.nearby_backend == "memory" and await dock_index.ensure_fresh(db):
+        bike_list = await nearby_bikes(db, latitude, longitude, radius_meters, limit)
+    else:
+        fetch = partial(_bikes_near, db)
+        hits = await cached_nearby("bikes", latitude, longitude, radius, limit, fetch)
+        if hits is None:
+            hits = nearest(await fetch(latitude, longitude, radius_meters, limit), latitude, longitude, math.inf, limit)
+        bike_list = [BikeResponse.model_validate(payload) for payload, _ in hits]
     
-    # If no bikes found nearby, get up to 10 random available bikes
-    if not nearby_bikes:
-        fallback_bikes = db.exec(
-            select(Bike)
-            .where(Bike.status == BikeStatus.available)
-            .order_by(func.random())
-            .limit(10)
-        ).all()
+    # Nothing in range: serve the precomputed fallback instead of a table scan
+    if not bike_list:
+        bike_list = (await get_fallback(db))["bikes"]
         
-        bike_list = [BikeResponse(
-            id=str(bike.id),
-            owner_id=str(bike.owner_id),
-            type=bike.type,
-            condition=bike.condition,
-            hourly_rate=bike.hourly_rate,
-            dock_id=str(bike.dock_id) if bike.dock_id else None,
-            status=bike.status,
-            photos=bike.photos,
-            created_at=bike.created_at.isoformat(),
-            updated_at=bike.updated_at.isoformat()
-        ) for bike in fallback_bikes]
-        
-        return ResponseModel(
-            success=True,
-            data=BikeListResponse(
+        return envelope_response(
+            BikeListResponse(
                 bikes=bike_list,
                 count=len(bike_list),
                 fallback_used=True,
-                message="No bikes found nearby. Showing random available bikes instead."
-            )
+                message="No bikes found nearby. Showing bikes at the best-stocked docks instead."
+            ),
+            BikeListResponse
         )
     
-    # Format nearby bikes
-    bike_list = [BikeResponse(
-        id=str(bike.id),
-        owner_id=str(bike.owner_id),
-        type=bike.type,
-        condition=bike.condition,
-        hourly_rate=bike.hourly_rate,
-        dock_id=str(bike.dock_id) if bike.dock_id else None,
-        status=bike.status,
-        photos=bike.photos,
-        created_at=bike.created_at.isoformat(),
-        updated_at=bike.updated_at.isoformat()
-    ) for bike in nearby_bikes]
-    
-    return ResponseModel(
-        success=True,
-        data=BikeListResponse(
+    return envelope_response(
+        BikeListResponse(
             bikes=bike_list,
             count=len(bike_list),
             fallback_used=False
-        )
+        ),
+        BikeListResponse
     )
 
 @router.patch("/{bike_id}", response_model=ResponseModel)
@@ -427,8 +417,16 @@ async def delete_bike(
 ):
     """Delete a bike"""
     bike = db.get(Bike, bike_id)
+    if not bike:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Bike not found"
+        )
+    adjust_counts(db, [((bike.dock_id, bike.status), (None, None))])
     db.delete(bike)
     db.commit()
+    invalidate_dock_bikes(bike.dock_id)
+    await invalidate_docks(bike.dock_id)
     return ResponseModel(
         success=True,
         message="Bike deleted successfully"
@@ -441,7 +439,13 @@ async def lock_bike(
 ):
     """Lock a bike"""
     bike = db.get(Bike, bike_id)
-    bike.status = BikeStatus.locked
+    if not bike:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Bike not found"
+        )
+    bike.locked = True
+    bike.locked_at = datetime.utcnow()
     db.commit()
     return ResponseModel(
         success=True,
@@ -450,27 +454,60 @@ async def lock_bike(
 
 @router.post("/{bike_id}/unlock", response_model=ResponseModel)
 async def unlock_bike(
-    bike_id: str,
-    db: Session = Depends(get_db)
+    bike_id: UUID,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Unlock a bike"""
-    bike = db.get(Bike, bike_id)
-    bike.status = BikeStatus.unlocked
-    db.commit()
+    """Unlock a bike (its current rider, or staff)"""
+    # Answered from the active rental registry, without a rentals query
+    if current_user.role not in {UserRole.admin, UserRole.staff}:
+        rental = await active_rentals.active_for_bike(db, bike_id)
+        if not rental or rental["user_id"] != str(current_user.id):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Bike is not rented by you"
+            )
+    bike = await db.get(Bike, bike_id)
+    if not bike:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Bike not found"
+        )
+    bike.locked = False
+    bike.unlocked_at = datetime.utcnow()
+    await db.commit()
     return ResponseModel(
         success=True,
         message="Bike unlocked successfully"
     )
 
+async def _change_status(db: Session, bike_id: str, target: BikeStatus) -> None:
+    """Move a bike to `target`, adjusting dock counts only if this request changed it"""
+    changed = db.exec(change_bike_status(bike_id, target)).first()
+    if changed is None:
+        bike = db.get(Bike, bike_id)
+        if not bike:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Bike not found"
+            )
+        # Already in that status (or a concurrent request moved it): nothing to count
+        db.rollback()
+        return
+    dock_id, previous_status = changed
+    adjust_counts(db, [((dock_id, previous_status), (dock_id, target))])
+    db.commit()
+    invalidate_dock_bikes(dock_id)
+    await invalidate_docks(dock_id)
+
+
 @router.post("/{bike_id}/rent", response_model=ResponseModel)
 async def rent_bike(
     bike_id: str,
     db: Session = Depends(get_db)
 ):
     """Rent a bike"""
-    bike = db.get(Bike, bike_id)
-    bike.status = BikeStatus.rented
-    db.commit()
+    await _change_status(db, bike_id, BikeStatus.rented)
     return ResponseModel(
         success=True,
         message="Bike rented successfully"
@@ -482,9 +519,7 @@ async def return_bike(
     db: Session = Depends(get_db)
 ):
     """Return a bike"""
-    bike = db.get(Bike, bike_id)
-    bike.status = BikeStatus.available
-    db.commit()
+    await _change_status(db, bike_id, BikeStatus.available)
     return ResponseModel(
         success=True,
         message="Bike returned successfully"
@@ -1,12 +1,25 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlmodel import Session, select
-from app.database import get_db
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.database import get_db, get_async_db
 from app.models.user import User
 from app.models.dock import Dock
+from app.models.dock_tombstone import DockTombstone
 from app.models.event import Event
 from app.services.events import track_event
 from app.auth import get_current_admin_user
 from app.schemas.common import ResponseModel
+from app.config import settings
+from app.services.dock_index import DockEntry, available_bikes, dock_index
+from app.services.fallback import get_fallback
+from app.services.geo import bbox_envelope, parse_bbox, point_geography
+from app.services.nearby_cache import cached_nearby, invalidate_points as invalidate_nearby_points, nearest
+from app.services.pagination import parse_since, sync_watermark
+from app.services.tiles import invalidate_tiles
+import math
+from datetime import datetime
+from functools import partial
+from typing import Optional
 from fastapi import Query
 from geoalchemy2 import WKTElement
 from sqlalchemy import func
@@ -14,28 +27,89 @@ from sqlalchemy import func
 router = APIRouter()
 
 
+def docks_query(
+    lat: Optional[float],
+    lng: Optional[float],
+    radius: Optional[float],
+    bbox: Optional[str],
+    changed_since: Optional[datetime],
+):
+    """The GET /docks/ query, filtered like its parameters (radius in km)"""
+    query = select(
+        Dock.id,
+        Dock.name,
+        Dock.capacity,
+        Dock.available_count,
+        Dock.address,
+        Dock.updated_at,
+        func.ST_Y(Dock.geom).label("latitude"),
+        func.ST_X(Dock.geom).label("longitude"),
+    )
+    if radius is not None:
+        query = query.where(func.ST_DWithin(Dock.geog, point_geography(lat, lng), radius * 1000))
+    if bbox:
+        query = query.where(func.ST_Intersects(Dock.geom, bbox_envelope(*parse_bbox(bbox))))
+    if changed_since:
+        query = query.where(Dock.updated_at > changed_since)
+    return query
+
+
 @router.get("/", response_model=ResponseModel)
 async def get_docks(
-    lat: float = None,
-    lng: float = None,
-    radius: float = None,
-    since: str = None,
-    db: Session = Depends(get_db)
+    lat: Optional[float] = Query(None, ge=-90, le=90),
+    lng: Optional[float] = Query(None, ge=-180, le=180),
+    radius: Optional[float] = Query(None, gt=0, description="Search radius in kilometers (needs lat/lng)"),
+    bbox: Optional[str] = Query(None, description="min_lng,min_lat,max_lng,max_lat"),
+    since: Optional[str] = Query(None, description="watermark from the previous sync"),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get docks with optional location filtering"""
-    # TODO: Implement PostGIS spatial queries
-    docks = db.exec(select(Dock)).all()
+    """
+    Get docks, optionally within a radius and/or bounding box.
+
+    With `since`, only docks changed after that watermark are returned, plus
+    the ids of docks deleted since then (`deleted`, not area-filtered). Echo
+    `watermark` back as `since` on the next call.
+    """
+    if radius is not None and (lat is None or lng is None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="radius requires lat and lng"
+        )
+    changed_since = parse_since(since)
+    watermark = sync_watermark()
+    
+    query = docks_query(lat, lng, radius, bbox, changed_since)
+    rows = (await db.exec(query)).all()
+    
+    deleted = []
+    if changed_since:
+        deleted = [
+            str(dock_id) for dock_id in (await db.exec(
+                select(DockTombstone.dock_id).where(DockTombstone.deleted_at > changed_since)
+            )).all()
+        ]
     
     return ResponseModel(
         success=True,
-        data={"docks": [
-            {
-                "id": str(dock.id),
-                "name": dock.name,
-                "capacity": dock.capacity,
-                "available_count": dock.available_count
-            } for dock in docks
-        ]}
+        data={
+            "docks": [
+                {
+                    "id": str(row.id),
+                    "name": row.name,
+                    "capacity": row.capacity,
+                    "available_count": row.available_count,
+                    "address": row.address,
+                    "location": {
+                        "latitude": row.latitude,
+                        "longitude": row.longitude
+                    } if row.latitude is not None else None,
+                    "updated_at": row.updated_at.isoformat()
+                } for row in rows
+            ],
+            "deleted": deleted,
+            "watermark": watermark,
+            "full": changed_since is None
+        }
     )
 
 
@@ -63,6 +137,10 @@ async def create_dock(
     db.commit()
     db.refresh(dock)
     
+    await dock_index.apply(DockEntry(str(dock.id), dock.name, lat, lng, dock.capacity, dock.address))
+    await invalidate_tiles()
+    await invalidate_nearby_points([(lat, lng)])
+    
     # Emit dock event
     track_event(db, user_id=current_user.id, event_type="dock_created", properties={"dock_id": str(dock.id), "name": dock.name})
     
@@ -73,6 +151,41 @@ async def create_dock(
     )
 
 
+@router.get("/clusters", response_model=ResponseModel)
+async def get_dock_clusters(
+    bbox: str = Query(..., description="min_lng,min_lat,max_lng,max_lat"),
+    zoom: int = Query(..., ge=0, le=22),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Dock clusters for a map view.
+
+    Clusters carry `point_count`, summed `capacity` and `expansion_zoom` (the
+    zoom at which they split); single docks also carry `availableBikes`.
+    """
+    min_lng, min_lat, max_lng, max_lat = parse_bbox(bbox)
+    if not await dock_index.ensure_fresh(db):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Dock clusters are unavailable"
+        )
+    features = dock_index.clusters_in(min_lng, min_lat, max_lng, max_lat, zoom)
+    singles = [feature for feature in features if not feature["cluster"]]
+    if singles:
+        bikes_by_dock = await available_bikes(db, [feature["id"] for feature in singles])
+        for feature in singles:
+            feature["availableBikes"] = len(bikes_by_dock[feature["id"]])
+
+    return ResponseModel(
+        success=True,
+        data={
+            "clusters": features,
+            "zoom": zoom,
+            "count": len(features)
+        }
+    )
+
+
 @router.get("/{dock_id}", response_model=ResponseModel)
 async def get_dock_by_id(
     dock_id: str,
@@ -86,12 +199,48 @@ async def get_dock_by_id(
 
 from geoalchemy2.shape import to_shape
 
+def docks_near_query(latitude: float, longitude: float, radius_m: float, limit: int):
+    """Docks within radius_m, nearest first"""
+    # ST_DWithin and <-> both run on the GiST index over the stored geography
+    point = point_geography(latitude, longitude)
+    return (
+        select(
+            Dock.id,
+            Dock.name,
+            Dock.available_count,
+            func.ST_Y(Dock.geom).label("latitude"),
+            func.ST_X(Dock.geom).label("longitude"),
+        )
+        .where(func.ST_DWithin(Dock.geog, point, radius_m))
+        .order_by(Dock.geog.op('<->')(point))
+        .limit(limit)
+    )
+
+
+async def _docks_near(db: AsyncSession, latitude: float, longitude: float, radius_m: float, limit: int):
+    """Docks within radius_m via PostGIS, nearest first"""
+    rows = (await db.exec(docks_near_query(latitude, longitude, radius_m, limit))).all()
+    return [
+        (row.latitude, row.longitude, {
+            "id": str(row.id),
+            "name": row.name,
+            "availableBikes": row.available_count,
+            "location": {
+                "latitude": row.latitude,
+                "longitude": row.longitude
+            }
+        })
+        for row in rows
+    ]
+
+
 @router.get("/find/nearby", response_model=ResponseModel)
 async def get_docks_nearby(
     latitude: float = Query(..., description="Latitude coordinate"),
     longitude: float = Query(..., description="Longitude coordinate"),
     radius: float = Query(1.0, description="Search radius in kilometers"),
-    db: Session = Depends(get_db)
+    limit: int = Query(50, ge=1, le=200, description="Maximum number of docks to return"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     if radius <= 0:
         raise HTTPException(
@@ -100,40 +249,38 @@ async def get_docks_nearby(
         )
     
     radius_meters = radius * 1000
-    user_point = func.ST_GeogFromText(f'POINT({longitude} {latitude})')
-    
-    nearby_docks_query = (
-        select(
-            Dock,
-            func.ST_Distance(Dock.geom, user_point).label('distance')
-        )
-        .where(func.ST_DWithin(Dock.geom, user_point, radius_meters))
-        .order_by('distance')
-    )
     
-    nearby_docks = db.exec(nearby_docks_query).all()
-
-    if not nearby_docks:
-        fallback_docks = db.exec(
-            select(Dock)
-            .order_by(func.random())
-            .limit(10)
-        ).all()
-        
-        dock_results = []
-        for dock in fallback_docks:
-            point = to_shape(dock.geom)  # convert WKB to shapely Point
-            dock_results.append({
-                "id": str(dock.id),
-                "name": dock.name,
-                "availableBikes": dock.available_count,
+    if settings.nearby_backend == "memory" and await dock_index.ensure_fresh(db):
+        # Answered in process; availability comes from the cached dock -> bikes map
+        hits = dock_index.nearby(latitude, longitude, radius_meters, limit)
+        bikes_by_dock = await available_bikes(db, [entry.id for entry, _ in hits])
+        nearby_docks = [
+            {
+                "id": entry.id,
+                "name": entry.name,
+                "availableBikes": len(bikes_by_dock[entry.id]),
                 "location": {
-                    "latitude": point.y,
-                    "longitude": point.x
+                    "latitude": entry.latitude,
+                    "longitude": entry.longitude
                 },
-                "distance_meters": None,
-                "fallback": True
-            })
+                "distance_meters": round(distance, 2),
+                "fallback": False
+            }
+            for entry, distance in hits
+        ]
+    else:
+        fetch = partial(_docks_near, db)
+        hits = await cached_nearby("docks", latitude, longitude, radius, limit, fetch)
+        if hits is None:
+            hits = nearest(await fetch(latitude, longitude, radius_meters, limit), latitude, longitude, math.inf, limit)
+        nearby_docks = [
+            {**payload, "distance_meters": round(distance, 2), "fallback": False}
+            for payload, distance in hits
+        ]
+
+    # Nothing in range: serve the precomputed fallback instead of a table scan
+    if not nearby_docks:
+        dock_results = (await get_fallback(db))["docks"]
         
         return ResponseModel(
             success=True,
@@ -141,30 +288,15 @@ async def get_docks_nearby(
                 "docks": dock_results,
                 "count": len(dock_results),
                 "fallback_used": True,
-                "message": "No docks found nearby. Showing random docks instead."
+                "message": "No docks found nearby. Showing the best-stocked docks instead."
             }
         )
 
-    dock_results = []
-    for dock, distance in nearby_docks:
-        point = to_shape(dock.geom)  # convert WKB to shapely Point
-        dock_results.append({
-            "id": str(dock.id),
-            "name": dock.name,
-            "availableBikes": dock.available_count,
-            "location": {
-                "latitude": point.y,
-                "longitude": point.x
-            },
-            "distance_meters": round(distance, 2),
-            "fallback": False
-        })
-
     return ResponseModel(
         success=True,
         data={
-            "docks": dock_results,
-            "count": len(dock_results),
+            "docks": nearby_docks,
+            "count": len(nearby_docks),
             "fallback_used": False
         }
     )
@@ -186,14 +318,31 @@ async def update_dock(
         dock.name = dock_data['name']
     if 'capacity' in dock_data:
         dock.capacity = dock_data['capacity']
+    previous = to_shape(dock.geom) if dock.geom is not None else None
+    indexed = dock_index.get(dock_id)
+    latitude, longitude = (indexed.latitude, indexed.longitude) if indexed else (None, None)
     if 'lat' in dock_data and 'lng' in dock_data:
         # Update geometry if coordinates provided
         point = WKTElement(f'POINT({dock_data["lng"]} {dock_data["lat"]})', srid=4326)
         dock.geom = point
+        latitude, longitude = float(dock_data["lat"]), float(dock_data["lng"])
+    dock.updated_at = datetime.utcnow()
     
     db.commit()
     db.refresh(dock)
     
+    if latitude is not None:
+        await dock_index.apply(DockEntry(str(dock.id), dock.name, latitude, longitude, dock.capacity, dock.address))
+    else:
+        await dock_index.mark_stale()
+    # Old and new position: a moved dock leaves one set of cached areas and enters another
+    positions = (
+        ([(previous.y, previous.x)] if previous is not None else [])
+        + ([(latitude, longitude)] if latitude is not None else [])
+    )
+    await invalidate_tiles()
+    await invalidate_nearby_points(positions)
+    
     track_event(db, user_id=current_user.id, event_type="dock_updated", properties={"dock_id": str(dock_id)})
     
     return ResponseModel(
@@ -208,8 +357,17 @@ async def delete_dock(
 ):
     """Delete a dock"""
     dock = db.get(Dock, dock_id)
+    if not dock:
+        raise HTTPException(status_code=404, detail="Dock not found")
+    position = to_shape(dock.geom) if dock.geom is not None else None
     db.delete(dock)
+    # Same transaction, so a delta sync never sees the dock gone without its tombstone
+    db.merge(DockTombstone(dock_id=dock.id))
     db.commit()
+    await dock_index.discard(dock_id)
+    await invalidate_tiles()
+    if position is not None:
+        await invalidate_nearby_points([(position.y, position.x)])
     # Emit dock event
     track_event(db, event_type="dock_deleted", properties={"dock_id": str(dock_id)})
     return ResponseModel(
@@ -1,39 +1,74 @@
+from typing import List, Optional, Tuple
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session, select
-from app.database import get_db
-from app.models.user import User
+from sqlalchemy import func
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.database import get_async_db
+from app.models.user import User, UserRole
 from app.models.bike import Bike
-from app.models.rental import Rental
+from app.models.dock import Dock
+from app.models.rental import Rental, RentalStatus
 from app.auth import get_current_user
 from app.schemas.rental import (
     RideStartRequest,
     RideStartResponse,
     RideEndRequest,
-    RideEndResponse
+    RideEndResponse,
+    RideSyncRequest,
+    RideSyncResponse,
+    ActiveRideResponse,
+    RentalResponse
 )
 from app.schemas.common import ResponseModel
-from app.services.events import track_event
-from decimal import Decimal
-from datetime import datetime
+from app.config import settings
+from app.services import active_rentals
+from app.services.dock_counts import adjust_counts_async
+from app.services.dock_index import dock_index, invalidate_dock_bikes
+from app.services.geo import path_points, path_samples
+from app.services.nearby_cache import invalidate_docks
+from app.services.path_codec import decode_path, encode_path, simplify
+from app.services.ride_sync import close_rental, reserve_bikes, ride_amount, sync_rides
+from app.services.zone_engine import zone_engine
+from app.services.events import track_event_async, track_events_async
+from app.services.metrics import metrics
+from uuid import UUID
 
 router = APIRouter()
 
 
+async def _end_position(
+    db: AsyncSession,
+    end_dock_id,
+    path: List[Tuple[float, float]],
+) -> Optional[Tuple[float, float]]:
+    """Where the bike was left: the end dock if given, else the last path point"""
+    if end_dock_id:
+        entry = dock_index.get(end_dock_id)
+        if entry:
+            return entry.latitude, entry.longitude
+        row = (await db.exec(
+            select(func.ST_Y(Dock.geom), func.ST_X(Dock.geom)).where(Dock.id == end_dock_id)
+        )).first()
+        if row and row[0] is not None:
+            return float(row[0]), float(row[1])
+    return path[-1] if path else None
+
+
 @router.post("/start", response_model=ResponseModel[RideStartResponse])
 async def start_ride(
     request: RideStartRequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Start a bike ride"""
     # Check idempotency
     if request.client_rental_id:
-        existing_rental = db.exec(
+        existing_rental = (await db.exec(
             select(Rental).where(
                 Rental.client_rental_id == request.client_rental_id,
                 Rental.user_id == request.user_id
             )
-        ).first()
+        )).first()
         if existing_rental:
             return ResponseModel(
                 success=True,
@@ -43,21 +78,23 @@ async def start_ride(
                 )
             )
     
-    # Get bike and check availability
-    bike = db.exec(select(Bike).where(Bike.id == request.bike_id)).first()
-    if not bike:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Bike not found"
-        )
-    
-    if bike.status != "available":
+    # Reserve the bike: only one concurrent start can flip it from available
+    reserved = (await db.exec(reserve_bikes(request.bike_id))).first()
+    if reserved is None:
+        exists = (await db.exec(select(Bike.id).where(Bike.id == request.bike_id))).first()
+        if not exists:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Bike not found"
+            )
+        metrics.inc("rentals.start_conflict")
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Bike not available"
         )
+    dock_id = reserved.dock_id
     
-    # Create rental
+    # Create rental, and update the dock's count in the same transaction
     rental = Rental(
         client_rental_id=request.client_rental_id,
         bike_id=request.bike_id,
@@ -65,20 +102,20 @@ async def start_ride(
         start_at=request.start_at,
         minute_rate_snapshot=request.minute_rate_snapshot
     )
-    
-    # Update bike status
-    bike.status = "rented"
+    await adjust_counts_async(db, [((dock_id, "available"), (dock_id, "rented"))])
     
     db.add(rental)
-    db.add(bike)
-    db.commit()
-    db.refresh(rental)
+    await db.commit()
+    await db.refresh(rental)
+    await active_rentals.register(rental)
+    invalidate_dock_bikes(dock_id)
+    await invalidate_docks(dock_id)
     
     # Track event
-    track_event(
+    await track_event_async(
         db,
         user_id=current_user.id,
-        bike_id=bike.id,
+        bike_id=request.bike_id,
         event_type="ride_start"
     )
     
@@ -95,19 +132,19 @@ async def start_ride(
 async def end_ride(
     request: RideEndRequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """End a bike ride"""
     # Find rental
     if request.rental_id:
-        rental = db.exec(select(Rental).where(Rental.id == request.rental_id)).first()
+        rental = (await db.exec(select(Rental).where(Rental.id == request.rental_id))).first()
     elif request.client_rental_id:
-        rental = db.exec(
+        rental = (await db.exec(
             select(Rental).where(
                 Rental.client_rental_id == request.client_rental_id,
                 Rental.user_id == current_user.id
             )
-        ).first()
+        )).first()
     else:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -120,39 +157,87 @@ async def end_ride(
             detail="Rental not found"
         )
     
-    if rental.status != "open":
+    if rental.status != RentalStatus.OPEN:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Rental already ended"
         )
     
+    # Unknown docks would fail the foreign key at commit, after counts and caches moved
+    if request.end_dock_id and not (await db.exec(select(Dock.id).where(Dock.id == request.end_dock_id))).first():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Dock not found"
+        )
+    
+    # Parking and geofence rules, answered in process by the zone engine
+    zone_properties = {}
+    warnings = []
+    if await zone_engine.ensure_fresh(db):
+        path = path_points(request.path_sample)
+        end_position = await _end_position(db, request.end_dock_id, path)
+        parking = zone_engine.check([end_position] if end_position else [])
+        route = zone_engine.check(path)
+        if parking.violates:
+            if settings.zone_parking_enforcement == "reject":
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Bikes cannot be parked here"
+                )
+            warnings.append("Bike parked outside permitted zones")
+        if route.red_zone_ids:
+            warnings.append("Ride passed through a restricted zone")
+        zone_properties = {
+            "parking_violation": parking.violates,
+            "path_red_zone_ids": list(route.red_zone_ids),
+            "path_points_outside_green": route.outside_green,
+        }
+    
     # Calculate amount
-    amount = rental.minute_rate_snapshot * Decimal(request.minutes_client)
-    amount = round(amount, 2)
+    amount = ride_amount(rental.minute_rate_snapshot, request.minutes_client)
     
-    # Update rental
-    rental.end_at = request.end_at
-    rental.minutes_client = request.minutes_client
-    rental.amount = amount
-    rental.status = "closed"
-    rental.path_sample = request.path_sample
+    # Close the rental only if it is still open: of concurrent ends (retries,
+    # or a /rides/sync batch) exactly one gets a row back and moves the bike
+    closed = (await db.exec(close_rental(
+        rental.id,
+        end_at=request.end_at,
+        minutes_client=request.minutes_client,
+        amount=amount,
+        path_encoded=encode_path(
+            simplify(path_samples(request.path_sample), settings.path_simplify_tolerance_m)
+        ),
+    ))).first()
+    if closed is None:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Rental already ended"
+        )
     
     # Update bike status
-    bike = db.exec(select(Bike).where(Bike.id == rental.bike_id)).first()
+    bike = (await db.exec(select(Bike).where(Bike.id == rental.bike_id).with_for_update())).first()
     if bike:
+        # The bike now sits at the end dock, when one was given
+        previous_dock_id = bike.dock_id
+        end_dock_id = request.end_dock_id or bike.dock_id
+        await adjust_counts_async(db, [((bike.dock_id, bike.status), (end_dock_id, "available"))])
         bike.status = "available"
+        bike.dock_id = end_dock_id
         db.add(bike)
     
-    db.add(rental)
-    db.commit()
+    await db.commit()
+    await active_rentals.unregister(rental.id)
+    if bike:
+        invalidate_dock_bikes(previous_dock_id, bike.dock_id)
+        await invalidate_docks(previous_dock_id, bike.dock_id)
     
     # Track event
-    track_event(
+    await track_event_async(
         db,
         user_id=current_user.id,
         bike_id=rental.bike_id,
         event_type="ride_end",
-        properties={"minutes": request.minutes_client, "amount": float(amount)}
+        properties={"minutes": request.minutes_client, "amount": float(amount), **zone_properties}
     )
     
     return ResponseModel(
@@ -161,6 +246,88 @@ async def end_ride(
             rental_id=rental.id,
             amount=amount,
             minutes=request.minutes_client,
-            payment_instructions="Please complete payment via M-Pesa or other methods"
+            payment_instructions="Please complete payment via M-Pesa or other methods",
+            zone_warnings=warnings
+        )
+    )
+
+
+
+@router.post("/sync", response_model=ResponseModel[RideSyncResponse])
+async def sync_rides_batch(
+    request: RideSyncRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Reconcile a batch of offline ride starts and ends (safe to retry)"""
+    if len(request.starts) + len(request.ends) > settings.ride_sync_max_items:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.ride_sync_max_items} rides per sync"
+        )
+    
+    with metrics.timer("rides.sync"):
+        outcome = await sync_rides(db, UUID(str(current_user.id)), request.starts, request.ends)
+        await db.commit()
+    await active_rentals.register(*outcome["opened"])
+    await active_rentals.unregister(*outcome["closed"])
+    invalidate_dock_bikes(*outcome["docks"])
+    await invalidate_docks(*outcome["docks"])
+    
+    await track_events_async(db, [{"user_id": current_user.id, **event} for event in outcome["events"]])
+    
+    return ResponseModel(
+        success=True,
+        data=RideSyncResponse(results=outcome["results"])
+    )
+
+@router.get("/active", response_model=ResponseModel[ActiveRideResponse])
+async def get_active_ride(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """The current user's open ride, if any (from the active rental registry)"""
+    entry = await active_rentals.active_for_user(db, UUID(str(current_user.id)))
+    return ResponseModel(
+        success=True,
+        data=ActiveRideResponse(active=entry is not None, **(entry or {}))
+    )
+
+
+@router.get("/{rental_id}", response_model=ResponseModel[RentalResponse])
+async def get_ride(
+    rental_id: UUID,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get a ride, including its decoded path (rider or admin only)"""
+    rental = await db.get(Rental, rental_id)
+    if not rental or (str(rental.user_id) != str(current_user.id) and current_user.role not in {UserRole.admin, UserRole.staff}):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Rental not found"
+        )
+    
+    return ResponseModel(
+        success=True,
+        data=RentalResponse(
+            id=rental.id,
+            client_rental_id=rental.client_rental_id,
+            bike_id=rental.bike_id,
+            user_id=rental.user_id,
+            start_at=rental.start_at,
+            end_at=rental.end_at,
+            minute_rate_snapshot=rental.minute_rate_snapshot,
+            minutes_client=rental.minutes_client,
+            amount=rental.amount,
+            status=rental.status.value,
+            # Decoded only here; older rides still carry the raw samples
+            path_sample=decode_path(rental.path_encoded) if rental.path_encoded else rental.path_sample,
+            distance_m=rental.distance_m,
+            avg_speed_kmh=rental.avg_speed_kmh,
+            co2_saved_g=rental.co2_saved_g,
+            eco_points_awarded=rental.eco_points_awarded,
+            created_at=rental.created_at,
+            updated_at=rental.updated_at
         )
     )
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session, select
-from app.database import get_db
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.database import get_async_db
 from app.models.user import User
 from app.models.event import Event
 from app.auth import get_current_user
@@ -15,7 +16,7 @@ router = APIRouter()
 async def sync_events(
     events: List[Dict[str, Any]],
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Bulk sync events from client"""
     # Validate and insert events
@@ -32,7 +33,7 @@ async def sync_events(
         event_objects.append(event)
     
     db.add_all(event_objects)
-    db.commit()
+    await db.commit()
     
     return ResponseModel(
         success=True,
@@ -45,18 +46,18 @@ async def register_device(
     expo_push_token: str,
     platform: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Register device for push notifications"""
     from app.models.device import Device
     
     # Check if device already exists
-    existing_device = db.exec(
+    existing_device = (await db.exec(
         select(Device).where(
             Device.user_id == current_user.id,
             Device.expo_push_token == expo_push_token
         )
-    ).first()
+    )).first()
     
     if existing_device:
         # Update last seen
@@ -71,7 +72,7 @@ async def register_device(
         )
         db.add(device)
     
-    db.commit()
+    await db.commit()
     
     return ResponseModel(
         success=True,
@@ -0,0 +1,26 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import Response
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.database import get_async_db
+from app.services.tiles import MVT_MEDIA_TYPE, get_tile, valid_tile
+
+router = APIRouter()
+
+
+@router.get("/{z}/{x}/{y}.mvt")
+async def get_vector_tile(
+    z: int,
+    x: int,
+    y: int,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Mapbox Vector Tile with `docks` and `zones` layers"""
+    if not valid_tile(z, x, y):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Tile not found"
+        )
+    tile = await get_tile(db, z, x, y)
+    if not tile:
+        return Response(status_code=status.HTTP_204_NO_CONTENT)
+    return Response(content=tile, media_type=MVT_MEDIA_TYPE)
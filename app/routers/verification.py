@@ -1,12 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, Request, status, UploadFile, File
 from sqlmodel import Session, select
 from app.database import get_db
 from app.models.user import User
 from app.models.verification_doc import VerificationDoc, VerificationStatus
 from app.auth import get_current_user, get_current_admin_user
+from app.auth.cache import invalidate_user
 from app.schemas.common import ResponseModel
 from app.services.events import track_event
 from app.services.cloudinary_service import cloudinary_service
+from app.services.streaming import ndjson_response, wants_ndjson
 from datetime import datetime
 
 router = APIRouter()
@@ -57,6 +59,7 @@ async def submit_verification(
         
         db.add(doc)
         db.commit()
+        await invalidate_user(user_id)
         
         # Track event
         track_event(db, user_id=user_id, event_type="verification_submitted")
@@ -175,6 +178,7 @@ async def approve_verification(
         db.add(doc)
     
     db.commit()
+    await invalidate_user(user_id)
     
     # Track event
     track_event(db, user_id=user_id, event_type="verification_completed")
@@ -185,30 +189,35 @@ async def approve_verification(
     )
 
 
+def _doc_row(doc: VerificationDoc) -> dict:
+    return {
+        "id": str(doc.id),
+        "user_id": str(doc.user_id),
+        "cloudinary_url": doc.cloudinary_url,
+        "status": doc.status.value,
+        "submitted_at": doc.submitted_at.isoformat(),
+        "reviewed_by": str(doc.reviewed_by) if doc.reviewed_by else None,
+        "reviewed_at": doc.reviewed_at.isoformat() if doc.reviewed_at else None,
+        "notes": doc.notes,
+    }
+
+
 @router.get("/admin/docs", response_model=ResponseModel)
 async def list_verification_docs(
+    request: Request,
     status_filter: str = None,
     current_user: User = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
-    """List verification documents for admin review."""
+    """List verification documents for admin review. Streams NDJSON on `Accept: application/x-ndjson`."""
     query = select(VerificationDoc)
     if status_filter in {s.value for s in VerificationStatus}:
         query = query.where(VerificationDoc.status == VerificationStatus(status_filter))
-    docs = db.exec(query.order_by(VerificationDoc.submitted_at.desc())).all()
-    data = [
-        {
-            "id": str(doc.id),
-            "user_id": str(doc.user_id),
-            "cloudinary_url": doc.cloudinary_url,
-            "status": doc.status.value,
-            "submitted_at": doc.submitted_at.isoformat(),
-            "reviewed_by": str(doc.reviewed_by) if doc.reviewed_by else None,
-            "reviewed_at": doc.reviewed_at.isoformat() if doc.reviewed_at else None,
-            "notes": doc.notes,
-        }
-        for doc in docs
-    ]
+    query = query.order_by(VerificationDoc.submitted_at.desc())
+    if wants_ndjson(request):
+        return ndjson_response(query, _doc_row)
+    docs = db.exec(query).all()
+    data = [_doc_row(doc) for doc in docs]
     return ResponseModel(success=True, data={"docs": data})
 
 
@@ -225,7 +234,7 @@ async def batch_verify(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No user IDs provided")
     target_status = "approved" if approve else "rejected"
 
-    updated = 0
+    updated_ids = []
     for uid in user_ids:
         user = db.exec(select(User).where(User.id == uid)).first()
         if not user:
@@ -239,7 +248,9 @@ async def batch_verify(
             doc.reviewed_at = datetime.utcnow()
             doc.notes = notes
             db.add(doc)
-        updated += 1
+        updated_ids.append(uid)
 
     db.commit()
-    return ResponseModel(success=True, message=f"Batch {target_status} completed", data={"updated": updated})
+    for uid in updated_ids:
+        await invalidate_user(uid)
+    return ResponseModel(success=True, message=f"Batch {target_status} completed", data={"updated": len(updated_ids)})
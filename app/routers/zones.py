@@ -1,33 +1,41 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import Response
+from geoalchemy2.shape import from_shape
 from sqlmodel import Session, select
-from app.database import get_db
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.database import get_db, get_async_db
 from app.models.user import User
-from app.models.zone import Zone
+from app.models.zone import Zone, ZoneKind, ZONE_VERSION_SEQ
 from app.auth import get_current_admin_user
 from app.schemas.common import ResponseModel
+from app.services.geo import polygon_from_coords
+from app.services.tiles import invalidate_tiles
+from app.services.zone_cache import zone_documents
 
 router = APIRouter()
 
 
 @router.get("/", response_model=ResponseModel)
 async def get_zones(
-    since: str = None,
-    db: Session = Depends(get_db)
+    request: Request,
+    since: Optional[int] = Query(None, ge=0, description="Only zones with a version newer than this"),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get zones with GeoJSON format"""
-    zones = db.exec(select(Zone)).all()
-    
-    return ResponseModel(
-        success=True,
-        data={"zones": [
-            {
-                "id": str(zone.id),
-                "kind": zone.kind,
-                "polygon": {"type": "Polygon", "coordinates": []},  # TODO: Convert PostGIS to GeoJSON
-                "label": zone.label
-            } for zone in zones
-        ]}
-    )
+    """
+    Get zones with GeoJSON polygons.
+
+    Served from a pre-serialised document with an ETag that only changes with
+    zone versions; `data.version` is the value to send back as `since`.
+    """
+    document = await zone_documents.get(db, since)
+    headers = {"ETag": document.etag, "Vary": "Accept-Encoding"}
+    if document.etag in (tag.strip() for tag in request.headers.get("if-none-match", "").split(",")):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    if document.gzipped is not None and "gzip" in request.headers.get("accept-encoding", ""):
+        headers["Content-Encoding"] = "gzip"
+        return Response(content=document.gzipped, media_type="application/json", headers=headers)
+    return Response(content=document.body, media_type="application/json", headers=headers)
 
 
 @router.post("/admin", response_model=ResponseModel)
@@ -38,19 +46,30 @@ async def create_zone(
     current_user: User = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
-    """Create or update a zone (admin only)"""
-    # TODO: Implement PostGIS polygon creation
+    """Create a zone (admin only)"""
+    try:
+        zone_kind = ZoneKind(kind)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"kind must be one of: {', '.join(k.value for k in ZoneKind)}"
+        )
+    polygon = polygon_from_coords(polygon_coords)
+    
     zone = Zone(
-        kind=kind,
-        polygon=b"",  # TODO: Convert coordinates to PostGIS geometry
+        kind=zone_kind,
+        polygon=from_shape(polygon, srid=4326),
         label=label,
+        version=db.exec(select(ZONE_VERSION_SEQ.next_value())).one(),
         created_by=current_user.id
     )
     
     db.add(zone)
     db.commit()
+    await invalidate_tiles()
     
     return ResponseModel(
         success=True,
-        message="Zone created successfully"
+        message="Zone created successfully",
+        data={"zone_id": str(zone.id), "version": zone.version}
     )
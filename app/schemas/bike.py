@@ -1,5 +1,6 @@
+from datetime import datetime
 from typing import Optional, List
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from uuid import UUID
 from decimal import Decimal
 
@@ -22,6 +23,8 @@ class BikeUpdateRequest(BaseModel):
 
 
 class BikeResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     id: UUID
     owner_id: Optional[UUID] = None
     type: str
@@ -30,12 +33,13 @@ class BikeResponse(BaseModel):
     dock_id: Optional[UUID] = None
     status: str
     photos: Optional[List[str]] = None
-    created_at: str
-    updated_at: str
+    created_at: datetime
+    updated_at: datetime
 
 
 class BikeListResponse(BaseModel):
     bikes: List[BikeResponse]
+    next_cursor: Optional[str] = None
 
 
 class BatchPricingRequest(BaseModel):
@@ -1,5 +1,7 @@
+from functools import lru_cache
 from typing import Generic, TypeVar, Optional, Any
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
+from starlette.responses import Response
 
 DataT = TypeVar('DataT')
 
@@ -13,10 +15,39 @@ class ResponseModel(BaseModel, Generic[DataT]):
 
 class PaginatedResponse(BaseModel, Generic[DataT]):
     items: list[DataT]
-    total: int
-    page: int
     size: int
-    pages: int
+    # Keyset pagination: pass back as `cursor` to fetch the next page
+    next_cursor: Optional[str] = None
+    # Offset pagination
+    total: Optional[int] = None
+    page: Optional[int] = None
+    pages: Optional[int] = None
+
+
+@lru_cache(maxsize=None)
+def envelope_adapter(data_type: Any) -> TypeAdapter:
+    """TypeAdapter for ResponseModel[data_type], built once per data type"""
+    return TypeAdapter(ResponseModel[data_type])
+
+
+def envelope_response(
+    data: Any,
+    data_type: Any,
+    message: Optional[str] = None,
+    status_code: int = 200,
+) -> Response:
+    """
+    Return a success envelope whose `data` is already a validated `data_type`.
+
+    Returning a Response skips FastAPI's response_model pass, so the payload is
+    validated once (when `data` was built) and dumped straight to JSON bytes.
+    """
+    envelope = ResponseModel[data_type].model_construct(success=True, data=data, message=message)
+    return Response(
+        content=envelope_adapter(data_type).dump_json(envelope),
+        status_code=status_code,
+        media_type="application/json",
+    )
 
 
 class ErrorResponse(BaseModel):
@@ -32,6 +32,48 @@ class RideEndResponse(BaseModel):
     amount: Decimal
     minutes: int
     payment_instructions: str
+    zone_warnings: List[str] = []
+
+
+class RideSyncStart(BaseModel):
+    client_rental_id: str
+    bike_id: UUID
+    start_at: datetime
+    minute_rate_snapshot: Decimal = Field(..., decimal_places=4)
+
+
+class RideSyncEnd(BaseModel):
+    client_rental_id: str
+    end_at: datetime
+    minutes_client: int
+    end_dock_id: Optional[UUID] = None
+    path_sample: Optional[List[Dict[str, Any]]] = None
+
+
+class RideSyncRequest(BaseModel):
+    starts: List[RideSyncStart] = []
+    ends: List[RideSyncEnd] = []
+
+
+class RideSyncResult(BaseModel):
+    client_rental_id: str
+    action: str
+    # started / ended / duplicate / not_found / bike_not_found / bike_unavailable / dock_not_found
+    status: str
+    rental_id: Optional[UUID] = None
+    amount: Optional[Decimal] = None
+    zone_warnings: List[str] = []
+
+
+class RideSyncResponse(BaseModel):
+    results: List[RideSyncResult]
+
+
+class ActiveRideResponse(BaseModel):
+    active: bool
+    rental_id: Optional[UUID] = None
+    bike_id: Optional[UUID] = None
+    start_at: Optional[datetime] = None
 
 
 class RentalResponse(BaseModel):
@@ -46,6 +88,10 @@ class RentalResponse(BaseModel):
     amount: Optional[Decimal] = None
     status: str
     path_sample: Optional[List[Dict[str, Any]]] = None
+    distance_m: Optional[float] = None
+    avg_speed_kmh: Optional[float] = None
+    co2_saved_g: Optional[float] = None
+    eco_points_awarded: Optional[int] = None
     created_at: datetime
     updated_at: datetime
 
@@ -0,0 +1,228 @@
+import logging
+from typing import Dict, Iterable, List, Optional
+from uuid import UUID
+import orjson
+import redis
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.models.rental import Rental, RentalStatus
+from app.services.metrics import metrics
+from app.services.redis_client import get_async_redis, get_redis
+
+logger = logging.getLogger(__name__)
+
+# rental_id -> entry for every open rental; its size is the live ride count
+ACTIVE_KEY = "rentals:active"
+# user_id / bike_id -> rental_id of their latest rental; pointers to ended rentals read as "none"
+BY_USER_KEY = "rentals:active:by_user"
+BY_BIKE_KEY = "rentals:active:by_bike"
+# Set once the registry has been rebuilt from the database; reads fall back to it until then.
+# While set, the registry's answers (including "no open rental") are authoritative: writes lost
+# between a ride's commit and its registry update are repaired by the next rebuild (at startup
+# and every ACTIVE_RENTALS_RECONCILE_INTERVAL), and a failed registry write clears it
+READY_KEY = "rentals:active:ready"
+
+
+class RegistryUnavailable(Exception):
+    """Redis is down or the registry was not rebuilt yet; ask the database"""
+
+
+def _entry(rental: Rental) -> Dict:
+    return {
+        "rental_id": str(rental.id),
+        "user_id": str(rental.user_id),
+        "bike_id": str(rental.bike_id),
+        "start_at": rental.start_at.isoformat(),
+    }
+
+
+def _queue_register(pipe, entries: Iterable[Dict]) -> None:
+    for entry in entries:
+        pipe.hset(ACTIVE_KEY, entry["rental_id"], orjson.dumps(entry))
+        pipe.hset(BY_USER_KEY, entry["user_id"], entry["rental_id"])
+        pipe.hset(BY_BIKE_KEY, entry["bike_id"], entry["rental_id"])
+
+
+async def _mark_stale() -> None:
+    """A write was lost: stop serving reads until the next rebuild"""
+    try:
+        await get_async_redis().delete(READY_KEY)
+    except redis.RedisError:
+        pass
+
+
+async def register(*rentals: Rental) -> None:
+    """Add rides that just started (after their transaction committed)"""
+    if not rentals:
+        return
+    try:
+        async with get_async_redis().pipeline(transaction=True) as pipe:
+            _queue_register(pipe, (_entry(rental) for rental in rentals))
+            await pipe.execute()
+    except redis.RedisError:
+        logger.warning("Could not register %d active rentals", len(rentals), exc_info=True)
+        await _mark_stale()
+
+
+async def unregister(*rental_ids) -> None:
+    """Drop rides that just ended (after their transaction committed)"""
+    if not rental_ids:
+        return
+    try:
+        await get_async_redis().hdel(ACTIVE_KEY, *(str(rental_id) for rental_id in rental_ids))
+    except redis.RedisError:
+        logger.warning("Could not unregister %d active rentals", len(rental_ids), exc_info=True)
+        await _mark_stale()
+
+
+async def _lookup(index_key: str, field) -> Optional[Dict]:
+    client = get_async_redis()
+    try:
+        async with client.pipeline(transaction=False) as pipe:
+            pipe.exists(READY_KEY)
+            pipe.hget(index_key, str(field))
+            ready, rental_id = await pipe.execute()
+        if not ready:
+            raise RegistryUnavailable()
+        raw = await client.hget(ACTIVE_KEY, rental_id) if rental_id is not None else None
+    except redis.RedisError as exc:
+        raise RegistryUnavailable() from exc
+    return orjson.loads(raw) if raw is not None else None
+
+
+async def lookup_user(user_id) -> Optional[Dict]:
+    """The user's open rental, or None"""
+    return await _lookup(BY_USER_KEY, user_id)
+
+
+async def lookup_bike(bike_id) -> Optional[Dict]:
+    """The bike's open rental, or None"""
+    return await _lookup(BY_BIKE_KEY, bike_id)
+
+
+async def live_count() -> int:
+    """Number of open rentals"""
+    try:
+        async with get_async_redis().pipeline(transaction=False) as pipe:
+            pipe.exists(READY_KEY)
+            pipe.hlen(ACTIVE_KEY)
+            ready, count = await pipe.execute()
+    except redis.RedisError as exc:
+        raise RegistryUnavailable() from exc
+    if not ready:
+        raise RegistryUnavailable()
+    return int(count)
+
+
+def _latest_open(*criteria):
+    # Served by the partial ix_rentals_open_user_id / ix_rentals_open_bike_id indexes
+    return select(Rental).where(Rental.status == RentalStatus.OPEN, *criteria).order_by(Rental.start_at.desc())
+
+
+async def _open_rental(db: AsyncSession, *criteria) -> Optional[Dict]:
+    rental = (await db.exec(_latest_open(*criteria))).first()
+    return _entry(rental) if rental else None
+
+
+async def active_for_user(db: AsyncSession, user_id) -> Optional[Dict]:
+    """lookup_user, falling back to the database while the registry is unavailable"""
+    try:
+        entry = await lookup_user(user_id)
+        metrics.inc("active_rentals.hit")
+        return entry
+    except RegistryUnavailable:
+        metrics.inc("active_rentals.fallback")
+        return await _open_rental(db, Rental.user_id == user_id)
+
+
+async def active_for_bike(db: AsyncSession, bike_id) -> Optional[Dict]:
+    """lookup_bike, falling back to the database while the registry is unavailable"""
+    try:
+        entry = await lookup_bike(bike_id)
+        metrics.inc("active_rentals.hit")
+        return entry
+    except RegistryUnavailable:
+        metrics.inc("active_rentals.fallback")
+        return await _open_rental(db, Rental.bike_id == bike_id)
+
+
+def _open_rentals():
+    return select(Rental).where(Rental.status == RentalStatus.OPEN).order_by(Rental.start_at)
+
+
+def _still_open(rental_ids: List[str]):
+    return select(Rental.id).where(
+        Rental.id.in_([UUID(rental_id) for rental_id in rental_ids]),
+        Rental.status == RentalStatus.OPEN,
+    )
+
+
+def _added(snapshot: Dict[str, Dict], registered: set) -> List[Dict]:
+    return [entry for rental_id, entry in snapshot.items() if rental_id not in registered]
+
+
+def _suspects(snapshot: Dict[str, Dict], registered: set, added: List[Dict]) -> List[str]:
+    """Registered rides missing from the snapshot, and the ones just added: re-checked before dropping"""
+    return sorted((registered - snapshot.keys()) | {entry["rental_id"] for entry in added})
+
+
+def _rebuilt(snapshot: Dict[str, Dict], added: List[Dict], closed: set) -> int:
+    metrics.inc("active_rentals.rebuilt")
+    logger.info("Active rental registry rebuilt: %d open, %d added, %d dropped", len(snapshot), len(added), len(closed))
+    return len(snapshot)
+
+
+async def rebuild(db: AsyncSession) -> Optional[int]:
+    """
+    Reconcile the registry with the open rentals in the database, then mark
+    it ready; returns the open count, or None if Redis is unavailable. Runs
+    next to live traffic, so nothing is removed on the strength of the
+    snapshot alone: rides missing from it and rides it adds are re-checked
+    against the database before being dropped.
+    """
+    snapshot = {str(rental.id): _entry(rental) for rental in (await db.exec(_open_rentals())).all()}
+
+    client = get_async_redis()
+    try:
+        registered = {key.decode() for key in await client.hkeys(ACTIVE_KEY)}
+        added = _added(snapshot, registered)
+        if added:
+            async with client.pipeline(transaction=True) as pipe:
+                _queue_register(pipe, added)
+                await pipe.execute()
+
+        suspects = _suspects(snapshot, registered, added)
+        open_ids = {str(rental_id) for rental_id in (await db.exec(_still_open(suspects))).all()} if suspects else set()
+        closed = set(suspects) - open_ids
+        if closed:
+            await client.hdel(ACTIVE_KEY, *closed)
+        await client.set(READY_KEY, 1)
+    except redis.RedisError:
+        logger.warning("Could not rebuild the active rental registry", exc_info=True)
+        return None
+    return _rebuilt(snapshot, added, closed)
+
+
+def rebuild_sync(session: Session) -> Optional[int]:
+    """Sync variant of rebuild for the periodic Celery reconcile"""
+    snapshot = {str(rental.id): _entry(rental) for rental in session.exec(_open_rentals()).all()}
+
+    client = get_redis()
+    try:
+        registered = {key.decode() for key in client.hkeys(ACTIVE_KEY)}
+        added = _added(snapshot, registered)
+        if added:
+            with client.pipeline(transaction=True) as pipe:
+                _queue_register(pipe, added)
+                pipe.execute()
+
+        suspects = _suspects(snapshot, registered, added)
+        open_ids = {str(rental_id) for rental_id in session.exec(_still_open(suspects)).all()} if suspects else set()
+        closed = set(suspects) - open_ids
+        if closed:
+            client.hdel(ACTIVE_KEY, *closed)
+        client.set(READY_KEY, 1)
+    except redis.RedisError:
+        logger.warning("Could not rebuild the active rental registry", exc_info=True)
+        return None
+    return _rebuilt(snapshot, added, closed)
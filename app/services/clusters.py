@@ -0,0 +1,214 @@
+import math
+from typing import Dict, Iterable, List, Tuple
+import numpy as np
+
+Cell = Tuple[int, int]
+
+
+def project(latitude: float, longitude: float) -> Tuple[float, float]:
+    """Web Mercator position normalised to [0, 1) on both axes"""
+    latitude = max(min(latitude, 85.0511), -85.0511)
+    x = longitude / 360.0 + 0.5
+    sin = math.sin(math.radians(latitude))
+    y = 0.5 - 0.25 * math.log((1 + sin) / (1 - sin)) / math.pi
+    return min(max(x, 0.0), 1.0 - 1e-12), min(max(y, 0.0), 1.0 - 1e-12)
+
+
+def unproject(x: float, y: float) -> Tuple[float, float]:
+    """Inverse of project: (latitude, longitude)"""
+    longitude = (x - 0.5) * 360.0
+    latitude = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y))))
+    return latitude, longitude
+
+
+class _Cluster:
+    __slots__ = ("count", "sum_x", "sum_y", "capacity")
+
+    def __init__(self):
+        self.count = 0
+        self.sum_x = 0.0
+        self.sum_y = 0.0
+        self.capacity = 0
+
+
+class ClusterIndex:
+    """
+    Hierarchical grid clusters of dock positions, one level per zoom.
+
+    Each zoom splits every map tile into `cells_per_tile` x `cells_per_tile`
+    cells (a power of two), so cells nest: a cluster at zoom z is exactly the
+    union of its children at z + 1. Adding, moving or removing a dock touches
+    one cell per zoom, which keeps updates incremental. Clusters are placed at
+    the centroid of their docks.
+    """
+
+    def __init__(self, min_zoom: int = 0, max_zoom: int = 16, cells_per_tile: int = 8):
+        self.min_zoom = min_zoom
+        self.max_zoom = max_zoom
+        self.cells_per_tile = cells_per_tile
+        self.clear()
+
+    def clear(self) -> None:
+        self._levels: Dict[int, Dict[Cell, _Cluster]] = {
+            z: {} for z in range(self.min_zoom, self.max_zoom + 1)
+        }
+        # Deepest level keeps its members so single docks and z > max_zoom resolve to ids
+        self._members: Dict[Cell, Dict[str, tuple]] = {}
+        self._points: Dict[str, tuple] = {}
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def _cells(self, z: int) -> int:
+        return (2 ** z) * self.cells_per_tile
+
+    def _cell(self, x: float, y: float, z: int) -> Cell:
+        n = self._cells(z)
+        return int(x * n), int(y * n)
+
+    def add(self, dock_id: str, latitude: float, longitude: float, name: str = "", capacity: int = 0) -> None:
+        self.remove(dock_id)
+        x, y = project(latitude, longitude)
+        point = (x, y, latitude, longitude, name, capacity)
+        self._points[dock_id] = point
+        for z, level in self._levels.items():
+            cluster = level.get(self._cell(x, y, z))
+            if cluster is None:
+                cluster = level[self._cell(x, y, z)] = _Cluster()
+            cluster.count += 1
+            cluster.sum_x += x
+            cluster.sum_y += y
+            cluster.capacity += capacity
+        self._members.setdefault(self._cell(x, y, self.max_zoom), {})[dock_id] = point
+
+    def rebuild(self, docks: Iterable[Tuple[str, float, float, str, int]]) -> None:
+        """Replace everything from (id, latitude, longitude, name, capacity) rows in one pass per zoom"""
+        self.clear()
+        for dock_id, latitude, longitude, name, capacity in docks:
+            x, y = project(latitude, longitude)
+            self._points[dock_id] = (x, y, latitude, longitude, name, capacity)
+        if not self._points:
+            return
+        points = list(self._points.items())
+        xs = np.array([point[0] for _, point in points])
+        ys = np.array([point[1] for _, point in points])
+        capacities = np.array([point[5] for _, point in points], dtype=np.int64)
+        for z, level in self._levels.items():
+            n = self._cells(z)
+            keys = np.floor(xs * n).astype(np.int64) * n + np.floor(ys * n).astype(np.int64)
+            cells, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+            sum_x = np.bincount(inverse, weights=xs)
+            sum_y = np.bincount(inverse, weights=ys)
+            sum_capacity = np.bincount(inverse, weights=capacities)
+            for i, key in enumerate(cells.tolist()):
+                cluster = level[divmod(key, n)] = _Cluster()
+                cluster.count = int(counts[i])
+                cluster.sum_x = float(sum_x[i])
+                cluster.sum_y = float(sum_y[i])
+                cluster.capacity = int(sum_capacity[i])
+        for dock_id, point in points:
+            self._members.setdefault(self._cell(point[0], point[1], self.max_zoom), {})[dock_id] = point
+
+    def remove(self, dock_id: str) -> None:
+        point = self._points.pop(dock_id, None)
+        if point is None:
+            return
+        x, y, _, _, _, capacity = point
+        for z, level in self._levels.items():
+            cell = self._cell(x, y, z)
+            cluster = level[cell]
+            cluster.count -= 1
+            if cluster.count == 0:
+                del level[cell]
+                continue
+            cluster.sum_x -= x
+            cluster.sum_y -= y
+            cluster.capacity -= capacity
+        deepest = self._cell(x, y, self.max_zoom)
+        members = self._members[deepest]
+        del members[dock_id]
+        if not members:
+            del self._members[deepest]
+
+    def _children(self, cells: List[Cell], z: int) -> List[Cell]:
+        """Occupied cells at z + 1 under the given cells at z"""
+        level = self._levels[z + 1]
+        return [
+            child
+            for cx, cy in cells
+            for child in ((2 * cx, 2 * cy), (2 * cx + 1, 2 * cy), (2 * cx, 2 * cy + 1), (2 * cx + 1, 2 * cy + 1))
+            if child in level
+        ]
+
+    def _expansion_zoom(self, cell: Cell, z: int) -> int:
+        """First zoom at which this cluster breaks up into more than one"""
+        cells = [cell]
+        for deeper in range(z, self.max_zoom):
+            cells = self._children(cells, deeper)
+            if len(cells) > 1:
+                return deeper + 1
+        return self.max_zoom + 1
+
+    def _single(self, point: tuple, dock_id: str) -> dict:
+        _, _, latitude, longitude, name, capacity = point
+        return {
+            "cluster": False,
+            "id": dock_id,
+            "name": name,
+            "capacity": capacity,
+            "latitude": latitude,
+            "longitude": longitude,
+        }
+
+    def query(self, min_lng: float, min_lat: float, max_lng: float, max_lat: float, zoom: int) -> List[dict]:
+        """Clusters and single docks inside the bbox at `zoom`"""
+        x0, y0 = project(max_lat, min_lng)
+        x1, y1 = project(min_lat, max_lng)
+        z = max(self.min_zoom, min(zoom, self.max_zoom + 1))
+
+        if z > self.max_zoom:
+            level_cells = self._members
+            lo, hi = self._cell(x0, y0, self.max_zoom), self._cell(x1, y1, self.max_zoom)
+        else:
+            level_cells = self._levels[z]
+            lo, hi = self._cell(x0, y0, z), self._cell(x1, y1, z)
+
+        if (hi[0] - lo[0] + 1) * (hi[1] - lo[1] + 1) > len(level_cells):
+            cells = [cell for cell in level_cells if lo[0] <= cell[0] <= hi[0] and lo[1] <= cell[1] <= hi[1]]
+        else:
+            cells = [
+                (cx, cy)
+                for cx in range(lo[0], hi[0] + 1)
+                for cy in range(lo[1], hi[1] + 1)
+                if (cx, cy) in level_cells
+            ]
+
+        features: List[dict] = []
+        if z > self.max_zoom:
+            for cell in cells:
+                features.extend(self._single(point, dock_id) for dock_id, point in level_cells[cell].items())
+            return features
+
+        for cell in cells:
+            cluster = level_cells[cell]
+            if cluster.count == 1:
+                features.append(self._single_at(cell, z))
+                continue
+            latitude, longitude = unproject(cluster.sum_x / cluster.count, cluster.sum_y / cluster.count)
+            features.append({
+                "cluster": True,
+                "point_count": cluster.count,
+                "capacity": cluster.capacity,
+                "latitude": latitude,
+                "longitude": longitude,
+                "expansion_zoom": self._expansion_zoom(cell, z),
+            })
+        return features
+
+    def _single_at(self, cell: Cell, z: int) -> dict:
+        # Follow the only occupied child down to the level that keeps members
+        cells = [cell]
+        for deeper in range(z, self.max_zoom):
+            cells = self._children(cells, deeper)
+        dock_id, point = next(iter(self._members[cells[0]].items()))
+        return self._single(point, dock_id)
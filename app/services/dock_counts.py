@@ -0,0 +1,139 @@
+import random
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import select, text, update
+from sqlalchemy.dialects.postgresql import insert
+from app.config import settings
+from app.models.bike import Bike, BikeStatus
+from app.models.dock import Dock
+from app.models.dock_count_stripe import DockCountStripe
+from app.services.metrics import metrics
+
+# (dock_id, status) of a bike before and after a change; dock_id may be None
+Placement = Tuple[Optional[object], Optional[str]]
+
+# Moves every pending stripe delta into docks.available_count in one statement.
+# DELETE ... RETURNING locks the stripe rows, so increments in flight are
+# either folded now or land in a fresh row for the next fold, never lost.
+# Bumps updated_at so the ?since= dock sync picks up the new counts.
+FOLD_SQL = text("""
+WITH moved AS (
+    DELETE FROM dock_count_stripes RETURNING dock_id, delta
+), totals AS (
+    SELECT dock_id, SUM(delta) AS delta FROM moved GROUP BY dock_id
+)
+UPDATE docks SET available_count = docks.available_count + totals.delta, updated_at = now()
+FROM totals
+WHERE docks.id = totals.dock_id AND totals.delta <> 0
+""")
+
+# Recomputes every count with one GROUP BY over bikes, less any deltas still
+# waiting in stripes, and only touches docks whose stored value drifted
+RECONCILE_SQL = text("""
+WITH actual AS (
+    SELECT dock_id, COUNT(*) AS available
+    FROM bikes
+    WHERE status = :available AND dock_id IS NOT NULL
+    GROUP BY dock_id
+), pending AS (
+    SELECT dock_id, SUM(delta) AS delta FROM dock_count_stripes GROUP BY dock_id
+), target AS (
+    SELECT d.id, COALESCE(a.available, 0) - COALESCE(p.delta, 0) AS available_count
+    FROM docks d
+    LEFT JOIN actual a ON a.dock_id = d.id
+    LEFT JOIN pending p ON p.dock_id = d.id
+)
+UPDATE docks SET available_count = target.available_count, updated_at = now()
+FROM target
+WHERE docks.id = target.id AND docks.available_count IS DISTINCT FROM target.available_count
+""")
+
+
+def _is_available(status) -> bool:
+    return status is not None and BikeStatus(status) == BikeStatus.available
+
+
+def availability_deltas(changes: Iterable[Tuple[Placement, Placement]]) -> Dict[str, int]:
+    """Net available_count change per dock for bikes moving from one placement to another"""
+    deltas: Counter = Counter()
+    for (before_dock, before_status), (after_dock, after_status) in changes:
+        if before_dock is not None and _is_available(before_status):
+            deltas[str(before_dock)] -= 1
+        if after_dock is not None and _is_available(after_status):
+            deltas[str(after_dock)] += 1
+    return {dock_id: delta for dock_id, delta in deltas.items() if delta}
+
+
+def _statements(deltas: Dict[str, int]) -> List:
+    """
+    Statements applying the deltas: an atomic `available_count + n` on the
+    dock row, or with striping an upsert into one random stripe row.
+    """
+    statements = []
+    for dock_id, delta in sorted(deltas.items()):
+        if settings.dock_count_stripes > 0:
+            stripe = random.randrange(settings.dock_count_stripes)
+            statement = insert(DockCountStripe).values(dock_id=dock_id, stripe=stripe, delta=delta)
+            statements.append(statement.on_conflict_do_update(
+                index_elements=[DockCountStripe.dock_id, DockCountStripe.stripe],
+                set_={"delta": DockCountStripe.delta + statement.excluded.delta},
+            ))
+        else:
+            statements.append(
+                update(Dock)
+                .where(Dock.id == dock_id)
+                .values(available_count=Dock.available_count + delta, updated_at=datetime.utcnow())
+            )
+    return statements
+
+
+def change_bike_status(bike_id, target: BikeStatus):
+    """
+    Conditional UPDATE moving a bike to `target`, RETURNING (dock_id, status
+    before the change) only when it changed. The previous status is read
+    under FOR UPDATE in the same statement, so of concurrent changes each
+    sees the status the one before it left, and the count deltas built from
+    the returned rows add up.
+    """
+    previous = select(Bike.id, Bike.status).where(Bike.id == bike_id).with_for_update().subquery("previous")
+    return (
+        update(Bike)
+        .where(Bike.id == previous.c.id, previous.c.status != target)
+        .values(status=target, updated_at=datetime.utcnow())
+        .returning(Bike.dock_id, previous.c.status)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def adjust_counts(session, changes: Iterable[Tuple[Placement, Placement]]) -> None:
+    """Queue count updates on a sync session; they commit with the bike change"""
+    deltas = availability_deltas(changes)
+    for statement in _statements(deltas):
+        session.exec(statement)
+    metrics.inc("dock_counts.adjusted", len(deltas))
+
+
+async def adjust_counts_async(session, changes: Iterable[Tuple[Placement, Placement]]) -> None:
+    """adjust_counts for an AsyncSession"""
+    deltas = availability_deltas(changes)
+    for statement in _statements(deltas):
+        await session.exec(statement)
+    metrics.inc("dock_counts.adjusted", len(deltas))
+
+
+def fold_stripes(session) -> int:
+    """Fold pending stripe deltas into docks.available_count; returns docks updated"""
+    with metrics.timer("dock_counts.fold"):
+        result = session.exec(FOLD_SQL)
+        session.commit()
+    return result.rowcount
+
+
+def reconcile_counts(session) -> int:
+    """Recompute every dock's available_count from bikes; returns docks corrected"""
+    with metrics.timer("dock_counts.reconcile"):
+        result = session.exec(RECONCILE_SQL, params={"available": BikeStatus.available.name})
+        session.commit()
+    metrics.inc("dock_counts.reconciled", result.rowcount)
+    return result.rowcount
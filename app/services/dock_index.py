@@ -0,0 +1,310 @@
+import logging
+import math
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from uuid import UUID
+import numpy as np
+import redis
+from sqlalchemy import func
+from sqlmodel import select
+from app.auth.cache import TTLCache
+from app.config import settings
+from app.models.bike import Bike, BikeStatus
+from app.models.dock import Dock
+from app.schemas.bike import BikeResponse
+from app.services.clusters import ClusterIndex
+from app.services.geo import EARTH_RADIUS_M, haversine_m
+from app.services.metrics import metrics
+from app.services.redis_client import get_async_redis
+
+logger = logging.getLogger(__name__)
+
+# Bumped on every dock create/update/delete so other processes reload
+VERSION_KEY = "docks:version"
+
+# Docks whose bikes are fetched per round trip when filling a nearby bike list
+BIKE_LOOKUP_BATCH = 50
+
+
+@dataclass(frozen=True)
+class DockEntry:
+    id: str
+    name: str
+    latitude: float
+    longitude: float
+    capacity: int
+    address: Optional[str] = None
+
+
+class DockIndex:
+    """
+    Grid index over dock positions for in-process radius queries.
+
+    Docks are bucketed into square cells of `cell_degrees`. A query visits
+    only the cells overlapping the search circle's bounding box and computes
+    exact haversine distances for those candidates in one NumPy batch.
+    Map clusters are kept in step with every change.
+    """
+
+    def __init__(self, cell_degrees: float, clusters: Optional[ClusterIndex] = None):
+        self.cell_degrees = cell_degrees
+        self.clusters = clusters or ClusterIndex()
+        self._lock = threading.RLock()
+        self._reset()
+        self.loaded = False
+        self.version: Optional[int] = None
+        self.loaded_at = 0.0
+        self.checked_at = 0.0
+
+    def _reset(self) -> None:
+        self._entries: Dict[str, DockEntry] = {}
+        self._slots: Dict[str, int] = {}
+        self._free: List[int] = []
+        self._ids: List[Optional[str]] = []
+        self._lat = np.empty(0)
+        self._lon = np.empty(0)
+        self._cells: Dict[Tuple[int, int], Set[int]] = {}
+        self.clusters.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _cell(self, latitude: float, longitude: float) -> Tuple[int, int]:
+        return math.floor(latitude / self.cell_degrees), math.floor(longitude / self.cell_degrees)
+
+    def get(self, dock_id) -> Optional[DockEntry]:
+        return self._entries.get(str(dock_id))
+
+    def replace_all(self, entries: Iterable[DockEntry], version: Optional[int] = None) -> None:
+        """Rebuild the whole index from a full load"""
+        entries = list(entries)
+        with self._lock:
+            self._reset()
+            self._ids = [entry.id for entry in entries]
+            self._lat = np.array([entry.latitude for entry in entries], dtype=float)
+            self._lon = np.array([entry.longitude for entry in entries], dtype=float)
+            for slot, entry in enumerate(entries):
+                self._entries[entry.id] = entry
+                self._slots[entry.id] = slot
+                self._cells.setdefault(self._cell(entry.latitude, entry.longitude), set()).add(slot)
+            self.clusters.rebuild(
+                (entry.id, entry.latitude, entry.longitude, entry.name, entry.capacity) for entry in entries
+            )
+            self.loaded = True
+            self.version = version
+            self.loaded_at = self.checked_at = time.monotonic()
+
+    def upsert(self, entry: DockEntry) -> None:
+        """Add a dock or move/rename an existing one"""
+        with self._lock:
+            self._remove(entry.id)
+            if self._free:
+                slot = self._free.pop()
+            else:
+                slot = len(self._ids)
+                self._ids.append(None)
+                self._lat = np.append(self._lat, 0.0)
+                self._lon = np.append(self._lon, 0.0)
+            self._ids[slot] = entry.id
+            self._lat[slot] = entry.latitude
+            self._lon[slot] = entry.longitude
+            self._entries[entry.id] = entry
+            self._slots[entry.id] = slot
+            self._cells.setdefault(self._cell(entry.latitude, entry.longitude), set()).add(slot)
+            self.clusters.add(entry.id, entry.latitude, entry.longitude, entry.name, entry.capacity)
+
+    def remove(self, dock_id) -> None:
+        with self._lock:
+            self._remove(str(dock_id))
+
+    def _remove(self, dock_id: str) -> None:
+        slot = self._slots.pop(dock_id, None)
+        if slot is None:
+            return
+        entry = self._entries.pop(dock_id)
+        cell_key = self._cell(entry.latitude, entry.longitude)
+        cell = self._cells.get(cell_key)
+        if cell is not None:
+            cell.discard(slot)
+            if not cell:
+                del self._cells[cell_key]
+        self._ids[slot] = None
+        self._free.append(slot)
+        self.clusters.remove(dock_id)
+
+    def nearby(
+        self,
+        latitude: float,
+        longitude: float,
+        radius_m: float,
+        limit: Optional[int] = None,
+    ) -> List[Tuple[DockEntry, float]]:
+        """Docks within `radius_m` metres, nearest first, with their distances"""
+        with metrics.timer("dock_index.query"), self._lock:
+            if not self._entries:
+                return []
+            dlat = math.degrees(radius_m / EARTH_RADIUS_M)
+            dlon = dlat / max(math.cos(math.radians(latitude)), 0.01)
+            lat_lo, lon_lo = self._cell(latitude - dlat, longitude - dlon)
+            lat_hi, lon_hi = self._cell(latitude + dlat, longitude + dlon)
+
+            if (lat_hi - lat_lo + 1) * (lon_hi - lon_lo + 1) >= len(self._cells):
+                # Wider than the populated grid: cheaper to walk every cell
+                cells = list(self._cells.values())
+            else:
+                cells = [
+                    self._cells[key]
+                    for key in (
+                        (i, j)
+                        for i in range(lat_lo, lat_hi + 1)
+                        for j in range(lon_lo, lon_hi + 1)
+                    )
+                    if key in self._cells
+                ]
+            candidates = [slot for cell in cells for slot in cell]
+            if not candidates:
+                return []
+
+            slots = np.fromiter(candidates, dtype=np.intp, count=len(candidates))
+            distances = haversine_m(latitude, longitude, self._lat[slots], self._lon[slots])
+            within = distances <= radius_m
+            slots, distances = slots[within], distances[within]
+            order = np.argsort(distances, kind="stable")
+            if limit is not None:
+                order = order[:limit]
+            return [(self._entries[self._ids[slots[i]]], float(distances[i])) for i in order]
+
+    def clusters_in(self, min_lng: float, min_lat: float, max_lng: float, max_lat: float, zoom: int) -> List[dict]:
+        """Map clusters (or single docks) inside a bbox at a zoom level"""
+        with metrics.timer("dock_index.clusters"), self._lock:
+            return self.clusters.query(min_lng, min_lat, max_lng, max_lat, zoom)
+
+    async def load(self, session, version: Optional[int] = None) -> None:
+        """Replace the index with every dock from the database"""
+        rows = (await session.exec(
+            select(Dock.id, Dock.name, func.ST_Y(Dock.geom), func.ST_X(Dock.geom), Dock.capacity, Dock.address)
+            .where(Dock.geom.isnot(None))
+        )).all()
+        self.replace_all(
+            (DockEntry(str(row[0]), row[1], float(row[2]), float(row[3]), row[4], row[5]) for row in rows),
+            version,
+        )
+        metrics.inc("dock_index.reload")
+
+    async def ensure_fresh(self, session) -> bool:
+        """
+        Reload when another process changed docks (version bump in Redis) or the
+        index is older than dock_index_max_age. Returns whether it is usable.
+        """
+        now = time.monotonic()
+        if self.loaded and now - self.checked_at < settings.dock_index_check_interval:
+            return True
+        self.checked_at = now
+        version = await _read_version()
+        stale = (
+            not self.loaded
+            or now - self.loaded_at > settings.dock_index_max_age
+            or (version is not None and version != self.version)
+        )
+        if stale:
+            try:
+                await self.load(session, version)
+            except Exception:
+                logger.warning("Could not load dock index, using PostGIS for nearby queries", exc_info=True)
+        return self.loaded
+
+    async def apply(self, entry: DockEntry) -> None:
+        """Record a dock create/update made by this process"""
+        self.upsert(entry)
+        await self._bump_version()
+
+    async def discard(self, dock_id) -> None:
+        """Record a dock deletion made by this process"""
+        self.remove(dock_id)
+        await self._bump_version()
+
+    async def mark_stale(self) -> None:
+        """Force a reload on the next query (and in every other process)"""
+        self.loaded_at = self.checked_at = 0.0
+        await self._bump_version()
+
+    async def _bump_version(self) -> None:
+        try:
+            version = await get_async_redis().incr(VERSION_KEY)
+        except redis.RedisError:
+            logger.warning("Could not publish dock index version", exc_info=True)
+            return
+        # Only adopt the new version if nobody else changed docks in between
+        if self.version is not None and version == self.version + 1:
+            self.version = version
+
+
+async def _read_version() -> Optional[int]:
+    try:
+        raw = await get_async_redis().get(VERSION_KEY)
+    except redis.RedisError:
+        logger.warning("Dock index version unavailable", exc_info=True)
+        return None
+    return int(raw) if raw is not None else 0
+
+
+dock_index = DockIndex(
+    cell_degrees=settings.dock_index_cell_degrees,
+    clusters=ClusterIndex(max_zoom=settings.cluster_max_zoom, cells_per_tile=settings.cluster_cells_per_tile),
+)
+metrics.register_gauge("dock_index.size", lambda: len(dock_index))
+
+# dock_id -> available bikes parked there, as response objects
+_dock_bikes = TTLCache(maxsize=settings.dock_bikes_cache_size, ttl=settings.dock_bikes_cache_ttl)
+metrics.register_gauge("dock_bikes_cache.size", lambda: len(_dock_bikes))
+
+
+async def available_bikes(session, dock_ids: List[str]) -> Dict[str, List[BikeResponse]]:
+    """Available bikes per dock, from the cache or one batched query for misses"""
+    result: Dict[str, List[BikeResponse]] = {}
+    missing = []
+    for dock_id in dock_ids:
+        cached = _dock_bikes.get(dock_id)
+        if cached is None:
+            missing.append(dock_id)
+        else:
+            result[dock_id] = cached
+    metrics.inc("dock_bikes_cache.hit", len(dock_ids) - len(missing))
+    if missing:
+        metrics.inc("dock_bikes_cache.miss", len(missing))
+        rows = (await session.exec(
+            select(Bike).where(
+                Bike.dock_id.in_([UUID(dock_id) for dock_id in missing]),
+                Bike.status == BikeStatus.available,
+            )
+        )).all()
+        grouped: Dict[str, List[BikeResponse]] = {dock_id: [] for dock_id in missing}
+        for bike in rows:
+            grouped[str(bike.dock_id)].append(BikeResponse.model_validate(bike))
+        for dock_id, bikes in grouped.items():
+            _dock_bikes.set(dock_id, bikes)
+            result[dock_id] = bikes
+    return result
+
+
+def invalidate_dock_bikes(*dock_ids) -> None:
+    """Drop cached bike lists after bikes at these docks changed"""
+    for dock_id in dock_ids:
+        if dock_id is not None:
+            _dock_bikes.pop(str(dock_id))
+
+
+async def nearby_bikes(session, latitude: float, longitude: float, radius_m: float, limit: int) -> List[BikeResponse]:
+    """Available bikes at docks within `radius_m`, nearest docks first"""
+    hits = dock_index.nearby(latitude, longitude, radius_m)
+    bikes: List[BikeResponse] = []
+    for start in range(0, len(hits), BIKE_LOOKUP_BATCH):
+        batch = [entry.id for entry, _ in hits[start:start + BIKE_LOOKUP_BATCH]]
+        by_dock = await available_bikes(session, batch)
+        for dock_id in batch:
+            bikes.extend(by_dock[dock_id])
+            if len(bikes) >= limit:
+                return bikes[:limit]
+    return bikes
@@ -1,8 +1,160 @@
-from typing import Optional, Dict, Any
+import atexit
+import logging
+import threading
+import time
+from collections import deque
+from typing import Optional, Dict, Any, Callable, List
+from sqlalchemy import insert
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.config import settings
 from app.models.event import Event
+from app.services.metrics import metrics
 from uuid import UUID
 
+logger = logging.getLogger(__name__)
+
+EVENT_COLUMNS = ("id", "user_id", "bike_id", "dock_id", "event_type", "properties", "occurred_at")
+
+
+def _insert_events(rows: List[Dict[str, Any]]) -> None:
+    """Bulk insert buffered event rows in one statement (executemany)"""
+    from app.database import engine
+
+    with engine.begin() as conn:
+        conn.execute(insert(Event), rows)
+
+
+class EventBuffer:
+    """Write-behind buffer that flushes events in bulk on size or time thresholds"""
+
+    def __init__(
+        self,
+        writer: Callable[[List[Dict[str, Any]]], None] = _insert_events,
+        flush_size: int = 200,
+        flush_interval: float = 1.0,
+        max_pending: int = 10000,
+    ):
+        self.writer = writer
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending: deque = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._atexit_registered = False
+
+    @property
+    def depth(self) -> int:
+        return len(self._pending)
+
+    def start(self) -> None:
+        """Start the background flusher thread (idempotent)"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="event-buffer", daemon=True)
+            self._thread.start()
+            if not self._atexit_registered:
+                atexit.register(self.stop)
+                self._atexit_registered = True
+
+    def stop(self) -> None:
+        """Stop the flusher and drain everything still buffered"""
+        self._stopping.set()
+        self._wakeup.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=30)
+        self._thread = None
+        self.flush()
+
+    def add(self, row: Dict[str, Any]) -> None:
+        """Queue one event row; never touches the database on the caller's thread"""
+        if self._thread is None:
+            self.start()
+        with self._lock:
+            if len(self._pending) >= self.max_pending:
+                metrics.inc("events.dropped")
+                logger.warning("Event buffer full (%s), dropping %s", self.max_pending, row.get("event_type"))
+                return
+            self._pending.append(row)
+            depth = len(self._pending)
+        if depth >= self.flush_size:
+            self._wakeup.set()
+
+    def flush(self) -> int:
+        """Write out everything currently buffered; returns rows written"""
+        written = 0
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    batch = [self._pending.popleft() for _ in range(min(self.flush_size, len(self._pending)))]
+                if not batch:
+                    return written
+                written += self._write(batch)
+
+    def _write(self, batch: List[Dict[str, Any]]) -> int:
+        start = time.perf_counter()
+        try:
+            self.writer(batch)
+            written = len(batch)
+        except Exception:
+            # One bad row (e.g. a dangling foreign key) must not sink the batch
+            logger.exception("Bulk event insert failed, retrying %s rows individually", len(batch))
+            written = 0
+            for row in batch:
+                try:
+                    self.writer([row])
+                    written += 1
+                except Exception:
+                    metrics.inc("events.dropped")
+                    logger.exception("Dropping event %s", row.get("event_type"))
+        metrics.observe("events.flush", time.perf_counter() - start)
+        metrics.inc("events.flushed", written)
+        return written
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Event buffer flush failed")
+
+
+event_buffer = EventBuffer(
+    flush_size=settings.event_buffer_flush_size,
+    flush_interval=settings.event_buffer_flush_interval,
+    max_pending=settings.event_buffer_max_pending,
+)
+metrics.register_gauge("events.buffer_depth", lambda: event_buffer.depth)
+
+
+def _build_event(
+    user_id: Optional[UUID],
+    bike_id: Optional[UUID],
+    dock_id: Optional[UUID],
+    event_type: str,
+    properties: Optional[Dict[str, Any]]
+) -> Event:
+    return Event(
+        user_id=user_id,
+        bike_id=bike_id,
+        dock_id=dock_id,
+        event_type=event_type,
+        properties=properties or {}
+    )
+
+
+def _is_synchronous() -> bool:
+    return settings.event_buffer_mode == "sync"
+
 
 def track_event(
     db: Session,
@@ -12,17 +164,55 @@ def track_event(
     event_type: str = "",
     properties: Optional[Dict[str, Any]] = None
 ) -> Event:
-    """Track an analytics event"""
-    event = Event(
-        user_id=user_id,
-        bike_id=bike_id,
-        dock_id=dock_id,
-        event_type=event_type,
-        properties=properties or {}
-    )
-    
+    """Track an analytics event (buffered unless EVENT_BUFFER_MODE=sync)"""
+    event = _build_event(user_id, bike_id, dock_id, event_type, properties)
+
+    if not _is_synchronous():
+        event_buffer.add({column: getattr(event, column) for column in EVENT_COLUMNS})
+        return event
+
     db.add(event)
     db.commit()
     db.refresh(event)
-    
+
+    return event
+
+
+async def track_event_async(
+    db: AsyncSession,
+    user_id: Optional[UUID] = None,
+    bike_id: Optional[UUID] = None,
+    dock_id: Optional[UUID] = None,
+    event_type: str = "",
+    properties: Optional[Dict[str, Any]] = None
+) -> Event:
+    """Track an analytics event on an async session (buffered unless EVENT_BUFFER_MODE=sync)"""
+    event = _build_event(user_id, bike_id, dock_id, event_type, properties)
+
+    if not _is_synchronous():
+        event_buffer.add({column: getattr(event, column) for column in EVENT_COLUMNS})
+        return event
+
+    db.add(event)
+    await db.commit()
+    await db.refresh(event)
+
     return event
+
+
+async def track_events_async(db: AsyncSession, events: List[Dict[str, Any]]) -> None:
+    """track_event_async for many events (keyword dicts), one commit when synchronous"""
+    built = [
+        _build_event(
+            event.get("user_id"), event.get("bike_id"), event.get("dock_id"),
+            event.get("event_type", ""), event.get("properties"),
+        )
+        for event in events
+    ]
+    if not _is_synchronous():
+        for event in built:
+            event_buffer.add({column: getattr(event, column) for column in EVENT_COLUMNS})
+        return
+    if built:
+        db.add_all(built)
+        await db.commit()
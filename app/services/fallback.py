@@ -0,0 +1,117 @@
+import logging
+from typing import List, Optional
+from uuid import UUID
+import orjson
+import redis
+from sqlalchemy import desc, func
+from sqlmodel import select
+from app.auth.cache import TTLCache
+from app.config import settings
+from app.models.bike import Bike, BikeStatus
+from app.models.dock import Dock
+from app.schemas.bike import BikeResponse
+from app.services.metrics import metrics
+from app.services.redis_client import get_async_redis, get_redis
+
+logger = logging.getLogger(__name__)
+
+# Precomputed answer for nearby searches that find nothing (e.g. outside coverage)
+FALLBACK_KEY = "nearby:fallback"
+FALLBACK_SIZE = 10
+
+_local = TTLCache(maxsize=1, ttl=settings.nearby_fallback_local_ttl)
+
+
+def _ranked_docks():
+    """Docks with the most available bikes first: the best places to send someone"""
+    available = func.count(Bike.id).label("available")
+    return (
+        select(Dock.id, Dock.name, func.ST_Y(Dock.geom), func.ST_X(Dock.geom), available)
+        .join(Bike, (Bike.dock_id == Dock.id) & (Bike.status == BikeStatus.available), isouter=True)
+        .where(Dock.geom.isnot(None))
+        .group_by(Dock.id)
+        .order_by(desc(available), Dock.id)
+        .limit(FALLBACK_SIZE)
+    )
+
+
+def _available_bikes(dock_ids: List[UUID]):
+    return (
+        select(Bike)
+        .where(Bike.dock_id.in_(dock_ids), Bike.status == BikeStatus.available)
+        .order_by(Bike.id)
+    )
+
+
+def _payload(dock_rows, bikes) -> bytes:
+    rank = {row[0]: position for position, row in enumerate(dock_rows)}
+    bikes = sorted(bikes, key=lambda bike: rank[bike.dock_id])[:FALLBACK_SIZE]
+    return orjson.dumps({
+        "docks": [
+            {
+                "id": str(dock_id),
+                "name": name,
+                "availableBikes": available,
+                "location": {
+                    "latitude": latitude,
+                    "longitude": longitude
+                },
+                "distance_meters": None,
+                "fallback": True
+            }
+            for dock_id, name, latitude, longitude, available in dock_rows
+        ],
+        "bikes": [BikeResponse.model_validate(bike).model_dump(mode="json") for bike in bikes],
+    })
+
+
+def refresh_fallback(session) -> bytes:
+    """Rebuild the fallback set and publish it to Redis (periodic worker task)"""
+    with metrics.timer("nearby_fallback.refresh"):
+        dock_rows = session.exec(_ranked_docks()).all()
+        bikes = session.exec(_available_bikes([row[0] for row in dock_rows])).all() if dock_rows else []
+        payload = _payload(dock_rows, bikes)
+    get_redis().set(FALLBACK_KEY, payload, ex=settings.nearby_fallback_ttl)
+    return payload
+
+
+async def _build(session) -> bytes:
+    dock_rows = (await session.exec(_ranked_docks())).all()
+    bikes = (await session.exec(_available_bikes([row[0] for row in dock_rows]))).all() if dock_rows else []
+    return _payload(dock_rows, bikes)
+
+
+async def get_fallback(session) -> dict:
+    """
+    The fallback docks and bikes: a local cache hit, else one Redis GET.
+
+    Only when the worker has never published (or Redis is down) is the set
+    built inline, once, and published for everyone else.
+    """
+    cached: Optional[dict] = _local.get(FALLBACK_KEY)
+    if cached is not None:
+        metrics.inc("nearby_fallback.local_hit")
+        return cached
+
+    payload = None
+    try:
+        payload = await get_async_redis().get(FALLBACK_KEY)
+    except redis.RedisError:
+        logger.warning("Nearby fallback cache unavailable", exc_info=True)
+    if payload is None:
+        metrics.inc("nearby_fallback.build")
+        payload = await _build(session)
+        try:
+            await get_async_redis().set(FALLBACK_KEY, payload, ex=settings.nearby_fallback_ttl, nx=True)
+        except redis.RedisError:
+            logger.warning("Could not publish nearby fallback", exc_info=True)
+    else:
+        metrics.inc("nearby_fallback.redis_hit")
+
+    data = orjson.loads(payload)
+    result = {
+        "docks": data["docks"],
+        "bikes": [BikeResponse.model_validate(bike) for bike in data["bikes"]],
+    }
+    _local.set(FALLBACK_KEY, result)
+    return result
@@ -0,0 +1,124 @@
+import math
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+import numpy as np
+from fastapi import HTTPException, status
+from geoalchemy2 import Geography
+from shapely.geometry import Polygon
+from sqlalchemy import cast, func
+
+
+def point_geography(latitude: float, longitude: float):
+    """Bound-parameter geography point for spatial predicates and KNN ordering"""
+    return cast(
+        func.ST_SetSRID(func.ST_MakePoint(longitude, latitude), 4326),
+        Geography(geometry_type="POINT", srid=4326),
+    )
+
+
+EARTH_RADIUS_M = 6371008.8
+
+
+def haversine_m(lat, lon, lats, lons) -> np.ndarray:
+    """
+    Great-circle distance in metres between points given in degrees.
+
+    Vectorised: any argument may be a scalar or an array, and they broadcast
+    (one origin against many docks, or consecutive points along a path).
+    """
+    lat1 = np.radians(lat)
+    lat2 = np.radians(lats)
+    dlat = lat2 - lat1
+    dlon = np.radians(lons) - np.radians(lon)
+    a = np.sin(dlat / 2.0) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2.0) ** 2
+    return 2.0 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def parse_bbox(bbox: str) -> Tuple[float, float, float, float]:
+    """Parse "min_lng,min_lat,max_lng,max_lat"; 400 on anything else"""
+    try:
+        min_lng, min_lat, max_lng, max_lat = (float(part) for part in bbox.split(","))
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="bbox must be min_lng,min_lat,max_lng,max_lat"
+        )
+    if not (-180 <= min_lng < max_lng <= 180 and -90 <= min_lat < max_lat <= 90):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="bbox is out of range or inverted"
+        )
+    return min_lng, min_lat, max_lng, max_lat
+
+
+def bbox_envelope(min_lng: float, min_lat: float, max_lng: float, max_lat: float):
+    """Bound-parameter geometry envelope (SRID 4326) for && / ST_Intersects on geom"""
+    return func.ST_MakeEnvelope(min_lng, min_lat, max_lng, max_lat, 4326)
+
+
+def polygon_from_coords(coords: list) -> Polygon:
+    """
+    Build a valid polygon from GeoJSON Polygon coordinates
+    ([[[lng, lat], ...], hole, ...]) or a single [[lng, lat], ...] ring.
+    """
+    try:
+        rings = coords if coords and isinstance(coords[0][0], (list, tuple)) else [coords]
+        polygon = Polygon(rings[0], rings[1:])
+    except (IndexError, TypeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="polygon_coords must be GeoJSON Polygon coordinates"
+        )
+    if polygon.is_empty or not polygon.is_valid:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="polygon_coords do not form a valid polygon"
+        )
+    return polygon
+
+
+# (lat, lng, epoch milliseconds or None)
+PathPoint = Tuple[float, float, Optional[int]]
+
+
+def _epoch_ms(value) -> Optional[int]:
+    """Sample timestamps as epoch ms: accepts epoch seconds or ms, or ISO-8601"""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        if not math.isfinite(value):
+            return None
+        # Anything past ~2001 in seconds is already milliseconds
+        return int(value if value > 1e11 else value * 1000)
+    if isinstance(value, str):
+        try:
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return int(parsed.timestamp() * 1000)
+    return None
+
+
+def path_samples(samples: Optional[List[dict]]) -> List[PathPoint]:
+    """(lat, lng, t) from a client path sample, skipping malformed entries"""
+    points = []
+    for sample in samples or []:
+        if not isinstance(sample, dict):
+            continue
+        lat = sample.get("lat", sample.get("latitude"))
+        lng = sample.get("lng", sample.get("lon", sample.get("longitude")))
+        try:
+            lat, lng = float(lat), float(lng)
+        except (TypeError, ValueError):
+            continue
+        if not (math.isfinite(lat) and math.isfinite(lng)):
+            continue
+        points.append((lat, lng, _epoch_ms(sample.get("t", sample.get("ts", sample.get("timestamp"))))))
+    return points
+
+
+def path_points(samples: Optional[List[dict]]) -> List[Tuple[float, float]]:
+    """(lat, lng) pairs from a client path sample, skipping malformed entries"""
+    return [(lat, lng) for lat, lng, _ in path_samples(samples)]
@@ -0,0 +1,195 @@
+import asyncio
+import hashlib
+import logging
+import time
+from typing import List, Optional, Tuple, Union
+import orjson
+import redis
+from fastapi.responses import ORJSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.config import settings
+from app.services.metrics import metrics
+from app.services.redis_client import get_async_redis
+
+logger = logging.getLogger(__name__)
+
+HEADER = b"idempotency-key"
+KEY = "idem:{digest}"
+UNSAFE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+MAX_KEY_LENGTH = 255
+
+# (status, headers, body) of a finished response
+Stored = Tuple[int, List[List[str]], bytes]
+
+
+def _pack(meta: dict, body: bytes = b"") -> bytes:
+    # orjson never emits a newline, so the first one ends the metadata
+    return orjson.dumps(meta) + b"\n" + body
+
+
+def _unpack(raw: bytes) -> Tuple[dict, bytes]:
+    meta, _, body = raw.partition(b"\n")
+    return orjson.loads(meta), body
+
+
+def _error(status_code: int, detail: str) -> ORJSONResponse:
+    return ORJSONResponse(status_code=status_code, content={"detail": detail})
+
+
+class IdempotencyMiddleware:
+    """
+    Replays the stored response for unsafe requests retried with the same
+    Idempotency-Key header.
+
+    Keys are scoped to the caller's Authorization header, method and path.
+    The first request marks the key pending, runs, and stores the finished
+    response (anything below 500) for idempotency_ttl seconds. A duplicate
+    arriving meanwhile waits for that response instead of running again. A
+    key reused with a different body is refused with 422. Without Redis,
+    requests run as if they carried no key.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in UNSAFE_METHODS or settings.idempotency_ttl <= 0:
+            return await self.app(scope, receive, send)
+        headers = dict(scope["headers"])
+        idempotency_key = headers.get(HEADER)
+        if not idempotency_key:
+            return await self.app(scope, receive, send)
+        if len(idempotency_key) > MAX_KEY_LENGTH:
+            return await _error(400, "Idempotency-Key is too long")(scope, receive, send)
+
+        body = await _read_body(receive)
+        scope_digest = hashlib.sha256(b"\0".join((
+            headers.get(b"authorization", b""),
+            scope["method"].encode(),
+            scope["path"].encode(),
+            idempotency_key,
+        ))).hexdigest()
+        key = KEY.format(digest=scope_digest)
+        fingerprint = hashlib.sha256(scope.get("query_string", b"") + b"\0" + body).hexdigest()
+
+        try:
+            stored = await self._claim_or_wait(key, fingerprint)
+        except redis.RedisError:
+            logger.warning("Idempotency store unavailable; running request without it", exc_info=True)
+            return await self.app(scope, _replay_body(body, receive), send)
+
+        if isinstance(stored, ORJSONResponse):
+            return await stored(scope, receive, send)
+        if stored is not None:
+            metrics.inc("idempotency.replayed")
+            status_code, response_headers, response_body = stored
+            await send({
+                "type": "http.response.start",
+                "status": status_code,
+                "headers": [(name.encode("latin-1"), value.encode("latin-1")) for name, value in response_headers]
+                + [(b"idempotent-replayed", b"true")],
+            })
+            await send({"type": "http.response.body", "body": response_body})
+            return
+
+        await self._run_and_store(scope, _replay_body(body, receive), send, key, fingerprint)
+
+    async def _claim_or_wait(self, key: str, fingerprint: str) -> Union[None, Stored, ORJSONResponse]:
+        """
+        None once this request holds the key and should run; the stored
+        response when another request finished first; an error response
+        for a reused key or a wait that timed out.
+        """
+        client = get_async_redis()
+        deadline = time.monotonic() + settings.idempotency_wait_timeout
+        delay = 0.02
+        waited = False
+        while True:
+            if await client.set(key, _pack({"state": "pending", "fingerprint": fingerprint}),
+                                nx=True, ex=settings.idempotency_lock_ttl):
+                return None
+            raw = await client.get(key)
+            if raw is not None:
+                meta, response_body = _unpack(raw)
+                if meta["fingerprint"] != fingerprint:
+                    metrics.inc("idempotency.mismatch")
+                    return _error(422, "Idempotency-Key was already used for a different request")
+                if meta["state"] == "done":
+                    if waited:
+                        metrics.inc("idempotency.waited")
+                    return meta["status"], meta["headers"], response_body
+                if time.monotonic() >= deadline:
+                    metrics.inc("idempotency.wait_timeout")
+                    return _error(409, "A request with this Idempotency-Key is still in progress")
+                waited = True
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 0.25)
+
+    async def _run_and_store(self, scope: Scope, receive: Receive, send: Send, key: str, fingerprint: str) -> None:
+        start: Optional[Message] = None
+        chunks: List[bytes] = []
+
+        async def capture(message: Message) -> None:
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+                if not message.get("more_body", False):
+                    await self._store(key, fingerprint, start, b"".join(chunks))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, capture)
+        finally:
+            if start is None or start["status"] >= 500:
+                # Failed requests are not remembered; a retry runs again
+                await self._release(key)
+
+    async def _store(self, key: str, fingerprint: str, start: Message, body: bytes) -> None:
+        if start["status"] >= 500:
+            return
+        meta = {
+            "state": "done",
+            "fingerprint": fingerprint,
+            "status": start["status"],
+            "headers": [[name.decode("latin-1"), value.decode("latin-1")] for name, value in start.get("headers", [])],
+        }
+        try:
+            await get_async_redis().set(key, _pack(meta, body), ex=settings.idempotency_ttl)
+            metrics.inc("idempotency.stored")
+        except redis.RedisError:
+            logger.warning("Could not store idempotent response", exc_info=True)
+            await self._release(key)
+
+    async def _release(self, key: str) -> None:
+        try:
+            await get_async_redis().delete(key)
+        except redis.RedisError:
+            logger.warning("Could not release idempotency key", exc_info=True)
+
+
+async def _read_body(receive: Receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            break
+    return b"".join(chunks)
+
+
+def _replay_body(body: bytes, receive: Receive) -> Receive:
+    """receive() that hands the already-read body to the app, then defers to the server"""
+    sent = False
+
+    async def replay() -> Message:
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        return await receive()
+
+    return replay
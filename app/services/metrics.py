@@ -0,0 +1,85 @@
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from typing import Callable, Deque, Dict, Any
+
+
+class Metrics:
+    """Minimal in-process metrics registry surfaced through `/metrics`"""
+
+    # Number of recent samples kept per timing for percentile estimates
+    WINDOW = 1024
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = defaultdict(float)
+        self._timings: Dict[str, Dict[str, Any]] = {}
+        self._gauges: Dict[str, Callable[[], Any]] = {}
+
+    def inc(self, name: str, value: float = 1) -> None:
+        """Increment a counter"""
+        with self._lock:
+            self._counters[name] += value
+
+    def observe(self, name: str, seconds: float) -> None:
+        """Record a duration sample in seconds"""
+        with self._lock:
+            timing = self._timings.get(name)
+            if timing is None:
+                timing = {"count": 0, "sum": 0.0, "max": 0.0, "recent": deque(maxlen=self.WINDOW)}
+                self._timings[name] = timing
+            timing["count"] += 1
+            timing["sum"] += seconds
+            timing["max"] = max(timing["max"], seconds)
+            timing["recent"].append(seconds)
+
+    @contextmanager
+    def timer(self, name: str):
+        """Time the enclosed block and record it under `name`"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def register_gauge(self, name: str, fn: Callable[[], Any]) -> None:
+        """Register a callable sampled whenever metrics are read"""
+        with self._lock:
+            self._gauges[name] = fn
+
+    @staticmethod
+    def _percentile(samples: Deque[float], pct: float) -> float:
+        ordered = sorted(samples)
+        if not ordered:
+            return 0.0
+        index = min(len(ordered) - 1, max(0, int(round(pct * len(ordered))) - 1))
+        return ordered[index]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current values of every counter, timing and gauge"""
+        with self._lock:
+            counters = dict(self._counters)
+            timings = {
+                name: {
+                    "count": t["count"],
+                    "avg_ms": round(t["sum"] / t["count"] * 1000, 3) if t["count"] else 0.0,
+                    "p50_ms": round(self._percentile(t["recent"], 0.50) * 1000, 3),
+                    "p99_ms": round(self._percentile(t["recent"], 0.99) * 1000, 3),
+                    "max_ms": round(t["max"] * 1000, 3),
+                }
+                for name, t in self._timings.items()
+            }
+            gauges = dict(self._gauges)
+
+        gauge_values = {}
+        for name, fn in gauges.items():
+            try:
+                gauge_values[name] = fn()
+            except Exception:
+                gauge_values[name] = None
+
+        return {"counters": counters, "timings": timings, "gauges": gauge_values}
+
+
+metrics = Metrics()
@@ -0,0 +1,264 @@
+import logging
+import math
+import threading
+import time
+from functools import lru_cache
+from typing import Awaitable, Callable, Iterator, List, Optional, Tuple
+import numpy as np
+import orjson
+import redis
+from app.config import settings
+from app.services.dock_index import dock_index
+from app.services.geo import EARTH_RADIUS_M, haversine_m
+from app.services.metrics import metrics
+from app.services.redis_client import get_async_redis
+
+logger = logging.getLogger(__name__)
+
+KEY = "nearby:{kind}:{cell}:{bucket}"
+KINDS = ("bikes", "docks")
+# Requests are rounded up to one of these radii (km); wider searches are not cached
+RADIUS_BUCKETS_KM = (0.5, 1.0, 2.0, 5.0)
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+# (latitude, longitude, payload) for one cached result, located at its dock
+Item = Tuple[float, float, object]
+# Fills a cache entry: (center lat, center lng, radius m, cap) -> items nearest the center first
+Fetch = Callable[[float, float, float, int], Awaitable[List[Item]]]
+
+
+def geohash(latitude: float, longitude: float, precision: int) -> str:
+    lat_lo, lat_hi, lng_lo, lng_hi = -90.0, 90.0, -180.0, 180.0
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        if even:
+            mid = (lng_lo + lng_hi) / 2
+            value = value * 2 + (longitude >= mid)
+            lng_lo, lng_hi = (mid, lng_hi) if longitude >= mid else (lng_lo, mid)
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            value = value * 2 + (latitude >= mid)
+            lat_lo, lat_hi = (mid, lat_hi) if latitude >= mid else (lat_lo, mid)
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits, value = 0, 0
+    return "".join(chars)
+
+
+def cell_size(precision: int) -> Tuple[float, float]:
+    """(lat, lng) extent in degrees of a geohash cell"""
+    lng_bits = math.ceil(precision * 5 / 2)
+    lat_bits = precision * 5 // 2
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lng_bits
+
+
+def _cell_center(latitude: float, longitude: float, precision: int) -> Tuple[float, float]:
+    dlat, dlng = cell_size(precision)
+    return (
+        (math.floor((latitude + 90) / dlat) + 0.5) * dlat - 90,
+        (math.floor((longitude + 180) / dlng) + 0.5) * dlng - 180,
+    )
+
+
+def _half_diagonal_m(latitude: float, precision: int) -> float:
+    dlat, dlng = cell_size(precision)
+    metres = math.radians(1) * EARTH_RADIUS_M
+    return math.hypot(dlat * metres, dlng * metres * math.cos(math.radians(latitude))) / 2
+
+
+def radius_bucket(radius_km: float) -> Optional[float]:
+    return next((bucket for bucket in RADIUS_BUCKETS_KM if radius_km <= bucket), None)
+
+
+def _superset_radius_m(bucket_km: float, latitude: float, precision: int) -> float:
+    """Covers a `bucket_km` search from anywhere in the cell"""
+    # 1% slack: PostGIS fills entries measuring on the spheroid, requests filter on a sphere
+    return (bucket_km * 1000 + _half_diagonal_m(latitude, precision)) * 1.01
+
+
+def _geohash_cell(row: int, col: int, precision: int) -> str:
+    """Geohash of the cell at (row, col) of the precision's lat/lng grid"""
+    lng_bits = math.ceil(precision * 5 / 2)
+    lat_bits = precision * 5 // 2
+    value = 0
+    for bit in range(precision * 5):
+        # Bits alternate longitude, latitude, starting with the most significant longitude bit
+        if bit % 2 == 0:
+            value = value * 2 + ((col >> (lng_bits - 1 - bit // 2)) & 1)
+        else:
+            value = value * 2 + ((row >> (lat_bits - 1 - bit // 2)) & 1)
+    return "".join(_BASE32[(value >> shift) & 31] for shift in range(precision * 5 - 5, -1, -5))
+
+
+def covering_keys(latitude: float, longitude: float, precision: int) -> Iterator[str]:
+    """Every cache key whose superset area contains this point"""
+    dlat, dlng = cell_size(precision)
+    lat_cells, lng_cells = round(180 / dlat), round(360 / dlng)
+    widest = max(RADIUS_BUCKETS_KM)
+    reach = _superset_radius_m(widest, latitude, precision) + _half_diagonal_m(latitude, precision)
+    reach_lat = math.degrees(reach / EARTH_RADIUS_M)
+    reach_lng = reach_lat / max(math.cos(math.radians(latitude)), 0.01)
+    rows = np.arange(
+        max(math.floor((latitude - reach_lat + 90) / dlat), 0),
+        min(math.floor((latitude + reach_lat + 90) / dlat), lat_cells - 1) + 1,
+    )
+    cols = np.arange(math.floor((longitude - reach_lng + 180) / dlng), math.floor((longitude + reach_lng + 180) / dlng) + 1)
+    row_grid, col_grid = np.meshgrid(rows, cols, indexing="ij")
+    center_lats = (row_grid.ravel() + 0.5) * dlat - 90
+    center_lngs = (col_grid.ravel() + 0.5) * dlng - 180
+    distances = haversine_m(latitude, longitude, center_lats, center_lngs)
+    metres = math.radians(1) * EARTH_RADIUS_M
+    half_diagonals = np.hypot(dlat * metres, dlng * metres * np.cos(np.radians(center_lats))) / 2
+    cells = {}
+    for bucket in sorted(RADIUS_BUCKETS_KM, reverse=True):
+        # Same expression as _superset_radius_m, for every candidate cell at once
+        radii = (bucket * 1000 + half_diagonals) * 1.01
+        for i in np.flatnonzero(distances <= radii).tolist():
+            cell = cells.get(i)
+            if cell is None:
+                cell = cells[i] = _geohash_cell(int(row_grid.flat[i]), int(col_grid.flat[i]) % lng_cells, precision)
+            for kind in KINDS:
+                yield KEY.format(kind=kind, cell=cell, bucket=bucket)
+
+
+@lru_cache(maxsize=4096)
+def _covering_keys(latitude: float, longitude: float, precision: int) -> Tuple[str, ...]:
+    # Docks rarely move, so their key sets are worth keeping
+    return tuple(covering_keys(latitude, longitude, precision))
+
+
+class _Stats:
+    """Hit ratio and the average cost of a fill, for the saved-time estimate"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.fill_seconds = 0.0
+
+    def hit(self) -> None:
+        with self._lock:
+            self.hits += 1
+            saved = self.fill_seconds / self.misses if self.misses else 0.0
+        metrics.inc("nearby_cache.hit")
+        metrics.inc("nearby_cache.saved_db_ms", saved * 1000)
+
+    def miss(self, seconds: float) -> None:
+        with self._lock:
+            self.misses += 1
+            self.fill_seconds += seconds
+        metrics.inc("nearby_cache.miss")
+        metrics.observe("nearby_cache.fill", seconds)
+
+    def ratio(self) -> float:
+        total = self.hits + self.misses
+        return round(self.hits / total, 4) if total else 0.0
+
+
+_stats = _Stats()
+metrics.register_gauge("nearby_cache.hit_ratio", _stats.ratio)
+
+
+def nearest(
+    items: List[Item],
+    latitude: float,
+    longitude: float,
+    radius_m: float,
+    limit: int,
+) -> List[Tuple[object, float]]:
+    """(payload, distance m) for items within radius_m, nearest first"""
+    if not items:
+        return []
+    lats = np.fromiter((item[0] for item in items), dtype=float, count=len(items))
+    lngs = np.fromiter((item[1] for item in items), dtype=float, count=len(items))
+    distances = haversine_m(latitude, longitude, lats, lngs)
+    order = [i for i in np.argsort(distances, kind="stable") if distances[i] <= radius_m][:limit]
+    return [(items[i][2], float(distances[i])) for i in order]
+
+
+async def cached_nearby(
+    kind: str,
+    latitude: float,
+    longitude: float,
+    radius_km: float,
+    limit: int,
+    fetch: Fetch,
+) -> Optional[List[Tuple[object, float]]]:
+    """
+    (payload, distance m) within the radius, nearest first, from the shared cache.
+
+    Entries hold every result within reach of the whole geohash cell (up to
+    nearby_cache_superset_cap, nearest its center first). None means the
+    request can't be answered from the cache; run the direct query instead.
+    """
+    if settings.nearby_cache_ttl <= 0:
+        return None
+    bucket = radius_bucket(radius_km)
+    if bucket is None:
+        metrics.inc("nearby_cache.uncacheable")
+        return None
+    precision = settings.nearby_cache_precision
+    center_lat, center_lng = _cell_center(latitude, longitude, precision)
+    key = KEY.format(kind=kind, cell=geohash(latitude, longitude, precision), bucket=bucket)
+
+    entry = None
+    try:
+        raw = await get_async_redis().get(key)
+        entry = orjson.loads(raw) if raw is not None else None
+    except redis.RedisError:
+        logger.warning("Nearby cache unavailable", exc_info=True)
+
+    if entry is None:
+        cap = settings.nearby_cache_superset_cap
+        radius_m = _superset_radius_m(bucket, center_lat, precision)
+        start = time.perf_counter()
+        items = await fetch(center_lat, center_lng, radius_m, cap)
+        _stats.miss(time.perf_counter() - start)
+        # A full superset only guarantees results nearer the center than its last item
+        reach = float(haversine_m(center_lat, center_lng, items[-1][0], items[-1][1])) if len(items) >= cap else radius_m
+        entry = {"reach": reach, "items": items}
+        try:
+            await get_async_redis().set(key, orjson.dumps(entry), ex=settings.nearby_cache_ttl)
+        except redis.RedisError:
+            logger.warning("Could not write nearby cache", exc_info=True)
+        hit = False
+    else:
+        hit = True
+
+    offset = float(haversine_m(center_lat, center_lng, latitude, longitude))
+    if radius_km * 1000 + offset >= entry["reach"]:
+        metrics.inc("nearby_cache.truncated")
+        return None
+    if hit:
+        _stats.hit()
+    return nearest(entry["items"], latitude, longitude, radius_km * 1000, limit)
+
+
+async def invalidate_points(points: List[Tuple[float, float]]) -> None:
+    """Drop cached results covering these (lat, lng) dock positions"""
+    if settings.nearby_cache_ttl <= 0 or not points:
+        return
+    keys = sorted({
+        key for latitude, longitude in points
+        for key in _covering_keys(latitude, longitude, settings.nearby_cache_precision)
+    })
+    metrics.inc("nearby_cache.invalidated", len(keys))
+    try:
+        client = get_async_redis()
+        for start in range(0, len(keys), 500):
+            await client.unlink(*keys[start:start + 500])
+    except redis.RedisError:
+        logger.warning("Could not invalidate %d nearby cache keys", len(keys), exc_info=True)
+
+
+async def invalidate_docks(*dock_ids) -> None:
+    """invalidate_points for docks whose bikes changed, located via the dock index"""
+    points = []
+    for dock_id in dock_ids:
+        entry = dock_index.get(dock_id) if dock_id is not None else None
+        if entry is not None:
+            points.append((entry.latitude, entry.longitude))
+    await invalidate_points(points)
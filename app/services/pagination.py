@@ -0,0 +1,91 @@
+import base64
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional, Sequence, Tuple
+from fastapi import HTTPException, status
+from sqlalchemy import tuple_
+from app.config import settings
+from app.schemas.common import PaginatedResponse
+
+
+def encode_cursor(sort_value: Any, id_value: Any) -> str:
+    """Opaque cursor for the last row of a page"""
+    if isinstance(sort_value, datetime):
+        payload = {"t": "dt", "s": sort_value.isoformat(), "id": str(id_value)}
+    else:
+        payload = {"t": "raw", "s": sort_value, "id": str(id_value)}
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, str]:
+    """Inverse of encode_cursor; 400 on anything malformed"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        sort_value = payload["s"]
+        if payload["t"] == "dt":
+            sort_value = datetime.fromisoformat(sort_value)
+        return sort_value, payload["id"]
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+def apply_keyset(query, sort_column, id_column, cursor: Optional[str], limit: int):
+    """
+    Order newest-first on (sort_column, id_column) and seek past `cursor`.
+
+    Fetches one extra row so `paginate` can tell whether another page exists.
+    Back it with a composite index on the same two columns.
+    """
+    if cursor:
+        sort_value, id_value = decode_cursor(cursor)
+        try:
+            id_value = id_column.type.python_type(id_value)
+        except (ValueError, NotImplementedError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+        query = query.where(tuple_(sort_column, id_column) < tuple_(sort_value, id_value))
+    return query.order_by(sort_column.desc(), id_column.desc()).limit(limit + 1)
+
+
+def paginate(rows: Sequence[Any], limit: int, sort_attr: str, id_attr: str = "id") -> PaginatedResponse:
+    """Trim the look-ahead row from an `apply_keyset` result and build the next cursor"""
+    items = list(rows[:limit])
+    next_cursor = None
+    if len(rows) > limit and items:
+        last = items[-1]
+        next_cursor = encode_cursor(getattr(last, sort_attr), getattr(last, id_attr))
+    return PaginatedResponse(items=items, size=limit, next_cursor=next_cursor)
+
+
+def parse_since(since: Optional[str]) -> Optional[datetime]:
+    """Parse a sync watermark echoed back by a client; 400 if malformed"""
+    if not since:
+        return None
+    try:
+        parsed = datetime.fromisoformat(since)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid since watermark"
+        )
+    # Timestamps are stored as naive UTC
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def sync_watermark() -> str:
+    """
+    Watermark for the next delta sync, taken before querying.
+
+    It trails the clock by sync_watermark_lag so rows written by transactions
+    still in flight are sent again next time rather than skipped; clients
+    apply changes idempotently by id.
+    """
+    return (datetime.utcnow() - timedelta(seconds=settings.sync_watermark_lag)).isoformat()
@@ -0,0 +1,112 @@
+import math
+from typing import List, Optional, Tuple
+import numpy as np
+from app.services.geo import EARTH_RADIUS_M, PathPoint
+
+# Stored layout: version byte, flags byte, varint point count, then per point
+# zigzag varint deltas of lat and lng (1e-5 degrees, ~1.1 m) and, when the
+# flag is set, of the timestamp in milliseconds
+FORMAT_VERSION = 1
+HAS_TIME = 0x01
+COORD_SCALE = 100_000
+
+def simplify(points: List[PathPoint], tolerance_m: float) -> List[PathPoint]:
+    """Douglas-Peucker on a local metric projection; keeps the original samples it retains"""
+    if tolerance_m <= 0 or len(points) < 3:
+        return list(points)
+    coords = np.array([(lat, lng) for lat, lng, _ in points], dtype=float)
+    scale = math.radians(1) * EARTH_RADIUS_M
+    y = coords[:, 0] * scale
+    x = coords[:, 1] * scale * math.cos(math.radians(coords[:, 0].mean()))
+
+    keep = np.zeros(len(points), dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        dx, dy = x[end] - x[start], y[end] - y[start]
+        px, py = x[start + 1:end] - x[start], y[start + 1:end] - y[start]
+        length = math.hypot(dx, dy)
+        if length == 0:
+            distances = np.hypot(px, py)
+        else:
+            distances = np.abs(px * dy - py * dx) / length
+        farthest = int(np.argmax(distances))
+        if distances[farthest] > tolerance_m:
+            split = start + 1 + farthest
+            keep[split] = True
+            stack.append((start, split))
+            stack.append((split, end))
+    return [point for point, kept in zip(points, keep) if kept]
+
+
+def _write_varint(out: bytearray, value: int) -> None:
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _write_signed(out: bytearray, value: int) -> None:
+    _write_varint(out, (value << 1) ^ (value >> 63))
+
+
+def _read_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    result = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+
+
+def _read_signed(data: bytes, pos: int) -> Tuple[int, int]:
+    value, pos = _read_varint(data, pos)
+    return (value >> 1) ^ -(value & 1), pos
+
+
+def encode_path(points: List[PathPoint]) -> Optional[bytes]:
+    """Pack points into the compact binary form (None for an empty path)"""
+    if not points:
+        return None
+    has_time = all(t is not None for _, _, t in points)
+    out = bytearray([FORMAT_VERSION, HAS_TIME if has_time else 0])
+    _write_varint(out, len(points))
+    last_lat = last_lng = last_t = 0
+    for lat, lng, t in points:
+        lat_i, lng_i = round(lat * COORD_SCALE), round(lng * COORD_SCALE)
+        _write_signed(out, lat_i - last_lat)
+        _write_signed(out, lng_i - last_lng)
+        last_lat, last_lng = lat_i, lng_i
+        if has_time:
+            _write_signed(out, t - last_t)
+            last_t = t
+    return bytes(out)
+
+
+def decode_path(data: Optional[bytes]) -> List[dict]:
+    """Samples as [{"lat", "lng", "t"?}] with t in epoch milliseconds"""
+    if not data:
+        return []
+    if data[0] != FORMAT_VERSION:
+        raise ValueError(f"Unknown path encoding version {data[0]}")
+    has_time = bool(data[1] & HAS_TIME)
+    count, pos = _read_varint(data, 2)
+    samples = []
+    lat = lng = t = 0
+    for _ in range(count):
+        delta, pos = _read_signed(data, pos)
+        lat += delta
+        delta, pos = _read_signed(data, pos)
+        lng += delta
+        sample = {"lat": lat / COORD_SCALE, "lng": lng / COORD_SCALE}
+        if has_time:
+            delta, pos = _read_signed(data, pos)
+            t += delta
+            sample["t"] = t
+        samples.append(sample)
+    return samples
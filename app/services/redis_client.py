@@ -0,0 +1,42 @@
+from typing import Optional
+import redis
+import redis.asyncio as aioredis
+from app.config import settings
+
+_client: Optional[redis.Redis] = None
+_async_client: Optional[aioredis.Redis] = None
+
+
+def get_redis() -> redis.Redis:
+    """Shared sync Redis client (Celery tasks, background threads)"""
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(
+            settings.redis_url,
+            socket_timeout=settings.redis_socket_timeout,
+            socket_connect_timeout=settings.redis_socket_timeout,
+        )
+    return _client
+
+
+def get_async_redis() -> aioredis.Redis:
+    """Shared asyncio Redis client for request handlers"""
+    global _async_client
+    if _async_client is None:
+        _async_client = aioredis.Redis.from_url(
+            settings.redis_url,
+            socket_timeout=settings.redis_socket_timeout,
+            socket_connect_timeout=settings.redis_socket_timeout,
+        )
+    return _async_client
+
+
+async def close_redis() -> None:
+    """Close Redis connections (called on app shutdown)"""
+    global _client, _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+    if _client is not None:
+        _client.close()
+        _client = None
@@ -0,0 +1,126 @@
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Sequence, Tuple
+from uuid import UUID
+import numpy as np
+from sqlalchemy import Integer, column, update, values
+from sqlalchemy.dialects import postgresql
+from sqlmodel import select
+from app.auth.cache import invalidate_user_sync
+from app.config import settings
+from app.models.rental import Rental, RentalStatus
+from app.models.user import User
+from app.services.geo import haversine_m, path_points
+from app.services.metrics import metrics
+from app.services.path_codec import decode_path
+
+
+@dataclass(frozen=True)
+class TripMetrics:
+    """Per-rental results for one batch, aligned with the input order"""
+    distance_m: np.ndarray
+    avg_speed_kmh: np.ndarray
+    co2_saved_g: np.ndarray
+    eco_points: np.ndarray
+
+
+def _path(rental: Rental) -> List[Tuple[float, float]]:
+    return path_points(decode_path(rental.path_encoded) if rental.path_encoded else rental.path_sample)
+
+
+def trip_metrics(paths: Sequence[List[Tuple[float, float]]], durations_s: Sequence[float]) -> TripMetrics:
+    """
+    Distance, speed, CO2 saved and points for a batch of trips.
+
+    All points of the batch go through one haversine call over consecutive
+    pairs; pairs straddling two trips are masked out before summing per trip.
+    """
+    count = len(paths)
+    lengths = np.array([len(path) for path in paths], dtype=np.intp)
+    distances = np.zeros(count)
+    if lengths.sum() > 1:
+        coords = np.array([point for path in paths for point in path], dtype=float)
+        owner = np.repeat(np.arange(count), lengths)
+        steps = haversine_m(coords[:-1, 0], coords[:-1, 1], coords[1:, 0], coords[1:, 1])
+        same_trip = owner[:-1] == owner[1:]
+        distances = np.bincount(owner[:-1][same_trip], weights=steps[same_trip], minlength=count)
+
+    durations = np.asarray(durations_s, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        speeds = np.where(durations > 0, distances / durations * 3.6, 0.0)
+    kilometres = distances / 1000
+    # Implausible speeds mean a bad trace (or not a bike): keep the numbers, award nothing
+    plausible = speeds <= settings.eco_max_speed_kmh
+    points = np.where(plausible, np.floor(kilometres * settings.eco_points_per_km), 0).astype(np.int64)
+    return TripMetrics(
+        distance_m=distances,
+        avg_speed_kmh=speeds,
+        co2_saved_g=kilometres * settings.co2_saved_g_per_km,
+        eco_points=points,
+    )
+
+
+def award_points(awards: Dict[str, int]):
+    """One UPDATE ... FROM (VALUES ...) adding points for every user in a batch"""
+    # Typed so the VALUES column is cast to uuid; untyped it is text and can't be joined to users.id
+    batch = values(
+        column("user_id", postgresql.UUID(as_uuid=True)), column("points", Integer), name="awards"
+    ).data([(UUID(str(user_id)), points) for user_id, points in awards.items()])
+    return (
+        update(User)
+        .where(User.id == batch.c.user_id)
+        .values(eco_points=User.eco_points + batch.c.points)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def process_batch(session, batch_size: int) -> int:
+    """
+    Compute metrics for up to `batch_size` closed, unprocessed rentals and
+    award their eco points, all in one transaction. Returns rentals processed.
+    """
+    rentals = session.exec(
+        select(Rental)
+        .where(Rental.status == RentalStatus.CLOSED, Rental.metrics_processed_at.is_(None))
+        .order_by(Rental.end_at)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    ).all()
+    if not rentals:
+        return 0
+
+    with metrics.timer("ride_metrics.batch"):
+        result = trip_metrics(
+            [_path(rental) for rental in rentals],
+            [(rental.end_at - rental.start_at).total_seconds() if rental.end_at else 0 for rental in rentals],
+        )
+        processed_at = datetime.utcnow()
+        session.exec(
+            update(Rental),
+            params=[
+                {
+                    "id": rental.id,
+                    "distance_m": float(result.distance_m[i]),
+                    "avg_speed_kmh": float(result.avg_speed_kmh[i]),
+                    "co2_saved_g": float(result.co2_saved_g[i]),
+                    "eco_points_awarded": int(result.eco_points[i]),
+                    "metrics_processed_at": processed_at,
+                }
+                for i, rental in enumerate(rentals)
+            ],
+        )
+
+        awards: Counter = Counter()
+        for i, rental in enumerate(rentals):
+            if result.eco_points[i] > 0:
+                awards[str(rental.user_id)] += int(result.eco_points[i])
+        if awards:
+            session.exec(award_points(awards))
+        session.commit()
+
+    for user_id in awards:
+        invalidate_user_sync(user_id)
+    metrics.inc("ride_metrics.processed", len(rentals))
+    metrics.inc("ride_metrics.points_awarded", sum(awards.values()))
+    return len(rentals)
@@ -0,0 +1,213 @@
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, List, Sequence, Set
+from uuid import UUID
+from sqlalchemy import update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.models.bike import Bike, BikeStatus
+from app.models.dock import Dock
+from app.models.rental import Rental, RentalStatus
+from app.config import settings
+from app.services.dock_counts import adjust_counts_async
+from app.services.dock_index import dock_index
+from app.services.geo import path_points, path_samples
+from app.services.metrics import metrics
+from app.services.path_codec import encode_path, simplify
+from app.services.zone_engine import zone_engine
+
+# Per-item outcomes reported by sync_rides
+STARTED = "started"
+ENDED = "ended"
+DUPLICATE = "duplicate"
+NOT_FOUND = "not_found"
+BIKE_NOT_FOUND = "bike_not_found"
+BIKE_UNAVAILABLE = "bike_unavailable"
+DOCK_NOT_FOUND = "dock_not_found"
+
+
+def reserve_bikes(*bike_ids):
+    """Conditional UPDATE marking available bikes rented; RETURNING only the ones it took"""
+    now = datetime.utcnow()
+    return (
+        update(Bike)
+        .where(Bike.id.in_(bike_ids), Bike.status == BikeStatus.available)
+        .values(status=BikeStatus.rented, rented_at=now, updated_at=now)
+        .returning(Bike.id, Bike.dock_id)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def close_rental(rental_id, **values):
+    """Conditional UPDATE closing an open rental; RETURNING no row if it was already closed"""
+    return (
+        update(Rental)
+        .where(Rental.id == rental_id, Rental.status == RentalStatus.OPEN)
+        .values(status=RentalStatus.CLOSED, updated_at=datetime.utcnow(), **values)
+        .returning(Rental.id)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def ride_amount(minute_rate: Decimal, minutes: int) -> Decimal:
+    return round(minute_rate * Decimal(minutes), 2)
+
+
+def _zone_warnings(end) -> List[str]:
+    """Parking and route warnings for a ride that already ended offline (never rejected)"""
+    path = path_points(end.path_sample)
+    entry = dock_index.get(end.end_dock_id) if end.end_dock_id else None
+    end_position = (entry.latitude, entry.longitude) if entry else (path[-1] if path else None)
+    warnings = []
+    if zone_engine.check([end_position] if end_position else []).violates:
+        warnings.append("Bike parked outside permitted zones")
+    if zone_engine.check(path).red_zone_ids:
+        warnings.append("Ride passed through a restricted zone")
+    return warnings
+
+
+async def sync_rides(db: AsyncSession, user_id: UUID, starts: Sequence, ends: Sequence) -> Dict:
+    """
+    Apply a batch of offline ride starts and ends in one transaction.
+
+    Items are keyed by client_rental_id, so a retried batch reports
+    "duplicate" for everything already applied and changes nothing. Starts
+    run before ends, letting a batch carry a whole offline ride. A bike can
+    be started once per batch; a later start of the same bike is reported
+    as bike_unavailable and goes through on the next sync.
+
+    Returns {"results": [item, ...], "docks": touched dock ids, "events": [...],
+    "opened": rentals left open, "closed": ended rental ids} for the caller to
+    commit, invalidate caches, track events and update the active registry.
+    """
+    client_ids = {item.client_rental_id for item in (*starts, *ends)}
+    existing: Dict[str, Rental] = {}
+    if client_ids:
+        rows = (await db.exec(
+            select(Rental)
+            .where(Rental.user_id == user_id, Rental.client_rental_id.in_(client_ids))
+            .with_for_update()
+        )).all()
+        existing = {rental.client_rental_id: rental for rental in rows}
+
+    results, events, changes = [], [], []
+    seen: Set[str] = set()
+    pending, opened = {}, {}
+    for start in starts:
+        result = {"client_rental_id": start.client_rental_id, "action": "start", "status": DUPLICATE}
+        results.append(result)
+        if start.client_rental_id in existing or start.client_rental_id in seen:
+            continue
+        seen.add(start.client_rental_id)
+        if any(other.bike_id == start.bike_id for other, _ in pending.values()):
+            result["status"] = BIKE_UNAVAILABLE
+            continue
+        pending[start.client_rental_id] = (start, result)
+
+    # Reserve every bike in one statement, then find out why the rest failed
+    bikes = {}
+    if pending:
+        reserved = (await db.exec(reserve_bikes(*(start.bike_id for start, _ in pending.values())))).all()
+        docks_by_bike = {row.id: row.dock_id for row in reserved}
+        missing = [start.bike_id for start, _ in pending.values() if start.bike_id not in docks_by_bike]
+        known = set((await db.exec(select(Bike.id).where(Bike.id.in_(missing)))).all()) if missing else set()
+        for start, result in pending.values():
+            if start.bike_id not in docks_by_bike:
+                result["status"] = BIKE_UNAVAILABLE if start.bike_id in known else BIKE_NOT_FOUND
+                continue
+            dock_id = docks_by_bike[start.bike_id]
+            rental = Rental(
+                client_rental_id=start.client_rental_id,
+                bike_id=start.bike_id,
+                user_id=user_id,
+                start_at=start.start_at,
+                minute_rate_snapshot=start.minute_rate_snapshot,
+            )
+            existing[start.client_rental_id] = opened[start.client_rental_id] = rental
+            bikes[start.bike_id] = (dock_id, BikeStatus.rented.value)
+            changes.append(((dock_id, BikeStatus.available.value), (dock_id, BikeStatus.rented.value)))
+            result["status"] = STARTED
+            events.append({"bike_id": start.bike_id, "event_type": "ride_start", "properties": {"synced": True}})
+
+    # Bikes of rides opened earlier that this batch ends
+    ending = [existing[end.client_rental_id].bike_id for end in ends if end.client_rental_id in existing]
+    unknown = [bike_id for bike_id in ending if bike_id not in bikes]
+    if unknown:
+        for bike_id, dock_id, bike_status in (await db.exec(
+            select(Bike.id, Bike.dock_id, Bike.status).where(Bike.id.in_(unknown)).with_for_update()
+        )).all():
+            bikes[bike_id] = (dock_id, BikeStatus(bike_status).value)
+
+    # Ends naming an unknown dock are rejected before anything changes
+    end_docks = {end.end_dock_id for end in ends if end.end_dock_id}
+    known_docks = set((await db.exec(select(Dock.id).where(Dock.id.in_(end_docks)))).all()) if end_docks else set()
+
+    check_zones = await zone_engine.ensure_fresh(db) if ends else False
+    closed, released, ended = [], {}, {}
+    for end in ends:
+        result = {"client_rental_id": end.client_rental_id, "action": "end", "status": NOT_FOUND}
+        results.append(result)
+        rental = existing.get(end.client_rental_id)
+        if rental is None:
+            continue
+        if end.client_rental_id in ended or rental.status != RentalStatus.OPEN:
+            result.update(status=DUPLICATE, amount=ended.get(end.client_rental_id, rental.amount))
+            continue
+        if end.end_dock_id and end.end_dock_id not in known_docks:
+            result["status"] = DOCK_NOT_FOUND
+            continue
+        amount = ended[end.client_rental_id] = ride_amount(rental.minute_rate_snapshot, end.minutes_client)
+        values = {
+            "end_at": end.end_at,
+            "minutes_client": end.minutes_client,
+            "amount": amount,
+            "status": RentalStatus.CLOSED,
+            "path_encoded": encode_path(
+                simplify(path_samples(end.path_sample), settings.path_simplify_tolerance_m)
+            ),
+        }
+        if end.client_rental_id in opened:
+            for column, value in values.items():
+                setattr(rental, column, value)
+        else:
+            closed.append({"id": rental.id, **values})
+        result.update(status=ENDED, amount=amount, zone_warnings=_zone_warnings(end) if check_zones else [])
+
+        before = bikes.get(rental.bike_id)
+        if before is not None:
+            end_dock_id = end.end_dock_id or before[0]
+            changes.append((before, (end_dock_id, BikeStatus.available.value)))
+            bikes[rental.bike_id] = released[rental.bike_id] = (end_dock_id, BikeStatus.available.value)
+        events.append({
+            "bike_id": rental.bike_id,
+            "event_type": "ride_end",
+            "properties": {"minutes": end.minutes_client, "amount": float(amount), "synced": True},
+        })
+
+    for result in results:
+        rental = existing.get(result["client_rental_id"])
+        if rental is not None and result["status"] in (STARTED, ENDED, DUPLICATE):
+            result["rental_id"] = rental.id
+        elif result["status"] == DUPLICATE:
+            result["status"] = NOT_FOUND
+
+    db.add_all(opened.values())
+    if closed:
+        await db.exec(update(Rental), params=closed)
+    if released:
+        now = datetime.utcnow()
+        await db.exec(update(Bike), params=[
+            {"id": bike_id, "status": BikeStatus.available, "dock_id": dock_id, "returned_at": now, "updated_at": now}
+            for bike_id, (dock_id, _) in released.items()
+        ])
+    await adjust_counts_async(db, changes)
+
+    metrics.inc("rides.sync_items", len(results))
+    docks = {dock_id for change in changes for dock_id, _ in change if dock_id is not None}
+    return {
+        "results": results,
+        "docks": docks,
+        "events": events,
+        "opened": [rental for client_id, rental in opened.items() if client_id not in ended],
+        "closed": [existing[client_id].id for client_id in ended],
+    }
@@ -0,0 +1,46 @@
+import json
+import logging
+from typing import Any, Callable, Dict
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from app.database import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def wants_ndjson(request: Request) -> bool:
+    """True when the client asked for newline-delimited JSON"""
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+async def _ndjson_lines(statement, serialize, yield_per: int, session_factory):
+    # The request's own session is closed before the body is sent, so the
+    # stream owns a session for as long as the cursor is open
+    async with session_factory() as session:
+        try:
+            result = await session.stream_scalars(statement.execution_options(yield_per=yield_per))
+            async for partition in result.partitions():
+                yield "".join(json.dumps(serialize(row), default=str) + "\n" for row in partition)
+        except Exception:
+            # Headers are already sent; the truncated body is the only signal left
+            logger.exception("NDJSON stream aborted")
+
+
+def ndjson_response(
+    statement,
+    serialize: Callable[[Any], Dict[str, Any]],
+    yield_per: int = 500,
+    session_factory=AsyncSessionLocal,
+) -> StreamingResponse:
+    """
+    Stream `statement` as one JSON object per line.
+
+    Rows come through a server-side cursor `yield_per` at a time, so memory
+    stays flat and the first line goes out before the query has finished.
+    """
+    return StreamingResponse(
+        _ndjson_lines(statement, serialize, yield_per, session_factory),
+        media_type=NDJSON_MEDIA_TYPE,
+    )
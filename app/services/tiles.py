@@ -0,0 +1,90 @@
+import logging
+import redis
+from sqlalchemy import text
+from app.config import settings
+from app.services.metrics import metrics
+from app.services.redis_client import get_async_redis
+
+logger = logging.getLogger(__name__)
+
+MVT_MEDIA_TYPE = "application/vnd.mapbox-vector-tile"
+
+# Bump when the tile layers or attributes change so stale tiles are never served
+TILE_SCHEMA_VERSION = 1
+# Data version, bumped after every dock or zone write; part of every tile key,
+# so a tile rendered before a write is cached under a key nobody reads again
+TILE_VERSION_KEY = "tiles:version"
+TILE_KEY = "tile:v{schema}:{version}:{z}:{x}:{y}"
+
+EXTENT = 4096
+BUFFER = 256
+MAX_ZOOM = 22
+
+# Only slow-changing attributes go into tiles (no availability counts), so
+# tiles only need invalidating when a dock or zone itself changes
+TILE_SQL = text(f"""
+WITH bounds AS (
+    SELECT ST_TileEnvelope(:z, :x, :y) AS merc,
+           ST_Transform(ST_TileEnvelope(:z, :x, :y, margin => {BUFFER / EXTENT}), 4326) AS wgs
+),
+dock_features AS (
+    SELECT ST_AsMVTGeom(ST_Transform(d.geom, 3857), bounds.merc, {EXTENT}, {BUFFER}, true) AS geom,
+           d.id::text AS id, d.name, d.capacity
+    FROM docks d, bounds
+    WHERE d.geom && bounds.wgs
+),
+zone_features AS (
+    SELECT ST_AsMVTGeom(ST_Transform(z.polygon, 3857), bounds.merc, {EXTENT}, {BUFFER}, true) AS geom,
+           z.id::text AS id, z.kind, z.label, z.version
+    FROM zones z, bounds
+    WHERE z.polygon && bounds.wgs
+)
+SELECT COALESCE((SELECT ST_AsMVT(dock_features, 'docks', {EXTENT}, 'geom') FROM dock_features), ''::bytea)
+    || COALESCE((SELECT ST_AsMVT(zone_features, 'zones', {EXTENT}, 'geom') FROM zone_features), ''::bytea)
+""")
+
+
+def valid_tile(z: int, x: int, y: int) -> bool:
+    return 0 <= z <= MAX_ZOOM and 0 <= x < 2 ** z and 0 <= y < 2 ** z
+
+
+def _key(version: int, z: int, x: int, y: int) -> str:
+    return TILE_KEY.format(schema=TILE_SCHEMA_VERSION, version=version, z=z, x=x, y=y)
+
+
+async def get_tile(session, z: int, x: int, y: int) -> bytes:
+    """MVT bytes for one tile, from the cache when possible"""
+    version = None
+    if z <= settings.tile_cache_max_zoom:
+        try:
+            client = get_async_redis()
+            # Read before rendering: a write landing mid-render bumps it, and
+            # the tile goes under the retired version instead of going stale
+            version = int(await client.get(TILE_VERSION_KEY) or 0)
+            cached = await client.get(_key(version, z, x, y))
+        except redis.RedisError:
+            logger.warning("Tile cache unavailable", exc_info=True)
+            version = cached = None
+        if cached is not None:
+            metrics.inc("tiles.cache_hit")
+            return cached
+        metrics.inc("tiles.cache_miss")
+
+    with metrics.timer("tiles.render"):
+        tile = bytes(await session.scalar(TILE_SQL, {"z": z, "x": x, "y": y}) or b"")
+
+    if version is not None:
+        try:
+            await get_async_redis().set(_key(version, z, x, y), tile, ex=settings.tile_cache_ttl)
+        except redis.RedisError:
+            logger.warning("Could not write tile cache", exc_info=True)
+    return tile
+
+
+async def invalidate_tiles() -> None:
+    """Retire every cached tile after a dock or zone write has committed; old keys expire by TTL"""
+    metrics.inc("tiles.invalidated")
+    try:
+        await get_async_redis().incr(TILE_VERSION_KEY)
+    except redis.RedisError:
+        logger.warning("Could not invalidate cached tiles", exc_info=True)
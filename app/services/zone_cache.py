@@ -0,0 +1,135 @@
+import gzip
+import hashlib
+import json
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+import orjson
+from sqlalchemy import func
+from sqlmodel import select
+from app.models.zone import Zone
+from app.services.metrics import metrics
+
+
+@dataclass(frozen=True)
+class ZoneDocument:
+    """A fully serialised GET /zones/ response"""
+    etag: str
+    body: bytes
+    gzipped: Optional[bytes]
+    version: int
+
+
+def version_signature(versions: Dict[str, int]) -> str:
+    """Digest of every (zone id, version) pair; changes whenever any zone does"""
+    digest = hashlib.sha1()
+    for zone_id in sorted(versions):
+        digest.update(f"{zone_id}:{versions[zone_id]};".encode())
+    return digest.hexdigest()
+
+
+def _etag(signature: str) -> str:
+    # Weak: the plain and gzipped bodies are the same representation
+    return f'W/"{signature}"'
+
+
+def _feature(row) -> bytes:
+    return orjson.dumps({
+        "id": str(row.id),
+        "kind": row.kind.value,
+        "polygon": json.loads(row.geojson) if row.geojson else None,
+        "label": row.label,
+        "version": row.version,
+    })
+
+
+class ZoneDocumentCache:
+    """
+    GeoJSON per zone, encoded once per Zone.version.
+
+    Each request only reads (id, version) pairs; polygons are re-encoded for
+    zones whose version moved, and the full document (plain and gzipped) is
+    rebuilt only when the set of (id, version) pairs changes.
+    """
+
+    def __init__(self):
+        # zone_id -> (version, encoded feature)
+        self._features: Dict[str, Tuple[int, bytes]] = {}
+        self._document: Optional[ZoneDocument] = None
+
+    def clear(self) -> None:
+        self._features.clear()
+        self._document = None
+
+    async def get(self, session, since: Optional[int] = None) -> ZoneDocument:
+        """The zones document; with `since`, only zones with a newer version"""
+        versions = {str(zone_id): version for zone_id, version in (await session.exec(
+            select(Zone.id, Zone.version)
+        )).all()}
+        signature = version_signature(versions)
+
+        if since is None and self._document is not None and self._document.etag == _etag(signature):
+            metrics.inc("zones.document_hit")
+            return self._document
+
+        await self._refresh(session, versions)
+        features = sorted(
+            (entry for entry in self._features.values() if since is None or entry[0] > since),
+            key=lambda entry: entry[0],
+        )
+        # Only the shared full document is worth compressing up front
+        document = self._build(
+            features,
+            signature if since is None else f"{signature}-{since}",
+            versions,
+            compress=since is None,
+        )
+        if since is None:
+            self._document = document
+            metrics.inc("zones.document_build")
+        return document
+
+    async def _refresh(self, session, versions: Dict[str, int]) -> None:
+        for zone_id in set(self._features) - set(versions):
+            del self._features[zone_id]
+        stale = [zone_id for zone_id, version in versions.items()
+                 if self._features.get(zone_id, (None,))[0] != version]
+        if not stale:
+            return
+        rows = (await session.exec(
+            select(
+                Zone.id,
+                Zone.kind,
+                Zone.label,
+                Zone.version,
+                func.ST_AsGeoJSON(Zone.polygon).label("geojson"),
+            ).where(Zone.id.in_([UUID(zone_id) for zone_id in stale]))
+        )).all()
+        for row in rows:
+            self._features[str(row.id)] = (row.version, _feature(row))
+        metrics.inc("zones.features_encoded", len(rows))
+
+    @staticmethod
+    def _build(
+        features: List[Tuple[int, bytes]],
+        signature: str,
+        versions: Dict[str, int],
+        compress: bool,
+    ) -> ZoneDocument:
+        version = max(versions.values(), default=0)
+        body = b"".join([
+            b'{"success":true,"data":{"zones":[',
+            b",".join(feature for _, feature in features),
+            b'],"version":',
+            str(version).encode(),
+            b"}}",
+        ])
+        return ZoneDocument(
+            etag=_etag(signature),
+            body=body,
+            gzipped=gzip.compress(body, compresslevel=6) if compress else None,
+            version=version,
+        )
+
+
+zone_documents = ZoneDocumentCache()
@@ -0,0 +1,133 @@
+import logging
+import time
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+import shapely
+from shapely import STRtree
+from shapely.geometry.base import BaseGeometry
+from sqlalchemy import func
+from sqlmodel import select
+from app.config import settings
+from app.models.zone import Zone, ZoneKind
+from app.services.metrics import metrics
+from app.services.zone_cache import version_signature
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ZoneCheck:
+    """Outcome of checking one or more points against the zones"""
+    red_zone_ids: Tuple[str, ...]
+    # Points outside every green zone (always 0 when no green zones exist)
+    outside_green: int
+    points: int
+
+    @property
+    def violates(self) -> bool:
+        return bool(self.red_zone_ids) or self.outside_green > 0
+
+
+class _KindIndex:
+    """STRtree over prepared polygons of one zone kind"""
+
+    def __init__(self, entries: List[Tuple[str, BaseGeometry]]):
+        self.ids = [zone_id for zone_id, _ in entries]
+        self.geometries = np.array([geometry for _, geometry in entries], dtype=object)
+        shapely.prepare(self.geometries)
+        self.tree = STRtree(self.geometries)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def within(self, points: np.ndarray, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """[point index, zone index] pairs for points inside (or on) a zone"""
+        # Bounding-box candidates from the tree, then prepared point-in-polygon tests
+        pairs = self.tree.query(points)
+        if not pairs.size:
+            return pairs
+        mask = shapely.intersects_xy(self.geometries[pairs[1]], x[pairs[0]], y[pairs[0]])
+        return pairs[:, mask]
+
+
+class ZoneEngine:
+    """
+    In-process point/path checks against GREEN and RED zones.
+
+    Polygons are loaded from the zones table, prepared, and indexed in one
+    STRtree per kind, so a check is a bounding-box probe plus prepared
+    point-in-polygon tests with no spatial SQL. Reloads when the set of zone
+    versions changes.
+    """
+
+    def __init__(self):
+        self._red = _KindIndex([])
+        self._green = _KindIndex([])
+        self.signature: Optional[str] = None
+        self.loaded = False
+        self.checked_at = 0.0
+
+    def replace(self, zones: Iterable[Tuple[str, ZoneKind, BaseGeometry]], signature: Optional[str] = None) -> None:
+        red, green = [], []
+        for zone_id, kind, geometry in zones:
+            if geometry is None or geometry.is_empty:
+                continue
+            (red if kind == ZoneKind.RED else green).append((zone_id, geometry))
+        # Swap whole indexes so concurrent checks never see a half-built state
+        self._red, self._green = _KindIndex(red), _KindIndex(green)
+        self.signature = signature
+        self.loaded = True
+
+    def check(self, points: Sequence[Tuple[float, float]]) -> ZoneCheck:
+        """Check (lat, lng) points: red zones touched, and points outside every green zone"""
+        if not points:
+            return ZoneCheck(red_zone_ids=(), outside_green=0, points=0)
+        with metrics.timer("zone_engine.check"):
+            red, green = self._red, self._green
+            coords = np.asarray(points, dtype=float)
+            x, y = coords[:, 1], coords[:, 0]
+            geometries = shapely.points(x, y)
+
+            red_ids: Tuple[str, ...] = ()
+            if len(red):
+                hits = red.within(geometries, x, y)
+                red_ids = tuple(sorted({red.ids[i] for i in hits[1]}))
+
+            outside_green = 0
+            if len(green):
+                inside = np.zeros(len(points), dtype=bool)
+                inside[green.within(geometries, x, y)[0]] = True
+                outside_green = int((~inside).sum())
+
+            return ZoneCheck(red_zone_ids=red_ids, outside_green=outside_green, points=len(points))
+
+    async def load(self, session, signature: Optional[str] = None) -> None:
+        rows = (await session.exec(
+            select(Zone.id, Zone.kind, func.ST_AsBinary(Zone.polygon)).where(Zone.polygon.isnot(None))
+        )).all()
+        self.replace(
+            ((str(zone_id), kind, shapely.from_wkb(bytes(wkb))) for zone_id, kind, wkb in rows),
+            signature,
+        )
+        metrics.inc("zone_engine.reload")
+
+    async def ensure_fresh(self, session) -> bool:
+        """Reload if any zone version changed; checked at most every zone_engine_check_interval"""
+        now = time.monotonic()
+        if self.loaded and now - self.checked_at < settings.zone_engine_check_interval:
+            return True
+        self.checked_at = now
+        try:
+            versions = {str(zone_id): version for zone_id, version in (await session.exec(
+                select(Zone.id, Zone.version)
+            )).all()}
+            signature = version_signature(versions)
+            if signature != self.signature:
+                await self.load(session, signature)
+        except Exception:
+            logger.warning("Could not refresh zone engine, skipping zone checks", exc_info=True)
+        return self.loaded
+
+
+zone_engine = ZoneEngine()
@@ -30,3 +30,27 @@ celery_app.conf.task_routes = {
     "app.worker.tasks.send_email": {"queue": "emails"},
     "app.worker.tasks.update_analytics": {"queue": "analytics"},
 }
+
+# Periodic tasks (run `celery -A app.worker.celery beat`)
+celery_app.conf.beat_schedule = {
+    "refresh-nearby-fallback": {
+        "task": "app.worker.tasks.refresh_nearby_fallback",
+        "schedule": settings.nearby_fallback_refresh_interval,
+    },
+    "fold-dock-counts": {
+        "task": "app.worker.tasks.fold_dock_counts",
+        "schedule": settings.dock_count_fold_interval,
+    },
+    "reconcile-dock-counts": {
+        "task": "app.worker.tasks.reconcile_dock_counts",
+        "schedule": settings.dock_count_reconcile_interval,
+    },
+    "process-ride-metrics": {
+        "task": "app.worker.tasks.process_ride_metrics",
+        "schedule": settings.ride_metrics_interval,
+    },
+    "reconcile-active-rentals": {
+        "task": "app.worker.tasks.reconcile_active_rentals",
+        "schedule": settings.active_rentals_reconcile_interval,
+    },
+}
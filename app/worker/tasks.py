@@ -1,6 +1,13 @@
 from typing import List, Dict, Any
 from app.worker.celery import celery_app
 from app.services.events import track_event
+from app.database import engine
+from app.services.active_rentals import rebuild_sync
+from app.services.dock_counts import fold_stripes, reconcile_counts
+from app.services.fallback import refresh_fallback
+from app.services.ride_metrics import process_batch
+from app.config import settings
+from sqlmodel import Session
 import httpx
 import json
 
@@ -107,3 +114,73 @@ def cleanup_old_rentals():
     except Exception as exc:
         print(f"Cleanup failed: {exc}")
         return {"success": False, "error": str(exc)}
+
+
+@celery_app.task
+def refresh_nearby_fallback():
+    """Precompute the docks and bikes shown when a nearby search finds nothing"""
+    try:
+        with Session(engine) as session:
+            refresh_fallback(session)
+        return {"success": True}
+        
+    except Exception as exc:
+        print(f"Nearby fallback refresh failed: {exc}")
+        return {"success": False, "error": str(exc)}
+
+
+@celery_app.task
+def fold_dock_counts():
+    """Move striped available_count deltas into the dock rows"""
+    try:
+        with Session(engine) as session:
+            folded = fold_stripes(session)
+        return {"success": True, "docks": folded}
+        
+    except Exception as exc:
+        print(f"Dock count fold failed: {exc}")
+        return {"success": False, "error": str(exc)}
+
+
+@celery_app.task
+def reconcile_dock_counts():
+    """Recompute every dock's available_count from the bikes table"""
+    try:
+        with Session(engine) as session:
+            corrected = reconcile_counts(session)
+        return {"success": True, "corrected": corrected}
+        
+    except Exception as exc:
+        print(f"Dock count reconciliation failed: {exc}")
+        return {"success": False, "error": str(exc)}
+
+
+@celery_app.task
+def process_ride_metrics(max_batches: int = 20):
+    """Compute distance, speed and CO2 for closed rides and award eco points"""
+    try:
+        processed = 0
+        with Session(engine) as session:
+            for _ in range(max_batches):
+                count = process_batch(session, settings.ride_metrics_batch_size)
+                processed += count
+                if count < settings.ride_metrics_batch_size:
+                    break
+        return {"success": True, "processed": processed}
+        
+    except Exception as exc:
+        print(f"Ride metrics processing failed: {exc}")
+        return {"success": False, "error": str(exc)}
+
+
+@celery_app.task
+def reconcile_active_rentals():
+    """Rebuild the active rental registry from the open rentals in the database"""
+    try:
+        with Session(engine) as session:
+            open_count = rebuild_sync(session)
+        return {"success": open_count is not None, "open": open_count}
+        
+    except Exception as exc:
+        print(f"Active rental reconciliation failed: {exc}")
+        return {"success": False, "error": str(exc)}
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Concurrency benchmark for the Cycle API.
+
+Fires a fixed number of requests at one or more endpoints from N concurrent
+clients and reports requests/second plus p50/p99 latency. Run it once against
+a build on the old sync session and once against the current build to compare:
+
+    python benchmarks/concurrency.py --base-url http://localhost:8000 \
+        --token "$ACCESS_TOKEN" --concurrency 50 200
+
+Results depend on the database and hardware, so numbers are not committed here.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import List, Optional
+
+import httpx
+
+DEFAULT_PATHS = [
+    "/health",
+    "/bikes/find/nearby?latitude=-1.2921&longitude=36.8219&radius=1",
+    "/docks/find/nearby?latitude=-1.2921&longitude=36.8219&radius=1",
+    "/auth/me",
+]
+
+
+async def _worker(
+    client: httpx.AsyncClient,
+    path: str,
+    remaining: List[int],
+    latencies: List[float],
+    errors: List[int],
+):
+    while remaining[0] > 0:
+        remaining[0] -= 1
+        start = time.perf_counter()
+        try:
+            response = await client.get(path)
+            if response.status_code >= 500:
+                errors[0] += 1
+        except httpx.HTTPError:
+            errors[0] += 1
+        latencies.append(time.perf_counter() - start)
+
+
+async def run_one(
+    base_url: str,
+    path: str,
+    concurrency: int,
+    total: int,
+    token: Optional[str],
+) -> dict:
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    latencies: List[float] = []
+    errors = [0]
+    remaining = [total]
+
+    async with httpx.AsyncClient(
+        base_url=base_url, headers=headers, limits=limits, timeout=30.0
+    ) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*[
+            _worker(client, path, remaining, latencies, errors)
+            for _ in range(concurrency)
+        ])
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    p99_index = max(0, int(len(latencies) * 0.99) - 1)
+    return {
+        "path": path,
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors[0],
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else 0.0,
+        "p99_ms": latencies[p99_index] * 1000 if latencies else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--token", default=None, help="Bearer token for authenticated paths")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[50, 200])
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per run")
+    parser.add_argument("--path", action="append", dest="paths", help="Path to hit (repeatable)")
+    args = parser.parse_args()
+
+    paths = args.paths or DEFAULT_PATHS
+    print(f"{'path':<70} {'conc':>5} {'req':>6} {'err':>5} {'rps':>9} {'p50 ms':>9} {'p99 ms':>9}")
+    for path in paths:
+        for concurrency in args.concurrency:
+            result = asyncio.run(run_one(args.base_url, path, concurrency, args.requests, args.token))
+            print(
+                f"{result['path'][:70]:<70} {result['concurrency']:>5} {result['requests']:>6} "
+                f"{result['errors']:>5} {result['rps']:>9.1f} {result['p50_ms']:>9.1f} {result['p99_ms']:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
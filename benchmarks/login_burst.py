@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Latency of unrelated endpoints while logins are being hammered.
+
+First probes the given paths on an idle server, then repeats the probe while
+`--login-concurrency` clients call /auth/login in a loop, and prints p50/p99
+for both phases. With bcrypt on the event loop the loaded p99 of /health
+tracks the hash cost; with the bounded executor it should stay close to idle.
+
+    python benchmarks/login_burst.py --base-url http://localhost:8000 \
+        --email bench@example.com --password 'BenchPass123!'
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Dict, List
+
+import httpx
+
+DEFAULT_PATHS = ["/health", "/bikes/"]
+
+
+def _summary(latencies: List[float]) -> Dict[str, float]:
+    if not latencies:
+        return {"n": 0, "p50_ms": 0.0, "p99_ms": 0.0}
+    ordered = sorted(latencies)
+    return {
+        "n": len(ordered),
+        "p50_ms": statistics.median(ordered) * 1000,
+        "p99_ms": ordered[max(0, int(len(ordered) * 0.99) - 1)] * 1000,
+    }
+
+
+async def _probe(client: httpx.AsyncClient, path: str, stop: asyncio.Event, interval: float) -> List[float]:
+    latencies = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            await client.get(path)
+        except httpx.HTTPError:
+            pass
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(interval)
+    return latencies
+
+
+async def _hammer(client: httpx.AsyncClient, email: str, password: str, stop: asyncio.Event, counts: List[int]):
+    while not stop.is_set():
+        try:
+            response = await client.post("/auth/login", json={"email": email, "password": password})
+            counts[0 if response.status_code == 200 else 1] += 1
+        except httpx.HTTPError:
+            counts[1] += 1
+
+
+async def run_phase(args, with_logins: bool) -> Dict[str, Dict[str, float]]:
+    stop = asyncio.Event()
+    counts = [0, 0]
+    limits = httpx.Limits(max_connections=args.login_concurrency + len(args.paths) + 4)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=60.0) as client:
+        probes = [asyncio.create_task(_probe(client, path, stop, args.interval)) for path in args.paths]
+        hammers = []
+        if with_logins:
+            hammers = [
+                asyncio.create_task(_hammer(client, args.email, args.password, stop, counts))
+                for _ in range(args.login_concurrency)
+            ]
+        await asyncio.sleep(args.duration)
+        stop.set()
+        results = await asyncio.gather(*probes)
+        await asyncio.gather(*hammers)
+
+    summary = {path: _summary(latencies) for path, latencies in zip(args.paths, results)}
+    if with_logins:
+        summary["/auth/login"] = {"ok": counts[0], "failed": counts[1]}
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--email", required=True, help="Existing account used for the login burst")
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--login-concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=15.0, help="Seconds per phase")
+    parser.add_argument("--interval", type=float, default=0.01, help="Pause between probe requests")
+    parser.add_argument("--path", action="append", dest="paths", help="Path to probe (repeatable)")
+    args = parser.parse_args()
+    args.paths = args.paths or DEFAULT_PATHS
+
+    for label, with_logins in (("idle", False), ("login burst", True)):
+        summary = asyncio.run(run_phase(args, with_logins))
+        print(f"== {label}")
+        for path, values in summary.items():
+            print(f"  {path:<20} " + "  ".join(
+                f"{key}={value:.1f}" if isinstance(value, float) else f"{key}={value}"
+                for key, value in values.items()
+            ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Serialisation micro-benchmark for ResponseModel[BikeListResponse].
+
+Builds N in-memory Bike rows (no database) and times turning them into
+response bytes two ways:
+
+  legacy   BikeResponse(...) with hand-written .isoformat(), a ResponseModel
+           envelope, FastAPI's response_model re-validation, then
+           jsonable_encoder + stdlib json (the old JSONResponse path)
+  fast     BikeResponse.model_validate(row) and envelope_response(), which
+           dumps the already-validated envelope with its precompiled adapter
+
+    python benchmarks/serialization.py --bikes 10000 --repeat 5
+"""
+
+import argparse
+import json
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, List
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app.models.bike import Bike
+from app.schemas.bike import BikeListResponse, BikeResponse
+from app.schemas.common import ResponseModel, envelope_response
+
+
+def make_bikes(count: int) -> List[Bike]:
+    now = datetime.utcnow()
+    return [
+        Bike(
+            id=uuid.uuid4(),
+            owner_id=uuid.uuid4(),
+            type="standard",
+            condition="A",
+            hourly_rate=50,
+            dock_id=uuid.uuid4(),
+            photos=["https://res.cloudinary.com/demo/image/upload/bike.jpg"],
+            created_at=now - timedelta(minutes=i),
+            updated_at=now,
+        )
+        for i in range(count)
+    ]
+
+
+_legacy_adapter = TypeAdapter(ResponseModel[BikeListResponse])
+
+
+def legacy(bikes: List[Bike]) -> bytes:
+    envelope = ResponseModel(
+        success=True,
+        data=BikeListResponse(bikes=[BikeResponse(
+            id=bike.id,
+            owner_id=bike.owner_id,
+            type=bike.type,
+            condition=bike.condition,
+            hourly_rate=bike.hourly_rate,
+            dock_id=bike.dock_id,
+            status=bike.status,
+            photos=bike.photos,
+            created_at=bike.created_at.isoformat(),
+            updated_at=bike.updated_at.isoformat()
+        ) for bike in bikes])
+    )
+    # What FastAPI does with a response_model and the default JSONResponse
+    validated = _legacy_adapter.validate_python(envelope, from_attributes=True)
+    content = jsonable_encoder(_legacy_adapter.dump_python(validated, mode="json"))
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def fast(bikes: List[Bike]) -> bytes:
+    data = BikeListResponse(bikes=[BikeResponse.model_validate(bike) for bike in bikes])
+    return envelope_response(data, BikeListResponse).body
+
+
+def time_it(fn: Callable[[List[Bike]], bytes], bikes: List[Bike], repeat: int) -> dict:
+    fn(bikes)  # warm-up
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = fn(bikes)
+        runs.append(time.perf_counter() - start)
+    return {"median_ms": statistics.median(runs) * 1000, "best_ms": min(runs) * 1000, "bytes": len(body)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--bikes", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    bikes = make_bikes(args.bikes)
+    print(f"{'path':<8} {'median ms':>10} {'best ms':>10} {'bytes':>10}")
+    for name, fn in (("legacy", legacy), ("fast", fast)):
+        result = time_it(fn, bikes, args.repeat)
+        print(f"{name:<8} {result['median_ms']:>10.1f} {result['best_ms']:>10.1f} {result['bytes']:>10}")
+
+
+if __name__ == "__main__":
+    main()
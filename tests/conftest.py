@@ -0,0 +1,187 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from uuid import uuid4
+
+import pytest
+import redis
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel
+
+PLAN_CHECK_DATABASE_URL = os.getenv("PLAN_CHECK_DATABASE_URL")
+
+
+def _bytes(value):
+    return value.encode() if isinstance(value, str) else value
+
+
+class MemoryRedis:
+    """Stand-in for the async Redis client: plain keys, hashes and pipelines (expiry ignored)"""
+
+    def __init__(self):
+        self.values = {}
+        self.hashes = {}
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.values:
+            return None
+        self.values[key] = value
+        return True
+
+    async def delete(self, *keys):
+        return sum(self.values.pop(key, None) is not None or self.hashes.pop(key, None) is not None for key in keys)
+
+    unlink = delete
+
+    async def incr(self, key):
+        self.values[key] = str(int(self.values.get(key) or 0) + 1).encode()
+        return int(self.values[key])
+
+    async def exists(self, *keys):
+        return sum(key in self.values or key in self.hashes for key in keys)
+
+    async def hset(self, key, field, value):
+        self.hashes.setdefault(key, {})[_bytes(field)] = _bytes(value)
+
+    async def hget(self, key, field):
+        return self.hashes.get(key, {}).get(_bytes(field))
+
+    async def hdel(self, key, *fields):
+        return sum(self.hashes.get(key, {}).pop(_bytes(field), None) is not None for field in fields)
+
+    async def hkeys(self, key):
+        return list(self.hashes.get(key, {}))
+
+    async def hlen(self, key):
+        return len(self.hashes.get(key, {}))
+
+    def pipeline(self, transaction=True):
+        return _Pipeline(self)
+
+    def sync(self):
+        """Blocking view of the same data, standing in for the client from get_redis()"""
+        return _SyncView(self)
+
+
+class _SyncView:
+    def __init__(self, client):
+        self.client = client
+
+    def __getattr__(self, name):
+        method = getattr(self.client, name)
+        return lambda *args, **kwargs: asyncio.run(method(*args, **kwargs))
+
+    def pipeline(self, transaction=True):
+        return _SyncPipeline(self.client.pipeline(transaction))
+
+
+class _SyncPipeline:
+    def __init__(self, pipeline):
+        self.pipeline = pipeline
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __getattr__(self, name):
+        return getattr(self.pipeline, name)
+
+    def execute(self):
+        return asyncio.run(self.pipeline.execute())
+
+
+class DownRedis:
+    """Stand-in for an unreachable Redis: every command raises ConnectionError"""
+
+    def __getattr__(self, name):
+        async def down(*args, **kwargs):
+            raise redis.ConnectionError("down")
+        return down
+
+    def pipeline(self, transaction=True):
+        return _Pipeline(self)
+
+
+class _Pipeline:
+    """Queues commands and runs them in order on execute()"""
+
+    def __init__(self, client):
+        self.client = client
+        self.queued = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.queued.append((name, args, kwargs))
+
+    async def execute(self):
+        return [await getattr(self.client, name)(*args, **kwargs) for name, args, kwargs in self.queued]
+
+
+@pytest.fixture
+def memory_redis():
+    return MemoryRedis()
+
+
+@pytest.fixture
+def down_redis():
+    return DownRedis()
+
+
+@pytest.fixture
+def sqlite_engine(tmp_path):
+    """
+    Async context manager opening an aiosqlite engine on a fresh file with
+    the given models' tables, disposed on exit. `docks` creates a docks
+    table holding just those ids (the real one needs PostGIS).
+    """
+    @asynccontextmanager
+    async def open_engine(*models, docks=None):
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / f'{uuid4().hex}.db'}", connect_args={"timeout": 30})
+        try:
+            async with engine.begin() as conn:
+                await conn.run_sync(SQLModel.metadata.create_all, tables=[model.__table__ for model in models])
+                if docks is not None:
+                    await conn.execute(text("CREATE TABLE docks (id CHAR(32) PRIMARY KEY)"))
+                    for dock_id in docks:
+                        await conn.execute(text("INSERT INTO docks (id) VALUES (:id)"), {"id": dock_id.hex})
+            yield engine
+        finally:
+            await engine.dispose()
+
+    return open_engine
+
+
+@pytest.fixture(scope="session")
+def scratch_engine():
+    """Engine on the scratch Postgres + PostGIS at PLAN_CHECK_DATABASE_URL, migrated to head"""
+    if not PLAN_CHECK_DATABASE_URL:
+        pytest.skip("PLAN_CHECK_DATABASE_URL not set")
+    from alembic import command
+    from alembic.config import Config
+    from app.config import settings
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    config = Config(os.path.join(root, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(root, "alembic"))
+
+    original_url = settings.database_url
+    settings.database_url = PLAN_CHECK_DATABASE_URL
+    try:
+        command.upgrade(config, "head")
+    finally:
+        settings.database_url = original_url
+
+    engine = create_engine(PLAN_CHECK_DATABASE_URL)
+    yield engine
+    engine.dispose()
@@ -0,0 +1,118 @@
+import asyncio
+from datetime import datetime
+from decimal import Decimal
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import create_engine
+from sqlmodel import Session, SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models.rental import Rental, RentalStatus
+from app.services import active_rentals
+
+
+def _rental(status=RentalStatus.OPEN):
+    return Rental(
+        bike_id=uuid4(),
+        user_id=uuid4(),
+        start_at=datetime(2026, 10, 17, 8),
+        minute_rate_snapshot=Decimal("1.0"),
+        status=status,
+    )
+
+
+async def _with_db(sqlite_engine, rentals, run):
+    async with sqlite_engine(Rental) as engine:
+        async with AsyncSession(engine, expire_on_commit=False) as db:
+            db.add_all(rentals)
+            await db.commit()
+            return await run(db)
+
+
+def test_rebuild_reconciles_with_the_database(sqlite_engine, monkeypatch, memory_redis):
+    """Test that a rebuild adds missing open rides and drops ended or unknown ones"""
+    monkeypatch.setattr(active_rentals, "get_async_redis", lambda: memory_redis)
+    registered, missing, ended = _rental(), _rental(), _rental(RentalStatus.CLOSED)
+
+    async def run(db):
+        await active_rentals.register(registered, ended)
+        await memory_redis.hset(active_rentals.ACTIVE_KEY, str(uuid4()), b"{}")
+        with pytest.raises(active_rentals.RegistryUnavailable):
+            await active_rentals.lookup_user(registered.user_id)
+        # Not rebuilt yet: answered by the database
+        assert (await active_rentals.active_for_user(db, missing.user_id))["rental_id"] == str(missing.id)
+
+        assert await active_rentals.rebuild(db) == 2
+        return (
+            await active_rentals.lookup_user(missing.user_id),
+            await active_rentals.lookup_bike(registered.bike_id),
+            await active_rentals.lookup_user(ended.user_id),
+            await active_rentals.live_count(),
+        )
+
+    by_user, by_bike, gone, count = asyncio.run(_with_db(sqlite_engine, [registered, missing, ended], run))
+    assert by_user["rental_id"] == str(missing.id)
+    assert by_bike["user_id"] == str(registered.user_id)
+    assert gone is None
+    assert count == 2
+
+
+def test_ride_end_and_new_ride_for_the_same_bike(sqlite_engine, monkeypatch, memory_redis):
+    """Test that ending a ride clears both lookups and a newer ride takes over the pointers"""
+    monkeypatch.setattr(active_rentals, "get_async_redis", lambda: memory_redis)
+    first = _rental()
+    second = _rental()
+    second.bike_id = first.bike_id
+
+    async def run(db):
+        await active_rentals.rebuild(db)
+        await active_rentals.register(first)
+        await active_rentals.unregister(first.id)
+        cleared = (await active_rentals.lookup_user(first.user_id), await active_rentals.lookup_bike(first.bike_id))
+        await active_rentals.register(second)
+        return cleared, await active_rentals.lookup_bike(first.bike_id), await active_rentals.live_count()
+
+    cleared, current, count = asyncio.run(_with_db(sqlite_engine, [], run))
+    assert cleared == (None, None)
+    assert current["rental_id"] == str(second.id)
+    assert count == 1
+
+
+def test_miss_is_authoritative_once_ready(sqlite_engine, monkeypatch, memory_redis):
+    """Test that a ready registry answers "no ride" without asking the database"""
+    monkeypatch.setattr(active_rentals, "get_async_redis", lambda: memory_redis)
+    riding = _rental()
+
+    async def run(db):
+        await active_rentals.rebuild(db)
+        # db=None: any database access would fail
+        return (
+            await active_rentals.active_for_user(None, uuid4()),
+            await active_rentals.active_for_bike(None, uuid4()),
+            await active_rentals.active_for_user(None, riding.user_id),
+        )
+
+    nobody, no_bike, found = asyncio.run(_with_db(sqlite_engine, [riding], run))
+    assert nobody is None and no_bike is None
+    assert found["rental_id"] == str(riding.id)
+
+
+def test_periodic_reconcile_repairs_lost_writes(tmp_path, monkeypatch, memory_redis):
+    """Test that the sync rebuild registers rides whose write was lost and drops ended ones"""
+    monkeypatch.setattr(active_rentals, "get_redis", memory_redis.sync)
+    lost, ended = _rental(), _rental(RentalStatus.CLOSED)
+    engine = create_engine(f"sqlite:///{tmp_path / 'reconcile.db'}")
+    SQLModel.metadata.create_all(engine, tables=[Rental.__table__])
+    with Session(engine) as session:
+        session.add_all([lost, ended])
+        session.commit()
+        memory_redis.sync().hset(active_rentals.ACTIVE_KEY, str(ended.id), b"{}")
+
+        assert active_rentals.rebuild_sync(session) == 1
+    engine.dispose()
+
+    sync = memory_redis.sync()
+    assert sync.hkeys(active_rentals.ACTIVE_KEY) == [str(lost.id).encode()]
+    assert sync.hget(active_rentals.BY_USER_KEY, str(lost.user_id)) == str(lost.id).encode()
+    assert sync.exists(active_rentals.READY_KEY)
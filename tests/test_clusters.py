@@ -0,0 +1,76 @@
+import numpy as np
+from app.services.clusters import ClusterIndex, project, unproject
+from app.services.dock_index import DockEntry, DockIndex
+
+NAIROBI = (36.6, -1.5, 37.0, -1.1)
+
+
+def _entries(count, seed=11):
+    rng = np.random.default_rng(seed)
+    lats = -1.5 + rng.random(count) * 0.4
+    lons = 36.6 + rng.random(count) * 0.4
+    return [DockEntry(f"dock-{i}", f"Dock {i}", float(lat), float(lon), 10) for i, (lat, lon) in enumerate(zip(lats, lons))]
+
+
+def _snapshot(index, zoom):
+    return sorted(
+        (f["point_count"], round(f["latitude"], 9), round(f["longitude"], 9)) if f["cluster"] else (1, f["id"])
+        for f in index.clusters_in(*NAIROBI, zoom)
+    )
+
+
+def test_projection_round_trip():
+    """Test that unproject inverts project"""
+    latitude, longitude = unproject(*project(-1.2864, 36.8172))
+    assert abs(latitude + 1.2864) < 1e-9 and abs(longitude - 36.8172) < 1e-9
+
+
+def test_clusters_cover_every_dock_at_each_zoom():
+    """Test that every zoom accounts for each dock exactly once and clusters nest"""
+    entries = _entries(1500)
+    index = DockIndex(cell_degrees=0.01, clusters=ClusterIndex(max_zoom=16))
+    index.replace_all(entries)
+
+    previous = None
+    for zoom in range(0, 18):
+        features = index.clusters_in(*NAIROBI, zoom)
+        total = sum(f["point_count"] if f["cluster"] else 1 for f in features)
+        assert total == len(entries)
+        assert all(f["expansion_zoom"] > zoom for f in features if f["cluster"])
+        if previous is not None:
+            assert len(features) >= previous
+        previous = len(features)
+
+    # Past the deepest cluster level every dock is listed on its own
+    assert {f["id"] for f in index.clusters_in(*NAIROBI, 17)} == {e.id for e in entries}
+
+
+def test_single_dock_resolves_to_its_id():
+    """Test that an isolated dock comes back as itself, not a cluster"""
+    index = DockIndex(cell_degrees=0.01)
+    index.replace_all([DockEntry("far", "Far", -1.2, 36.9, 12), DockEntry("near", "Near", -1.45, 36.65, 8)])
+
+    features = index.clusters_in(*NAIROBI, 12)
+    assert {f["id"] for f in features} == {"far", "near"}
+    assert all(not f["cluster"] for f in features)
+
+    merged = index.clusters_in(*NAIROBI, 2)
+    assert len(merged) == 1 and merged[0]["point_count"] == 2 and merged[0]["capacity"] == 20
+
+
+def test_incremental_updates_match_rebuild():
+    """Test that moving and removing docks gives the same clusters as a full rebuild"""
+    entries = _entries(800)
+    index = DockIndex(cell_degrees=0.01)
+    index.replace_all(entries)
+
+    moved = [DockEntry(e.id, e.name, e.latitude + 0.05, e.longitude - 0.03, e.capacity) for e in entries[:100]]
+    for entry in moved:
+        index.upsert(entry)
+    for entry in entries[100:150]:
+        index.remove(entry.id)
+
+    rebuilt = DockIndex(cell_degrees=0.01)
+    rebuilt.replace_all(moved + entries[150:])
+    for zoom in (4, 10, 13, 15, 17):
+        assert _snapshot(index, zoom) == _snapshot(rebuilt, zoom)
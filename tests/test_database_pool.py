@@ -0,0 +1,52 @@
+import pytest
+from sqlalchemy import create_engine, exc
+from app import database
+from app.database import TimedQueuePool, _ping_idle_connections
+from app.services.metrics import metrics
+
+
+@pytest.fixture
+def pool_engine(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=TimedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+    )
+    engine.pool.metric_name = "db_pool.test"
+    yield engine
+    engine.dispose()
+
+
+def test_checkout_wait_and_timeouts_recorded(pool_engine):
+    """Test that checkouts are timed and pool exhaustion is counted"""
+    before = metrics.snapshot()["counters"].get("db_pool.test.timeouts", 0)
+    with pool_engine.connect():
+        assert pool_engine.pool.checkedout() == 1
+        with pytest.raises(exc.TimeoutError):
+            pool_engine.connect()
+
+    snapshot = metrics.snapshot()
+    assert snapshot["timings"]["db_pool.test.checkout_wait"]["count"] >= 2
+    assert snapshot["counters"]["db_pool.test.timeouts"] == before + 1
+
+
+def test_idle_connections_are_pinged(pool_engine, monkeypatch):
+    """Test that only connections idle past the threshold are pinged on checkout"""
+    _ping_idle_connections(pool_engine, idle_seconds=10)
+    clock = [1000.0]
+    monkeypatch.setattr(database.time, "monotonic", lambda: clock[0])
+    pings = []
+    with pool_engine.connect() as conn:
+        conn.connection.dbapi_connection.set_trace_callback(pings.append)
+
+    clock[0] += 5
+    with pool_engine.connect():
+        pass
+    assert "SELECT 1" not in pings
+
+    clock[0] += 11
+    with pool_engine.connect():
+        pass
+    assert "SELECT 1" in pings
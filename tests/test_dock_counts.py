@@ -0,0 +1,100 @@
+from uuid import uuid4
+
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+from sqlmodel import Session, select
+
+from app.models.bike import Bike, BikeStatus
+from app.models.dock import Dock
+from app.models.dock_count_stripe import DockCountStripe
+from app.models.user import User
+from app.services import dock_counts
+from app.services.dock_counts import availability_deltas
+
+
+def test_availability_deltas():
+    """Test net count changes for rentals, returns, moves and status edits"""
+    a, b = uuid4(), uuid4()
+    assert availability_deltas([((a, "available"), (a, "rented"))]) == {str(a): -1}
+    assert availability_deltas([((a, BikeStatus.rented), (b, BikeStatus.available))]) == {str(b): 1}
+    assert availability_deltas([((a, "available"), (b, "available"))]) == {str(a): -1, str(b): 1}
+    # Same dock, still available: nothing to write
+    assert availability_deltas([((a, "available"), (a, "available"))]) == {}
+    assert availability_deltas([((None, None), (a, "available")), ((a, "maintenance"), (None, None))]) == {str(a): 1}
+
+
+def _sql(statement) -> str:
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+def test_row_update_is_atomic_increment(monkeypatch):
+    """Test that the default mode increments the dock row in place"""
+    monkeypatch.setattr(dock_counts.settings, "dock_count_stripes", 0)
+    dock_id = str(uuid4())
+    [statement] = dock_counts._statements({dock_id: -1})
+    sql = _sql(statement)
+    assert sql.startswith("UPDATE docks SET available_count=(docks.available_count +")
+    assert "updated_at=" in sql
+
+
+def test_fold_and_reconcile_bump_updated_at():
+    """Test that count writes outside the row update still surface in ?since= dock syncs"""
+    assert "updated_at = now()" in dock_counts.FOLD_SQL.text
+    assert "updated_at = now()" in dock_counts.RECONCILE_SQL.text
+
+
+def test_striped_update_upserts_a_stripe(monkeypatch):
+    """Test that striping writes to a stripe row instead of the dock row"""
+    monkeypatch.setattr(dock_counts.settings, "dock_count_stripes", 8)
+    [statement] = dock_counts._statements({str(uuid4()): 1})
+    sql = _sql(statement)
+    assert sql.startswith("INSERT INTO dock_count_stripes")
+    assert "ON CONFLICT (dock_id, stripe) DO UPDATE SET delta = (dock_count_stripes.delta + excluded.delta)" in sql
+    assert 0 <= statement.compile().params["stripe"] < 8
+
+
+def test_bike_status_change_reads_the_previous_status_under_lock():
+    """Test that the conditional bike update returns the locked pre-change status"""
+    sql = _sql(dock_counts.change_bike_status(uuid4(), BikeStatus.rented))
+    assert "FOR UPDATE) AS previous" in sql
+    assert "previous.status != " in sql
+    assert sql.endswith("RETURNING bikes.dock_id, previous.status")
+
+
+def test_bike_status_change_returns_a_row_once(scratch_engine):
+    """Test that only the first of two identical status changes reports a change"""
+    with Session(scratch_engine) as session:
+        owner = User(email=f"owner-{uuid4()}@example.com", password_hash="x")
+        session.add(owner)
+        session.flush()
+        bike = Bike(owner_id=owner.id, status=BikeStatus.available)
+        session.add(bike)
+        session.flush()
+        try:
+            first = session.exec(dock_counts.change_bike_status(bike.id, BikeStatus.rented)).all()
+            second = session.exec(dock_counts.change_bike_status(bike.id, BikeStatus.rented)).all()
+        finally:
+            session.rollback()
+    assert [tuple(row) for row in first] == [(None, BikeStatus.available)]
+    assert second == []
+
+
+def test_fold_moves_docks_into_the_since_window(scratch_engine):
+    """Test that folding stripes makes the dock show up in a ?since= sync taken before it"""
+    dock_id = uuid4()
+    with Session(scratch_engine) as session:
+        try:
+            session.exec(text(
+                "INSERT INTO docks (id, name, geom, capacity, available_count, updated_at) "
+                "VALUES (:id, 'fold', ST_SetSRID(ST_MakePoint(36.8, -1.28), 4326), 10, 3, now() - interval '1 day')"
+            ), params={"id": str(dock_id)})
+            session.add(DockCountStripe(dock_id=dock_id, stripe=0, delta=2))
+            session.flush()
+            session.exec(dock_counts.FOLD_SQL)
+            since = session.exec(text("SELECT now() - interval '1 hour'")).one()[0]
+            stored = session.exec(
+                select(Dock.available_count).where(Dock.id == dock_id, Dock.updated_at > since)
+            ).all()
+        finally:
+            session.rollback()
+    assert stored == [5]
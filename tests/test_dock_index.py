@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+from fastapi import HTTPException
+from app.services.dock_index import DockEntry, DockIndex
+from app.services.geo import haversine_m, parse_bbox
+
+
+def _entries(count, seed=7):
+    rng = np.random.default_rng(seed)
+    lats = -1.5 + rng.random(count) * 0.4
+    lons = 36.6 + rng.random(count) * 0.4
+    return [DockEntry(f"dock-{i}", f"Dock {i}", float(lat), float(lon), 10) for i, (lat, lon) in enumerate(zip(lats, lons))]
+
+
+def test_haversine_matches_known_distance():
+    """Test the vectorised haversine against a known distance"""
+    # Nairobi CBD to JKIA, about 12.8 km as the crow flies
+    distance = haversine_m(-1.2864, 36.8172, np.array([-1.3192, -1.2864]), np.array([36.9278, 36.8172]))
+    assert abs(distance[0] - 12_820) < 200
+    assert distance[1] == 0
+
+
+def test_nearby_matches_brute_force():
+    """Test that grid lookups return the same docks, in order, as a full scan"""
+    entries = _entries(2000)
+    index = DockIndex(cell_degrees=0.01)
+    index.replace_all(entries)
+
+    for radius in (300, 1500, 50_000):
+        hits = index.nearby(-1.29, 36.82, radius)
+        distances = haversine_m(-1.29, 36.82, np.array([e.latitude for e in entries]), np.array([e.longitude for e in entries]))
+        expected = [entries[i].id for i in np.argsort(distances, kind="stable") if distances[i] <= radius]
+        assert [entry.id for entry, _ in hits] == expected
+        assert all(a[1] <= b[1] for a, b in zip(hits, hits[1:]))
+
+    assert len(index.nearby(-1.29, 36.82, 50_000, limit=5)) == 5
+
+
+def test_incremental_updates():
+    """Test upserts move docks, removals drop them and slots are reused"""
+    index = DockIndex(cell_degrees=0.01)
+    index.replace_all(_entries(10))
+
+    index.upsert(DockEntry("new", "New", -1.0, 36.0, 5))
+    assert [entry.id for entry, _ in index.nearby(-1.0, 36.0, 10)] == ["new"]
+
+    index.upsert(DockEntry("new", "Moved", -1.2, 36.2, 5))
+    assert index.nearby(-1.0, 36.0, 10) == []
+    assert index.nearby(-1.2, 36.2, 10)[0][0].name == "Moved"
+
+    index.remove("dock-0")
+    index.remove("missing")
+    assert index.get("dock-0") is None
+    assert len(index) == 10
+    index.upsert(DockEntry("again", "Again", -1.3, 36.3, 5))
+    assert len(index._ids) == 11
+
+
+def test_parse_bbox():
+    """Test bbox parsing and rejection of inverted or malformed boxes"""
+    assert parse_bbox("36.8,-1.3,36.9,-1.2") == (36.8, -1.3, 36.9, -1.2)
+    for bad in ("36.9,-1.3,36.8,-1.2", "1,2,3", "a,b,c,d", "0,0,200,10"):
+        with pytest.raises(HTTPException):
+            parse_bbox(bad)
@@ -0,0 +1,59 @@
+from app.services.events import EventBuffer
+from app.services.metrics import metrics
+
+
+def _dropped() -> float:
+    return metrics.snapshot()["counters"].get("events.dropped", 0)
+
+
+def test_flushes_in_batches_and_drains_on_stop():
+    """Test size-triggered bulk writes and drain on shutdown"""
+    batches = []
+    buffer = EventBuffer(writer=batches.append, flush_size=2, flush_interval=60)
+
+    for i in range(5):
+        buffer.add({"event_type": f"e{i}"})
+    buffer.stop()
+
+    assert all(1 <= len(batch) <= 2 for batch in batches)
+    assert [row["event_type"] for batch in batches for row in batch] == ["e0", "e1", "e2", "e3", "e4"]
+    assert buffer.depth == 0
+
+
+def test_bad_row_does_not_sink_batch():
+    """Test that a failing batch is retried row by row, dropping only the bad row"""
+    written, attempts = [], []
+
+    def writer(rows):
+        attempts.append(len(rows))
+        if any(row["event_type"] == "bad" for row in rows):
+            raise ValueError("dangling foreign key")
+        written.extend(rows)
+
+    buffer = EventBuffer(writer=writer, flush_size=10, flush_interval=60)
+    buffer._pending.extend([{"event_type": "a"}, {"event_type": "bad"}, {"event_type": "b"}])
+    dropped = _dropped()
+
+    assert buffer.flush() == 2
+    assert attempts == [3, 1, 1, 1]
+    assert [row["event_type"] for row in written] == ["a", "b"]
+    assert _dropped() == dropped + 1
+    assert buffer.depth == 0
+
+
+def test_stop_drains_through_the_row_by_row_retry():
+    """Test that rows buffered at shutdown are written even when their batch fails"""
+    written = []
+
+    def writer(rows):
+        if any(row["event_type"] == "bad" for row in rows):
+            raise ValueError("dangling foreign key")
+        written.extend(rows)
+
+    buffer = EventBuffer(writer=writer, flush_size=10, flush_interval=60)
+    for event_type in ["a", "bad", "b", "c"]:
+        buffer.add({"event_type": event_type})
+    buffer.stop()
+
+    assert [row["event_type"] for row in written] == ["a", "b", "c"]
+    assert buffer.depth == 0
@@ -0,0 +1,49 @@
+import asyncio
+from uuid import uuid4
+
+from app.models.bike import Bike
+from app.services import fallback
+
+
+def _payload():
+    busy, quiet = uuid4(), uuid4()
+    docks = [(busy, "Busy", -1.29, 36.82, 2), (quiet, "Quiet", -1.30, 36.80, 1)]
+    bikes = [
+        Bike(type="standard", condition="A", hourly_rate=50, dock_id=quiet),
+        Bike(type="standard", condition="A", hourly_rate=50, dock_id=busy),
+        Bike(type="premium", condition="A", hourly_rate=60, dock_id=busy),
+    ]
+    return docks, fallback._payload(docks, bikes)
+
+
+def test_payload_ranks_bikes_by_dock(monkeypatch, memory_redis):
+    """Test that fallback bikes follow the dock ranking"""
+    docks, payload = _payload()
+    memory_redis.values[fallback.FALLBACK_KEY] = payload
+    monkeypatch.setattr(fallback, "get_async_redis", lambda: memory_redis)
+    fallback._local.clear()
+
+    result = asyncio.run(fallback.get_fallback(session=None))
+
+    assert [d["name"] for d in result["docks"]] == ["Busy", "Quiet"]
+    assert all(d["fallback"] and d["distance_meters"] is None for d in result["docks"])
+    assert [b.dock_id for b in result["bikes"]] == [docks[0][0], docks[0][0], docks[1][0]]
+
+
+def test_serves_from_cache_without_the_database(monkeypatch, memory_redis):
+    """Test that a published fallback is served from Redis, then from the local cache"""
+    _, payload = _payload()
+    memory_redis.values[fallback.FALLBACK_KEY] = payload
+    monkeypatch.setattr(fallback, "get_async_redis", lambda: memory_redis)
+    fallback._local.clear()
+
+    async def run():
+        # session=None: any database access would fail
+        first = await fallback.get_fallback(session=None)
+        memory_redis.values.clear()
+        second = await fallback.get_fallback(session=None)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first is second
+    assert len(first["bikes"]) == 3
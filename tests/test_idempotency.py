@@ -0,0 +1,86 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI, HTTPException, Request
+
+from app.services import idempotency
+
+
+def _app(calls):
+    app = FastAPI()
+    app.add_middleware(idempotency.IdempotencyMiddleware)
+
+    @app.post("/charge")
+    async def charge(request: Request):
+        body = await request.json()
+        calls.append(body)
+        await asyncio.sleep(0.05)
+        if body.get("fail"):
+            raise HTTPException(status_code=503, detail="Provider down")
+        return {"charged": body["amount"], "call": len(calls)}
+
+    return app
+
+
+def _post(app, requests):
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*(
+                client.post("/charge", json=body, headers=headers) for body, headers in requests
+            ))
+    return asyncio.run(run())
+
+
+@pytest.fixture(autouse=True)
+def _use_memory_redis(monkeypatch, memory_redis):
+    monkeypatch.setattr(idempotency, "get_async_redis", lambda: memory_redis)
+    monkeypatch.setattr(idempotency.settings, "idempotency_ttl", 60)
+    monkeypatch.setattr(idempotency.settings, "idempotency_wait_timeout", 5.0)
+
+
+def test_retry_replays_the_stored_response():
+    """Test that a retry gets the first response byte-for-byte without running again"""
+    calls = []
+    app = _app(calls)
+    headers = {"Idempotency-Key": "k1", "Authorization": "Bearer a"}
+
+    first, = _post(app, [({"amount": 5}, headers)])
+    retry, = _post(app, [({"amount": 5}, headers)])
+
+    assert len(calls) == 1
+    assert retry.status_code == first.status_code == 200
+    assert retry.content == first.content
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert "idempotent-replayed" not in first.headers
+
+
+def test_concurrent_duplicates_wait_for_the_first():
+    """Test that simultaneous duplicates run the handler once and all get its response"""
+    calls = []
+    headers = {"Idempotency-Key": "k2", "Authorization": "Bearer a"}
+
+    responses = _post(_app(calls), [({"amount": 7}, headers)] * 5)
+
+    assert len(calls) == 1
+    assert {response.content for response in responses} == {responses[0].content}
+
+
+def test_scope_body_and_failures():
+    """Test per-caller scoping, reuse with another body, and that failures are not stored"""
+    calls = []
+    app = _app(calls)
+
+    _post(app, [({"amount": 1}, {"Idempotency-Key": "k3", "Authorization": "Bearer a"})])
+    other_caller, = _post(app, [({"amount": 1}, {"Idempotency-Key": "k3", "Authorization": "Bearer b"})])
+    reused, = _post(app, [({"amount": 2}, {"Idempotency-Key": "k3", "Authorization": "Bearer a"})])
+    assert other_caller.status_code == 200 and len(calls) == 2
+    assert reused.status_code == 422 and len(calls) == 2
+
+    failed, = _post(app, [({"amount": 3, "fail": True}, {"Idempotency-Key": "k4"})])
+    retried, = _post(app, [({"amount": 3, "fail": True}, {"Idempotency-Key": "k4"})])
+    assert failed.status_code == retried.status_code == 503 and len(calls) == 4
+
+    _post(app, [({"amount": 9}, {})] * 2)
+    assert len(calls) == 6
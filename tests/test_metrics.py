@@ -0,0 +1,34 @@
+import asyncio
+
+import httpx
+from sqlalchemy import create_engine
+
+from app import database
+from app.database import TimedQueuePool
+from app.main import app
+
+
+def test_metrics_endpoint_exposes_pool_buffer_and_cache_fields(tmp_path):
+    """Test that GET /metrics serves the registry snapshot"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", poolclass=TimedQueuePool, pool_size=1)
+    database._register_pool_metrics("endpoint_test", engine)
+    with engine.connect():
+        pass
+
+    async def get():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://api.cycle.com") as client:
+            return await client.get("/metrics")
+
+    try:
+        response = asyncio.run(get())
+    finally:
+        engine.dispose()
+
+    assert response.status_code == 200
+    body = response.json()["metrics"]
+    assert body["gauges"]["db_pool.endpoint_test.size"] == 1
+    assert body["timings"]["db_pool.endpoint_test.checkout_wait"]["count"] >= 1
+    assert "events.buffer_depth" in body["gauges"]
+    assert "nearby_cache.hit_ratio" in body["gauges"]
+    assert "principal_cache.local_size" in body["gauges"]
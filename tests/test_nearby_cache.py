@@ -0,0 +1,91 @@
+import asyncio
+import math
+
+import numpy as np
+
+from app.services import nearby_cache
+from app.services.geo import haversine_m
+
+
+def _docks(count=400, seed=9):
+    rng = np.random.default_rng(seed)
+    return [
+        (float(-1.30 + rng.random() * 0.05), float(36.80 + rng.random() * 0.05), {"id": f"dock-{i}"})
+        for i in range(count)
+    ]
+
+
+def _fetcher(items, calls):
+    async def fetch(latitude, longitude, radius_m, limit):
+        calls.append((latitude, longitude, radius_m))
+        distances = haversine_m(latitude, longitude, np.array([i[0] for i in items]), np.array([i[1] for i in items]))
+        order = [i for i in np.argsort(distances, kind="stable") if distances[i] <= radius_m]
+        return [items[i] for i in order[:limit]]
+    return fetch
+
+
+def test_geohash_known_value():
+    """Test the encoder against the reference example"""
+    assert nearby_cache.geohash(42.605, -5.603, 5) == "ezs42"
+    dlat, dlng = nearby_cache.cell_size(6)
+    assert abs(dlat - 180 / 2 ** 15) < 1e-12 and abs(dlng - 360 / 2 ** 15) < 1e-12
+
+
+def test_cached_results_match_direct_query(monkeypatch, memory_redis):
+    """Test that nearby points in one cell share an entry and get exact results"""
+    monkeypatch.setattr(nearby_cache, "get_async_redis", lambda: memory_redis)
+    monkeypatch.setattr(nearby_cache.settings, "nearby_cache_ttl", 15)
+    monkeypatch.setattr(nearby_cache.settings, "nearby_cache_superset_cap", 10_000)
+    items, calls = _docks(), []
+    fetch = _fetcher(items, calls)
+
+    async def run():
+        results = []
+        for latitude, longitude, radius in ((-1.2801, 36.8201, 0.8), (-1.2803, 36.8204, 0.6), (-1.2802, 36.8199, 1.0)):
+            cached = await nearby_cache.cached_nearby("docks", latitude, longitude, radius, 20, fetch)
+            direct = nearby_cache.nearest(await _fetcher(items, [])(latitude, longitude, radius * 1000, 20),
+                                          latitude, longitude, math.inf, 20)
+            results.append((cached, direct))
+        return results
+
+    for cached, direct in asyncio.run(run()):
+        assert [p["id"] for p, _ in cached] == [p["id"] for p, _ in direct]
+    # Same geohash cell, and 0.6 / 0.8 / 1.0 km all round up to the 1 km bucket
+    assert len(calls) == 1
+
+
+def test_invalidation_covers_entries_holding_a_dock(monkeypatch, memory_redis):
+    """Test that a dock's covering keys include every entry that cached it"""
+    monkeypatch.setattr(nearby_cache, "get_async_redis", lambda: memory_redis)
+    monkeypatch.setattr(nearby_cache.settings, "nearby_cache_ttl", 15)
+    items = _docks()
+
+    async def run():
+        await nearby_cache.cached_nearby("docks", -1.2801, 36.8201, 2.0, 50, _fetcher(items, []))
+        await nearby_cache.cached_nearby("bikes", -1.2950, 36.8400, 0.5, 50, _fetcher(items, []))
+        return list(memory_redis.values)
+
+    keys = asyncio.run(run())
+    precision = nearby_cache.settings.nearby_cache_precision
+    for key in keys:
+        entry = nearby_cache.orjson.loads(memory_redis.values[key])
+        for latitude, longitude, _ in entry["items"]:
+            assert key in set(nearby_cache.covering_keys(latitude, longitude, precision))
+
+    # A dock far outside both entries leaves them alone
+    asyncio.run(nearby_cache.invalidate_points([(-1.0, 37.5)]))
+    assert set(memory_redis.values) == set(keys)
+    lat, lng, _ = nearby_cache.orjson.loads(memory_redis.values[keys[0]])["items"][0]
+    asyncio.run(nearby_cache.invalidate_points([(lat, lng)]))
+    assert keys[0] not in memory_redis.values
+
+
+def test_truncated_superset_defers_to_the_database(monkeypatch, memory_redis):
+    """Test that a capped entry is only used where it is known to be complete"""
+    monkeypatch.setattr(nearby_cache, "get_async_redis", lambda: memory_redis)
+    monkeypatch.setattr(nearby_cache.settings, "nearby_cache_ttl", 15)
+    monkeypatch.setattr(nearby_cache.settings, "nearby_cache_superset_cap", 5)
+
+    result = asyncio.run(nearby_cache.cached_nearby("docks", -1.2801, 36.8201, 2.0, 50, _fetcher(_docks(), [])))
+    assert result is None
+    assert asyncio.run(nearby_cache.cached_nearby("docks", -1.2801, 36.8201, 50.0, 50, _fetcher(_docks(), []))) is None
@@ -0,0 +1,52 @@
+from datetime import datetime
+import pytest
+from fastapi import HTTPException
+from sqlmodel import select
+from app.models.bike import Bike
+from app.services.pagination import apply_keyset, decode_cursor, encode_cursor, paginate, parse_since, sync_watermark
+
+
+def test_cursor_round_trip():
+    """Test that cursors decode back to the values they were built from"""
+    created_at = datetime(2026, 10, 17, 9, 30, 0, 123456)
+    cursor = encode_cursor(created_at, "b1e2c3")
+    assert decode_cursor(cursor) == (created_at, "b1e2c3")
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", "", "e30"])
+def test_invalid_cursor_rejected(cursor):
+    """Test that malformed cursors are a 400, not a 500"""
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor(cursor)
+    assert exc.value.status_code == 400
+
+
+def test_paginate_sets_next_cursor_only_when_more_rows():
+    """Test that the look-ahead row is trimmed and turned into a cursor"""
+    rows = [
+        Bike(type="standard", condition="A", hourly_rate=1, created_at=datetime(2026, 1, day))
+        for day in (3, 2, 1)
+    ]
+    page = paginate(rows, 2, "created_at")
+    assert page.items == rows[:2]
+    assert decode_cursor(page.next_cursor) == (rows[1].created_at, str(rows[1].id))
+
+    last = paginate(rows[2:], 2, "created_at")
+    assert last.next_cursor is None
+
+
+def test_apply_keyset_seeks_past_cursor():
+    """Test that the seek predicate and ordering are added to the query"""
+    cursor = encode_cursor(datetime(2026, 1, 1), "6a3c7c1e-1a52-4b7b-9d6c-2f2b0c9e1f00")
+    sql = str(apply_keyset(select(Bike), Bike.created_at, Bike.id, cursor, 10))
+    assert "(bikes.created_at, bikes.id) <" in sql
+    assert "ORDER BY bikes.created_at DESC, bikes.id DESC" in sql
+
+
+def test_parse_since_normalises_to_naive_utc():
+    """Test that watermarks with an offset compare against naive UTC columns"""
+    assert parse_since(None) is None
+    assert parse_since("2026-10-17T12:00:00+03:00") == datetime(2026, 10, 17, 9, 0, 0)
+    assert parse_since(sync_watermark()) < datetime.utcnow()
+    with pytest.raises(HTTPException):
+        parse_since("yesterday")
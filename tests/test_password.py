@@ -0,0 +1,28 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from app.auth import password
+from app.services.metrics import metrics
+
+
+def test_hash_and_verify_off_loop():
+    """Test hashing and verification round-trip through the executor"""
+    async def run():
+        hashed = await password.get_password_hash_async("TestPass123!")
+        assert await password.verify_password_async("TestPass123!", hashed)
+        assert not await password.verify_password_async("WrongPassword", hashed)
+
+    asyncio.run(run())
+    assert metrics.snapshot()["timings"]["password_hash.queue_wait"]["count"] >= 3
+
+
+def test_rejects_when_queue_full(monkeypatch):
+    """Test that a saturated hasher sheds load with 503"""
+    monkeypatch.setattr(password.settings, "password_hash_workers", 1)
+    monkeypatch.setattr(password.settings, "password_hash_max_queue", 0)
+    monkeypatch.setattr(password, "_in_flight", 1)
+
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(password.get_password_hash_async("TestPass123!"))
+
+    assert exc_info.value.status_code == 503
@@ -0,0 +1,85 @@
+import json
+import math
+
+import numpy as np
+
+from app.schemas.rental import RideEndRequest
+from app.services.geo import path_samples
+from app.services.path_codec import decode_path, encode_path, simplify
+
+
+def _ride(seconds=1800, seed=3):
+    """A 1 Hz GPS trace: ~5 m/s, a new heading every minute, ~1.5 m of jitter"""
+    rng = np.random.default_rng(seed)
+    lat, lng, heading = -1.2864, 36.8172, 0.0
+    start_ms = 1_792_000_000_000
+    samples = []
+    for second in range(seconds):
+        if second % 60 == 0:
+            heading = rng.uniform(0, 2 * math.pi)
+        lat += 5 * math.cos(heading) / 111_320
+        lng += 5 * math.sin(heading) / (111_320 * math.cos(math.radians(lat)))
+        samples.append({
+            "lat": lat + rng.normal(0, 1.5) / 111_320,
+            "lng": lng + rng.normal(0, 1.5) / 111_320,
+            "t": start_ms + second * 1000,
+            "accuracy": 5.0,
+        })
+    return samples
+
+
+def test_round_trip_keeps_points_and_times():
+    """Test that encoding keeps coordinates to 1e-5 degrees and times exactly"""
+    points = path_samples(_ride(120))
+    decoded = decode_path(encode_path(points))
+    assert len(decoded) == len(points)
+    for (lat, lng, t), sample in zip(points, decoded):
+        assert abs(sample["lat"] - lat) <= 0.5e-5 and abs(sample["lng"] - lng) <= 0.5e-5
+        assert sample["t"] == t
+
+
+def test_parse_accepts_mixed_timestamps_and_skips_bad_samples():
+    """Test timestamp normalisation and that malformed samples are dropped"""
+    points = path_samples([
+        {"lat": 1, "lng": 2, "t": 1_792_000_000},
+        {"latitude": 1, "longitude": 2, "timestamp": "2026-10-17T10:00:00Z"},
+        {"lat": "x", "lng": 2},
+        {"lat": 1, "lng": 2, "t": float("nan")},
+        {"lat": 1, "lng": 2, "t": float("inf")},
+        "junk",
+    ])
+    assert points == [
+        (1.0, 2.0, 1_792_000_000_000), (1.0, 2.0, 1_792_231_200_000), (1.0, 2.0, None), (1.0, 2.0, None)
+    ]
+    assert "t" not in decode_path(encode_path([(1.0, 2.0, None)]))[0]
+    assert encode_path([]) is None and decode_path(None) == []
+
+
+def test_simplify_keeps_shape_within_tolerance():
+    """Test that Douglas-Peucker keeps the ends and collapses a straight line"""
+    line = [(0.0, i * 1e-5, i) for i in range(50)]
+    assert simplify(line, 1.0) == [line[0], line[-1]]
+
+    points = path_samples(_ride(600))
+    simplified = simplify(points, 5.0)
+    assert simplified[0] == points[0] and simplified[-1] == points[-1]
+    assert len(simplified) < len(points) / 5
+
+
+def test_storage_drops_more_than_tenfold():
+    """Test stored size per ride against the raw JSON samples"""
+    samples = _ride()
+    raw = len(json.dumps(samples).encode())
+    packed = len(encode_path(simplify(path_samples(samples), 5.0)))
+    assert raw / packed >= 10
+
+
+def test_non_finite_timestamps_from_a_request_encode():
+    """Test that NaN / Infinity timestamps in a ride end body are dropped, not a 500"""
+    request = RideEndRequest.model_validate_json(
+        '{"end_at": "2026-10-17T10:00:00", "minutes_client": 5, "path_sample": ['
+        '{"lat": -1.28, "lng": 36.81, "t": NaN}, {"lat": -1.29, "lng": 36.82, "t": Infinity}]}'
+    )
+    decoded = decode_path(encode_path(path_samples(request.path_sample)))
+    assert [(round(p["lat"], 5), round(p["lng"], 5)) for p in decoded] == [(-1.28, 36.81), (-1.29, 36.82)]
+    assert all("t" not in p for p in decoded)
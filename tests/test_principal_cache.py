@@ -0,0 +1,73 @@
+import asyncio
+import json
+from uuid import uuid4
+
+from app.auth import cache
+from app.models.user import User, UserRole
+
+
+def test_ttl_cache_expires_and_evicts():
+    """Test TTL expiry and LRU eviction of the local cache"""
+    ttl_cache = cache.TTLCache(maxsize=2, ttl=60)
+    ttl_cache.set("a", 1)
+    ttl_cache.set("b", 2)
+    ttl_cache.get("a")
+    ttl_cache.set("c", 3)
+    assert ttl_cache.get("b") is None
+    assert ttl_cache.get("a") == 1
+
+    expired = cache.TTLCache(maxsize=2, ttl=-1)
+    expired.set("a", 1)
+    assert expired.get("a") is None
+
+
+def test_cached_user_round_trip_and_invalidate(monkeypatch, down_redis):
+    """Test that the local level serves users and drops them on invalidation"""
+    monkeypatch.setattr(cache, "get_async_redis", lambda: down_redis)
+    cache.local_cache.clear()
+    user = User(email="cache@example.com", password_hash="secret", role=UserRole.admin)
+
+    async def run():
+        assert await cache.get_cached_user(user.id) is None
+        await cache.cache_user(user)
+        cached = await cache.get_cached_user(user.id)
+        assert cached.email == "cache@example.com"
+        assert cached.role == UserRole.admin
+        assert cached.password_hash == ""
+        await cache.invalidate_user(user.id)
+        assert await cache.get_cached_user(user.id) is None
+
+    asyncio.run(run())
+
+
+def test_principal_is_shared_through_redis(monkeypatch, memory_redis):
+    """Test that another process resolves a cached user from Redis until it is invalidated"""
+    monkeypatch.setattr(cache, "get_async_redis", lambda: memory_redis)
+    monkeypatch.setattr(cache, "get_redis", memory_redis.sync)
+    cache.local_cache.clear()
+    user = User(id=str(uuid4()), email="shared@example.com", password_hash="secret", role=UserRole.admin)
+    key = f"principal:{user.id}"
+
+    async def run():
+        await cache.cache_user(user)
+        stored = json.loads(await memory_redis.get(key))
+        assert stored["email"] == "shared@example.com"
+        assert "password_hash" not in stored
+
+        # Another process: nothing local, so the user comes from Redis
+        cache.local_cache.clear()
+        shared = await cache.get_cached_user(user.id)
+        assert shared.email == "shared@example.com" and shared.role == UserRole.admin
+        assert cache.local_cache.get(user.id) is not None
+
+        await cache.invalidate_user(user.id)
+        assert await memory_redis.exists(key) == 0
+        cache.local_cache.clear()
+        assert await cache.get_cached_user(user.id) is None
+
+        await cache.cache_user(user)
+
+    asyncio.run(run())
+    cache.invalidate_user_sync(user.id)
+    assert asyncio.run(memory_redis.exists(key)) == 0
+    assert cache.local_cache.get(user.id) is None
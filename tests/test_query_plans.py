@@ -0,0 +1,229 @@
+"""
+EXPLAIN harness for router queries.
+
+Migrates the database at PLAN_CHECK_DATABASE_URL (a scratch Postgres + PostGIS
+database) to head, seeds a large dataset inside a transaction, and fails if
+any router lookup plans a sequential scan on a table it should reach through
+an index. Everything seeded is rolled back afterwards.
+"""
+import os
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func, text
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+from sqlmodel import select
+
+from app.models.bike import Bike, BikeStatus
+from app.models.device import Device
+from app.models.dock import Dock
+from app.models.event import Event
+from app.models.notification import Notification
+from app.models.payment import Payment, PaymentStatus
+from app.models.rental import Rental
+from app.models.user import User
+from app.models.verification_doc import VerificationDoc
+from app.routers.bikes import bikes_near_query
+from app.routers.docks import docks_near_query, docks_query
+from app.services.active_rentals import _latest_open
+from app.services.pagination import apply_keyset, encode_cursor
+from app.services.tiles import TILE_SQL
+
+PLAN_CHECK_DATABASE_URL = os.getenv("PLAN_CHECK_DATABASE_URL")
+
+pytestmark = pytest.mark.skipif(
+    not PLAN_CHECK_DATABASE_URL, reason="PLAN_CHECK_DATABASE_URL not set"
+)
+
+SEED_SQL = [
+    """
+    INSERT INTO users (id, email, email_verified, password_hash, verified_status,
+                       eco_points, owner_max_bikes, reset_token)
+    SELECT gen_random_uuid(), 'plan-' || gen_random_uuid() || '@example.com', true, 'x',
+           'verified', 0, 1, CASE WHEN g % 100 = 0 THEN md5(g::text) END
+    FROM generate_series(1, 20000) g
+    """,
+    """
+    INSERT INTO docks (id, name, geom, capacity, available_count, created_at, updated_at)
+    SELECT gen_random_uuid(), 'Dock ' || g,
+           ST_SetSRID(ST_MakePoint(36.6 + random() * 0.4, -1.5 + random() * 0.4), 4326), 10, 0,
+           now() - g * interval '1 minute', now() - g * interval '1 minute'
+    FROM generate_series(1, 50000) g
+    """,
+    """
+    INSERT INTO bikes (id, owner_id, type, condition, hourly_rate, dock_id, status)
+    SELECT gen_random_uuid(), u.a[1 + g % array_length(u.a, 1)], 'standard', 'B', 50,
+           d.a[1 + g % array_length(d.a, 1)],
+           (ARRAY['available', 'rented', 'maintenance', 'inactive'])[1 + g % 4]
+    FROM generate_series(1, 20000) g,
+         (SELECT array_agg(id) a FROM users) u,
+         (SELECT array_agg(id) a FROM docks) d
+    """,
+    """
+    INSERT INTO rentals (id, client_rental_id, bike_id, user_id, start_at,
+                         minute_rate_snapshot, status)
+    SELECT gen_random_uuid(), 'client-' || g, b.a[1 + g % array_length(b.a, 1)],
+           u.a[1 + g % array_length(u.a, 1)], now() - g * interval '1 minute', 1.0,
+           CASE WHEN g % 50 = 0 THEN 'open' ELSE 'closed' END
+    FROM generate_series(1, 50000) g,
+         (SELECT array_agg(id) a FROM users) u,
+         (SELECT array_agg(id) a FROM bikes) b
+    """,
+    """
+    INSERT INTO events (id, user_id, dock_id, event_type, properties, occurred_at)
+    SELECT gen_random_uuid(), u.a[1 + g % array_length(u.a, 1)],
+           CASE WHEN g % 100 = 0 THEN d.a[1 + g % array_length(d.a, 1)] END,
+           CASE WHEN g % 100 = 0 THEN 'ride_start' ELSE 'user_login' END,
+           '{}', now() - g * interval '10 seconds'
+    FROM generate_series(1, 100000) g,
+         (SELECT array_agg(id) a FROM users) u,
+         (SELECT array_agg(id) a FROM docks) d
+    """,
+    """
+    INSERT INTO notifications (id, user_id, channel, title, body, status, created_at)
+    SELECT gen_random_uuid(), u.a[1 + g % array_length(u.a, 1)], 'push', 't', 'b', 'pending',
+           now() - g * interval '1 minute'
+    FROM generate_series(1, 50000) g, (SELECT array_agg(id) a FROM users) u
+    """,
+    """
+    INSERT INTO devices (id, user_id, expo_push_token, platform)
+    SELECT gen_random_uuid(), u.a[1 + g % array_length(u.a, 1)],
+           'ExponentPushToken[' || g || ']', 'ios'
+    FROM generate_series(1, 20000) g, (SELECT array_agg(id) a FROM users) u
+    """,
+    """
+    INSERT INTO verification_docs (id, user_id, status)
+    SELECT gen_random_uuid(), u.a[1 + g % array_length(u.a, 1)], 'pending'
+    FROM generate_series(1, 20000) g, (SELECT array_agg(id) a FROM users) u
+    """,
+    """
+    INSERT INTO payments (id, rental_id, user_id, amount, method, status, created_at)
+    SELECT gen_random_uuid(), r.a[1 + g % array_length(r.a, 1)],
+           u.a[1 + g % array_length(u.a, 1)], 10, 'mpesa',
+           (ARRAY['pending', 'success', 'failed'])[1 + g % 3],
+           now() - g * interval '10 minutes'
+    FROM generate_series(1, 50000) g,
+         (SELECT array_agg(id) a FROM users) u,
+         (SELECT array_agg(id) a FROM rentals) r
+    """,
+]
+
+SEEDED_TABLES = [
+    "users", "docks", "bikes", "rentals", "events",
+    "notifications", "devices", "verification_docs", "payments",
+]
+
+
+class Explain(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) wrapper that keeps the statement's bind processing"""
+
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+def _seq_scans(plan: dict) -> set:
+    found = set()
+    if plan.get("Node Type") == "Seq Scan":
+        found.add(plan.get("Relation Name"))
+    for child in plan.get("Plans", []):
+        found |= _seq_scans(child)
+    return found
+
+
+def router_queries(sample: dict):
+    """
+    (name, statement, tables that must be reached through an index). The
+    spatial and active rental lookups use the builders the app itself calls.
+    """
+    trips_subq = (
+        select(Event.dock_id, func.count(Event.id).label("trips"))
+        .where(Event.event_type == "ride_start", Event.dock_id.isnot(None))
+        .group_by(Event.dock_id)
+        .subquery()
+    )
+    start_day = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    return [
+        ("docks.get_docks_nearby", docks_near_query(-1.3, 36.8, 1000.0, 50), {"docks"}),
+        ("bikes.get_bikes_nearby", bikes_near_query(-1.3, 36.8, 1000.0, 50), {"docks", "bikes"}),
+        ("docks.get_docks radius", docks_query(-1.3, 36.8, 1.0, None, None), {"docks"}),
+        ("docks.get_docks bbox", docks_query(None, None, None, "36.80,-1.30,36.82,-1.28", None), {"docks"}),
+        ("docks.get_docks since", docks_query(
+            None, None, None, None, datetime.utcnow() - timedelta(minutes=5)
+        ), {"docks"}),
+        ("tiles.get_vector_tile", TILE_SQL.bindparams(z=14, x=9867, y=8250), {"docks"}),
+        ("rentals.start_ride idempotency", select(Rental).where(
+            Rental.client_rental_id == sample["client_rental_id"],
+            Rental.user_id == sample["user_id"],
+        ), {"rentals"}),
+        ("active_rentals.active_for_user fallback", _latest_open(Rental.user_id == sample["user_id"]), {"rentals"}),
+        ("active_rentals.active_for_bike fallback", _latest_open(Rental.bike_id == sample["bike_id"]), {"rentals"}),
+        ("auth.login", select(User).where(User.email == sample["email"]), {"users"}),
+        ("auth.reset_password", select(User).where(User.reset_token == sample["reset_token"]), {"users"}),
+        ("bikes.get_bikes by dock/status", select(Bike).where(
+            Bike.dock_id == sample["dock_id"], Bike.status == BikeStatus.available
+        ), {"bikes"}),
+        ("bikes.get_bikes keyset page", apply_keyset(
+            select(Bike).where(Bike.status == BikeStatus.available),
+            Bike.created_at, Bike.id, sample["cursor"], 50,
+        ), {"bikes"}),
+        ("bikes.create_bike owner count", select(Bike).where(Bike.owner_id == sample["user_id"]), {"bikes"}),
+        ("admin.activities", select(Event).order_by(Event.occurred_at.desc()).limit(10), {"events"}),
+        ("admin.trips_per_dock", select(Dock.id, Dock.name, trips_subq.c.trips).join(
+            trips_subq, trips_subq.c.dock_id == Dock.id, isouter=True
+        ), {"events"}),
+        ("notifications.get_notifications", select(Notification).where(
+            Notification.user_id == sample["user_id"]
+        ).order_by(Notification.created_at.desc()), {"notifications"}),
+        ("sync.register_device", select(Device).where(
+            Device.user_id == sample["user_id"], Device.expo_push_token == "ExponentPushToken[42]"
+        ), {"devices"}),
+        ("verification.approve_verification", select(VerificationDoc).where(
+            VerificationDoc.user_id == sample["user_id"]
+        ), {"verification_docs"}),
+        ("admin.revenue", select(func.coalesce(func.sum(Payment.amount), 0)).where(
+            Payment.status == PaymentStatus.success, Payment.created_at >= start_day
+        ), {"payments"}),
+    ]
+
+
+@pytest.fixture(scope="module")
+def seeded_connection(scratch_engine):
+    with scratch_engine.connect() as conn:
+        trans = conn.begin()
+        for statement in SEED_SQL:
+            conn.execute(text(statement))
+        for table in SEEDED_TABLES:
+            conn.execute(text(f"ANALYZE {table}"))
+        yield conn
+        trans.rollback()
+
+
+def test_router_queries_use_indexes(seeded_connection):
+    """Test that no router lookup plans a sequential scan on a large table"""
+    conn = seeded_connection
+    sample = dict(conn.execute(text(
+        "SELECT r.client_rental_id, r.user_id::text AS user_id, r.bike_id, b.dock_id, "
+        "(SELECT email FROM users LIMIT 1) AS email, "
+        "(SELECT reset_token FROM users WHERE reset_token IS NOT NULL LIMIT 1) AS reset_token "
+        "FROM rentals r JOIN bikes b ON b.id = r.bike_id "
+        "WHERE r.client_rental_id IS NOT NULL LIMIT 1"
+    )).mappings().one())
+
+    sample["cursor"] = encode_cursor(datetime.utcnow(), "00000000-0000-0000-0000-000000000000")
+
+    offenders = {}
+    for name, statement, indexed_tables in router_queries(sample):
+        plan = conn.execute(Explain(statement)).scalar()[0]["Plan"]
+        scanned = _seq_scans(plan) & indexed_tables
+        if scanned:
+            offenders[name] = sorted(scanned)
+
+    assert not offenders, f"Sequential scans planned: {offenders}"
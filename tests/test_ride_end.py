@@ -0,0 +1,88 @@
+import asyncio
+from datetime import datetime
+from decimal import Decimal
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models.bike import Bike, BikeStatus
+from app.models.rental import Rental, RentalStatus
+from app.routers import rentals
+from app.schemas.rental import RideEndRequest
+
+
+def test_unknown_end_dock_is_404_before_anything_changes(sqlite_engine):
+    """Test that ending at a missing dock is rejected and leaves the ride and bike untouched"""
+    async def run():
+        bike = Bike(id=uuid4(), status=BikeStatus.rented)
+        rental = Rental(
+            bike_id=bike.id, user_id=uuid4(), start_at=datetime(2026, 10, 17, 8), minute_rate_snapshot=Decimal("1.0")
+        )
+        request = RideEndRequest(
+            rental_id=rental.id, end_at=datetime(2026, 10, 17, 9), minutes_client=60, end_dock_id=uuid4()
+        )
+        async with sqlite_engine(Bike, Rental, docks=[]) as engine:
+            async with AsyncSession(engine, expire_on_commit=False) as db:
+                db.add_all([bike, rental])
+                await db.commit()
+            async with AsyncSession(engine) as db:
+                with pytest.raises(HTTPException) as raised:
+                    await rentals.end_ride(request, SimpleNamespace(id=rental.user_id), db)
+            async with AsyncSession(engine) as db:
+                stored = (await db.exec(select(Rental.status, Bike.status).join(Bike, Bike.id == Rental.bike_id))).one()
+        return raised.value, stored
+
+    error, (rental_status, bike_status) = asyncio.run(run())
+    assert error.status_code == 404 and error.detail == "Dock not found"
+    assert rental_status == RentalStatus.OPEN and bike_status == BikeStatus.rented
+
+
+def test_concurrent_ends_close_the_ride_once(sqlite_engine, monkeypatch):
+    """Test that of simultaneous ends of one ride exactly one closes it and moves dock counts"""
+    async def done(*args, **kwargs):
+        return False
+    adjusted = []
+
+    async def adjust(db, changes):
+        adjusted.append(changes)
+
+    monkeypatch.setattr(rentals.zone_engine, "ensure_fresh", done)
+    monkeypatch.setattr(rentals, "adjust_counts_async", adjust)
+    monkeypatch.setattr(rentals, "track_event_async", done)
+    monkeypatch.setattr(rentals, "invalidate_docks", done)
+    monkeypatch.setattr(rentals, "invalidate_dock_bikes", lambda *docks: None)
+    monkeypatch.setattr(rentals.active_rentals, "unregister", done)
+
+    async def run():
+        bike = Bike(id=uuid4(), status=BikeStatus.rented)
+        rental = Rental(
+            bike_id=bike.id, user_id=uuid4(), start_at=datetime(2026, 10, 17, 8), minute_rate_snapshot=Decimal("1.0")
+        )
+        request = RideEndRequest(rental_id=rental.id, end_at=datetime(2026, 10, 17, 9), minutes_client=60)
+        async with sqlite_engine(Bike, Rental) as engine:
+            async with AsyncSession(engine, expire_on_commit=False) as db:
+                db.add_all([bike, rental])
+                await db.commit()
+
+            async def end():
+                # Like AsyncSessionLocal
+                async with AsyncSession(engine, expire_on_commit=False) as db:
+                    try:
+                        await rentals.end_ride(request, SimpleNamespace(id=rental.user_id), db)
+                        return "ended"
+                    except HTTPException as exc:
+                        return exc.status_code
+
+            outcomes = await asyncio.gather(*(end() for _ in range(5)))
+            async with AsyncSession(engine) as db:
+                stored = (await db.exec(select(Rental.status, Bike.status).join(Bike, Bike.id == Rental.bike_id))).one()
+        return outcomes, stored
+
+    outcomes, (rental_status, bike_status) = asyncio.run(run())
+    assert sorted(outcomes, key=str) == [400, 400, 400, 400, "ended"]
+    assert len(adjusted) == 1
+    assert rental_status == RentalStatus.CLOSED and bike_status == BikeStatus.available
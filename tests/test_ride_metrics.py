@@ -0,0 +1,99 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+from uuid import uuid4
+
+import numpy as np
+from sqlalchemy.dialects import postgresql
+from sqlmodel import Session, select
+
+from app.models.rental import Rental
+from app.models.user import User
+from app.services import ride_metrics
+from app.services.geo import haversine_m
+from app.services.path_codec import encode_path
+
+
+def test_trip_metrics_match_per_trip_loop(monkeypatch):
+    """Test that the batched computation matches summing each trip on its own"""
+    monkeypatch.setattr(ride_metrics.settings, "eco_points_per_km", 10.0)
+    monkeypatch.setattr(ride_metrics.settings, "co2_saved_g_per_km", 150.0)
+    monkeypatch.setattr(ride_metrics.settings, "eco_max_speed_kmh", 45.0)
+    rng = np.random.default_rng(5)
+    paths = [
+        [(-1.28 + i * 1e-3 + rng.normal(0, 1e-5), 36.81 + i * 5e-4) for i in range(n)]
+        for n in (0, 1, 40, 300, 2)
+    ]
+    durations = [600, 60, 900, 7200, 0]
+
+    result = ride_metrics.trip_metrics(paths, durations)
+
+    for i, path in enumerate(paths):
+        expected = 0.0
+        if len(path) > 1:
+            coords = np.array(path)
+            expected = haversine_m(coords[:-1, 0], coords[:-1, 1], coords[1:, 0], coords[1:, 1]).sum()
+        assert abs(result.distance_m[i] - expected) < 1e-6
+    assert result.distance_m[0] == 0 and result.distance_m[1] == 0
+    assert abs(result.avg_speed_kmh[2] - result.distance_m[2] / 900 * 3.6) < 1e-9
+    assert result.avg_speed_kmh[4] == 0
+    assert abs(result.co2_saved_g[3] - result.distance_m[3] / 1000 * 150) < 1e-6
+    assert result.eco_points[3] == int(result.distance_m[3] / 1000 * 10)
+
+
+def test_implausible_speed_earns_no_points(monkeypatch):
+    """Test that a trace faster than eco_max_speed_kmh keeps metrics but awards nothing"""
+    monkeypatch.setattr(ride_metrics.settings, "eco_max_speed_kmh", 45.0)
+    path = [(-1.28, 36.81), (-1.18, 36.81)]  # ~11 km
+    fast = ride_metrics.trip_metrics([path], [60])
+    slow = ride_metrics.trip_metrics([path], [3600])
+    assert fast.distance_m[0] > 10_000 and fast.eco_points[0] == 0
+    assert slow.eco_points[0] > 0
+
+
+def test_path_prefers_packed_form():
+    """Test that packed paths are decoded and legacy JSON samples still read"""
+    start = datetime(2026, 10, 17, 8)
+    packed = Rental(
+        bike_id="00000000-0000-0000-0000-000000000001",
+        user_id="00000000-0000-0000-0000-000000000002",
+        start_at=start,
+        end_at=start + timedelta(minutes=10),
+        minute_rate_snapshot=Decimal("1.0"),
+        path_encoded=encode_path([(-1.28, 36.81, None), (-1.29, 36.82, None)]),
+    )
+    legacy = Rental(
+        bike_id="00000000-0000-0000-0000-000000000001",
+        user_id="00000000-0000-0000-0000-000000000002",
+        start_at=start,
+        minute_rate_snapshot=Decimal("1.0"),
+        path_sample=[{"lat": -1.28, "lng": 36.81}, {"lat": "bad"}],
+    )
+    assert ride_metrics._path(packed) == [(-1.28, 36.81), (-1.29, 36.82)]
+    assert ride_metrics._path(legacy) == [(-1.28, 36.81)]
+
+
+def test_eco_points_update_is_one_statement():
+    """Test that a batch of awards compiles to a single UPDATE ... FROM (VALUES ...)"""
+    awards = {str(uuid4()): 3, str(uuid4()): 5}
+    statement = ride_metrics.award_points(awards).compile(dialect=postgresql.dialect())
+    assert str(statement).startswith("UPDATE users SET eco_points=(users.eco_points + awards.points) FROM (VALUES")
+    assert "::UUID" in str(statement)
+    assert sorted(v for v in statement.params.values() if isinstance(v, int)) == [3, 5]
+
+
+def test_eco_points_update_adds_to_balances(scratch_engine):
+    """Test that running the award statement on Postgres adds to each user's balance"""
+    with Session(scratch_engine) as session:
+        users = [
+            User(email=f"eco-{uuid4()}@example.com", password_hash="x", eco_points=points) for points in (10, 0, 7)
+        ]
+        session.add_all(users)
+        session.flush()
+        try:
+            session.exec(ride_metrics.award_points({users[0].id: 3, users[1].id: 5}))
+            balances = dict(session.exec(
+                select(User.email, User.eco_points).where(User.email.in_([user.email for user in users]))
+            ).all())
+        finally:
+            session.rollback()
+    assert [balances[user.email] for user in users] == [13, 5, 7]
@@ -0,0 +1,77 @@
+import asyncio
+from datetime import datetime
+from decimal import Decimal
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models.bike import Bike, BikeStatus
+from app.models.rental import Rental
+from app.routers import rentals
+from app.schemas.rental import RideStartRequest
+
+
+async def _contend(engine, starts):
+    """Fire `starts` simultaneous ride starts at one bike, each on its own connection"""
+    bike_id = uuid4()
+    async with AsyncSession(engine) as db:
+        db.add(Bike(id=bike_id))
+        await db.commit()
+
+    async def start():
+        user_id = uuid4()
+        request = RideStartRequest(
+            bike_id=bike_id,
+            user_id=user_id,
+            start_at=datetime.utcnow(),
+            minute_rate_snapshot=Decimal("1.0"),
+        )
+        async with AsyncSession(engine) as db:
+            try:
+                await rentals.start_ride(request, SimpleNamespace(id=user_id), db)
+                return "started"
+            except HTTPException as exc:
+                return exc.status_code
+
+    outcomes = await asyncio.gather(*(start() for _ in range(starts)))
+    async with AsyncSession(engine) as db:
+        bike = (await db.exec(select(Bike).where(Bike.id == bike_id))).one()
+        opened = (await db.exec(select(Rental).where(Rental.bike_id == bike_id))).all()
+    return outcomes, bike, opened
+
+
+def test_simultaneous_starts_reserve_the_bike_once(sqlite_engine, monkeypatch):
+    """Test that of many concurrent starts at one bike exactly one succeeds"""
+    monkeypatch.setattr(rentals, "track_event_async", lambda *args, **kwargs: asyncio.sleep(0))
+    monkeypatch.setattr(rentals.active_rentals, "register", lambda *rentals: asyncio.sleep(0))
+    starts = 200
+
+    async def run():
+        async with sqlite_engine(Bike, Rental) as engine:
+            return await _contend(engine, starts)
+
+    outcomes, bike, opened = asyncio.run(run())
+
+    assert outcomes.count("started") == 1
+    assert outcomes.count(400) == starts - 1
+    assert bike.status == BikeStatus.rented and bike.rented_at is not None
+    assert len(opened) == 1
+
+
+def test_missing_bike_is_404(sqlite_engine):
+    """Test that a start for an unknown bike is not reported as a conflict"""
+    async def run():
+        request = RideStartRequest(
+            bike_id=uuid4(), user_id=uuid4(), start_at=datetime.utcnow(), minute_rate_snapshot=Decimal("1.0")
+        )
+        async with sqlite_engine(Bike, Rental) as engine:
+            async with AsyncSession(engine) as db:
+                with pytest.raises(HTTPException) as raised:
+                    await rentals.start_ride(request, SimpleNamespace(id=request.user_id), db)
+        return raised.value.status_code
+
+    assert asyncio.run(run()) == 404
@@ -0,0 +1,144 @@
+import asyncio
+from datetime import datetime, timedelta
+from decimal import Decimal
+from uuid import uuid4
+
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models.bike import Bike, BikeStatus
+from app.models.rental import Rental, RentalStatus
+from app.schemas.rental import RideSyncEnd, RideSyncStart
+from app.services import ride_sync
+
+START = datetime(2026, 10, 17, 8)
+BIKES = [uuid4(), uuid4()]
+DOCK = uuid4()
+
+
+def _start(client_id, bike_id, minutes=0):
+    return RideSyncStart(
+        client_rental_id=client_id,
+        bike_id=bike_id,
+        start_at=START + timedelta(minutes=minutes),
+        minute_rate_snapshot=Decimal("2.5"),
+    )
+
+
+def _end(client_id, minutes, end_dock_id=None):
+    return RideSyncEnd(
+        client_rental_id=client_id,
+        end_at=START + timedelta(minutes=minutes),
+        minutes_client=minutes,
+        end_dock_id=end_dock_id,
+        path_sample=[{"lat": -1.28, "lng": 36.81}, {"lat": -1.29, "lng": 36.82}],
+    )
+
+
+async def _run(engine, batches):
+    """Apply each (starts, ends) batch for one rider; statuses per batch plus final rows"""
+    user_id = uuid4()
+    async with AsyncSession(engine) as db:
+        db.add_all([Bike(id=bike_id) for bike_id in BIKES])
+        await db.commit()
+
+    outcomes = []
+    for starts, ends in batches:
+        async with AsyncSession(engine) as db:
+            outcome = await ride_sync.sync_rides(db, user_id, starts, ends)
+            await db.commit()
+        outcomes.append(outcome)
+    async with AsyncSession(engine) as db:
+        bikes = {bike.id: bike for bike in (await db.exec(select(Bike))).all()}
+        rentals = {rental.client_rental_id: rental for rental in (await db.exec(select(Rental))).all()}
+    return outcomes, bikes, rentals
+
+
+def _sync(sqlite_engine, batches):
+    async def run():
+        async with sqlite_engine(Bike, Rental, docks=[DOCK]) as engine:
+            return await _run(engine, batches)
+    return asyncio.run(run())
+
+
+def test_batch_resolves_each_item_and_retries_are_idempotent(sqlite_engine, monkeypatch):
+    """Test per-item statuses for a mixed batch, and that replaying it changes nothing"""
+    async def stale():
+        return False
+    monkeypatch.setattr(ride_sync.zone_engine, "ensure_fresh", lambda db: stale())
+    first, second = BIKES
+    starts = [
+        _start("a", first),
+        _start("b", second),
+        _start("c", uuid4()),
+        _start("d", first, minutes=30),
+        _start("a", first),
+    ]
+    ends = [_end("a", 20), _end("a", 20), _end("missing", 5)]
+
+    outcomes, bikes, rentals = _sync(sqlite_engine, [(starts, ends), (starts[:3], ends)])
+
+    statuses = [(r["client_rental_id"], r["action"], r["status"]) for r in outcomes[0]["results"]]
+    assert statuses == [
+        ("a", "start", "started"),
+        ("b", "start", "started"),
+        ("c", "start", "bike_not_found"),
+        ("d", "start", "bike_unavailable"),
+        ("a", "start", "duplicate"),
+        ("a", "end", "ended"),
+        ("a", "end", "duplicate"),
+        ("missing", "end", "not_found"),
+    ]
+    assert outcomes[0]["results"][5]["amount"] == Decimal("50.00")
+    assert outcomes[0]["results"][6]["amount"] == Decimal("50.00")
+    assert outcomes[0]["results"][0]["rental_id"] == outcomes[0]["results"][4]["rental_id"] == rentals["a"].id
+
+    retried = [(r["client_rental_id"], r["status"], r.get("rental_id")) for r in outcomes[1]["results"]]
+    assert retried == [
+        ("a", "duplicate", rentals["a"].id),
+        ("b", "duplicate", rentals["b"].id),
+        ("c", "bike_not_found", None),
+        ("a", "duplicate", rentals["a"].id),
+        ("a", "duplicate", rentals["a"].id),
+        ("missing", "not_found", None),
+    ]
+    assert outcomes[1]["results"][3]["amount"] == Decimal("50.00")
+
+    assert set(rentals) == {"a", "b"}
+    assert rentals["a"].status == RentalStatus.CLOSED and rentals["a"].path_encoded
+    assert rentals["b"].status == RentalStatus.OPEN
+    assert bikes[first].status == BikeStatus.available and bikes[first].returned_at is not None
+    assert bikes[second].status == BikeStatus.rented
+
+
+def test_ends_ride_opened_by_an_earlier_request(sqlite_engine, monkeypatch):
+    """Test that an end in a later batch closes the ride and frees its bike"""
+    async def stale():
+        return False
+    monkeypatch.setattr(ride_sync.zone_engine, "ensure_fresh", lambda db: stale())
+
+    outcomes, bikes, rentals = _sync(sqlite_engine, [([_start("a", BIKES[0])], []), ([], [_end("a", 12)])])
+
+    assert outcomes[1]["results"][0]["status"] == "ended"
+    assert rentals["a"].status == RentalStatus.CLOSED and rentals["a"].amount == Decimal("30.00")
+    assert bikes[BIKES[0]].status == BikeStatus.available
+
+
+def test_end_at_unknown_dock_changes_nothing(sqlite_engine, monkeypatch):
+    """Test that an end naming a missing dock is reported and leaves the ride open"""
+    async def stale():
+        return False
+    monkeypatch.setattr(ride_sync.zone_engine, "ensure_fresh", lambda db: stale())
+    # Dock counts are covered by test_dock_counts; the stand-in docks table has no count column
+    monkeypatch.setattr(ride_sync, "adjust_counts_async", lambda db, changes: stale())
+
+    outcomes, bikes, rentals = _sync(sqlite_engine, [
+        ([_start("a", BIKES[0])], [_end("a", 12, end_dock_id=uuid4())]),
+        ([], [_end("a", 12, end_dock_id=DOCK)]),
+    ])
+
+    assert [r["status"] for r in outcomes[0]["results"]] == ["started", "dock_not_found"]
+    assert len(outcomes[0]["opened"]) == 1 and not outcomes[0]["closed"]
+    assert outcomes[1]["results"][0]["status"] == "ended"
+    assert rentals["a"].status == RentalStatus.CLOSED
+    assert bikes[BIKES[0]].status == BikeStatus.available and bikes[BIKES[0]].dock_id == DOCK
@@ -0,0 +1,24 @@
+import json
+from datetime import datetime
+
+from app.models.bike import Bike
+from app.schemas.bike import BikeListResponse, BikeResponse
+from app.schemas.common import ResponseModel, envelope_adapter, envelope_response
+
+
+def test_envelope_response_matches_response_model():
+    """Test that the pre-validated path emits the same JSON as the envelope model"""
+    bike = Bike(type="standard", condition="A", hourly_rate=50, created_at=datetime(2026, 10, 17, 8, 0, 0))
+    data = BikeListResponse(bikes=[BikeResponse.model_validate(bike)], next_cursor="abc")
+
+    response = envelope_response(data, BikeListResponse)
+
+    assert response.media_type == "application/json"
+    expected = ResponseModel[BikeListResponse](success=True, data=data).model_dump(mode="json")
+    assert json.loads(response.body) == expected
+    assert expected["data"]["bikes"][0]["created_at"] == bike.created_at.isoformat()
+
+
+def test_envelope_adapter_is_built_once():
+    """Test that adapters are compiled once per data type"""
+    assert envelope_adapter(BikeResponse) is envelope_adapter(BikeResponse)
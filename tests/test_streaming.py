@@ -0,0 +1,45 @@
+import asyncio
+import json
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.requests import Request
+
+from app.models.user import User
+from app.services.streaming import NDJSON_MEDIA_TYPE, ndjson_response, wants_ndjson
+
+
+def _request(accept: str) -> Request:
+    return Request({"type": "http", "headers": [(b"accept", accept.encode())]})
+
+
+def test_wants_ndjson():
+    """Test that the streaming mode is selected by the Accept header"""
+    assert wants_ndjson(_request(NDJSON_MEDIA_TYPE))
+    assert not wants_ndjson(_request("application/json"))
+
+
+def test_ndjson_response_streams_one_row_per_line(sqlite_engine):
+    """Test that every row is emitted as its own JSON line, in partitions"""
+    async def run():
+        async with sqlite_engine(User) as engine:
+            session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+            async with session_factory() as session:
+                session.add_all([User(email=f"user{i}@example.com", password_hash="x") for i in range(7)])
+                await session.commit()
+
+            response = ndjson_response(
+                select(User).order_by(User.email),
+                lambda u: {"email": u.email},
+                yield_per=3,
+                session_factory=session_factory,
+            )
+            chunks = [chunk async for chunk in response.body_iterator]
+        return response, chunks
+
+    response, chunks = asyncio.run(run())
+    assert response.media_type == NDJSON_MEDIA_TYPE
+    assert len(chunks) == 3
+    lines = "".join(chunks).splitlines()
+    assert [json.loads(line)["email"] for line in lines] == [f"user{i}@example.com" for i in range(7)]
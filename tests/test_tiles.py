@@ -0,0 +1,72 @@
+import asyncio
+
+from app.services import tiles
+from app.services.tiles import valid_tile
+
+
+def test_valid_tile():
+    """Test tile coordinate bounds per zoom"""
+    assert valid_tile(0, 0, 0)
+    assert valid_tile(14, 9867, 8250)
+    assert not valid_tile(1, 2, 0)
+    assert not valid_tile(23, 0, 0)
+    assert not valid_tile(3, -1, 0)
+
+
+class _Renderer:
+    """Session stand-in whose TILE_SQL result is the data at render time"""
+
+    def __init__(self, data, during=None):
+        self.data = data
+        self.during = during
+        self.renders = 0
+
+    async def scalar(self, statement, params):
+        self.renders += 1
+        tile = self.data
+        if self.during is not None:
+            await self.during()
+        return tile
+
+
+def test_tiles_are_cached_until_invalidated(memory_redis, monkeypatch):
+    """Test that a cached tile is served until a dock or zone write retires it"""
+    monkeypatch.setattr(tiles, "get_async_redis", lambda: memory_redis)
+    session = _Renderer(b"before")
+
+    async def run():
+        first = await tiles.get_tile(session, 14, 9867, 8250)
+        second = await tiles.get_tile(session, 14, 9867, 8250)
+        session.data = b"after"
+        await tiles.invalidate_tiles()
+        third = await tiles.get_tile(session, 14, 9867, 8250)
+        return first, second, third
+
+    assert asyncio.run(run()) == (b"before", b"before", b"after")
+    assert session.renders == 2
+
+
+def test_write_during_render_does_not_cache_a_stale_tile(memory_redis, monkeypatch):
+    """Test that a tile rendered across a dock write is not served after the write"""
+    monkeypatch.setattr(tiles, "get_async_redis", lambda: memory_redis)
+    session = _Renderer(b"before")
+
+    async def write():
+        session.data = b"after"
+        session.during = None
+        await tiles.invalidate_tiles()
+
+    session.during = write
+
+    async def run():
+        return await tiles.get_tile(session, 14, 9867, 8250), await tiles.get_tile(session, 14, 9867, 8250)
+
+    assert asyncio.run(run()) == (b"before", b"after")
+
+
+def test_tiles_render_without_redis(down_redis, monkeypatch):
+    """Test that tiles are still served, uncached, while Redis is down"""
+    monkeypatch.setattr(tiles, "get_async_redis", lambda: down_redis)
+    session = _Renderer(b"tile")
+    assert asyncio.run(tiles.get_tile(session, 14, 9867, 8250)) == b"tile"
+    asyncio.run(tiles.invalidate_tiles())
@@ -0,0 +1,65 @@
+import asyncio
+import gzip
+import json
+from collections import namedtuple
+from uuid import uuid4
+
+from app.models.zone import ZoneKind
+from app.services.zone_cache import ZoneDocumentCache
+
+ZoneRow = namedtuple("ZoneRow", "id kind label version geojson")
+
+SQUARE = '{"type":"Polygon","coordinates":[[[36.8,-1.3],[36.9,-1.3],[36.9,-1.2],[36.8,-1.3]]]}'
+
+
+class _Result:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def all(self):
+        return self._rows
+
+
+class _FakeSession:
+    """Answers the (id, version) listing and the polygon load from an in-memory table"""
+
+    def __init__(self, zones):
+        self.zones = zones
+        self.polygon_loads = 0
+
+    async def exec(self, statement):
+        if len(statement.selected_columns) == 2:
+            return _Result([(zone.id, zone.version) for zone in self.zones])
+        self.polygon_loads += 1
+        return _Result(list(self.zones))
+
+
+def test_document_cached_per_version_and_since_filters():
+    """Test that the document is reused until a version changes, and `since` filters"""
+    red = ZoneRow(uuid4(), ZoneKind.RED, "No parking", 3, SQUARE)
+    green = ZoneRow(uuid4(), ZoneKind.GREEN, None, 7, SQUARE)
+    session = _FakeSession([red, green])
+    cache = ZoneDocumentCache()
+
+    async def run():
+        first = await cache.get(session)
+        again = await cache.get(session)
+        assert again is first
+        assert session.polygon_loads == 1
+
+        body = json.loads(first.body)
+        assert body["data"]["version"] == 7
+        assert [zone["kind"] for zone in body["data"]["zones"]] == ["red", "green"]
+        assert body["data"]["zones"][0]["polygon"]["type"] == "Polygon"
+        assert gzip.decompress(first.gzipped) == first.body
+
+        newer = await cache.get(session, since=3)
+        assert [zone["version"] for zone in json.loads(newer.body)["data"]["zones"]] == [7]
+        assert newer.gzipped is None
+
+        session.zones = [red._replace(version=8), green]
+        bumped = await cache.get(session)
+        assert bumped.etag != first.etag
+        assert json.loads(bumped.body)["data"]["version"] == 8
+
+    asyncio.run(run())
@@ -0,0 +1,73 @@
+from geoalchemy2.shape import from_shape
+from shapely.geometry import box
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+from sqlmodel import Session
+
+from app.models.zone import Zone, ZoneKind
+from app.services.geo import path_points
+from app.services.zone_engine import ZoneEngine
+
+
+def _engine():
+    engine = ZoneEngine()
+    engine.replace([
+        # Green service area with a red no-parking block inside it
+        ("green-1", ZoneKind.GREEN, box(36.80, -1.30, 36.90, -1.20)),
+        ("red-1", ZoneKind.RED, box(36.84, -1.26, 36.85, -1.25)),
+    ], signature="v1")
+    return engine
+
+
+def test_point_checks():
+    """Test red-zone hits and points outside every green zone"""
+    engine = _engine()
+    assert not engine.check([(-1.28, 36.82)]).violates
+
+    red = engine.check([(-1.255, 36.845)])
+    assert red.red_zone_ids == ("red-1",)
+    assert red.violates
+
+    outside = engine.check([(-1.10, 36.82)])
+    assert outside.outside_green == 1
+    assert outside.red_zone_ids == ()
+
+
+def test_path_checks_and_empty_inputs():
+    """Test that a path is checked point by point in one batch"""
+    engine = _engine()
+    path = path_points([
+        {"lat": -1.28, "lng": 36.82},
+        {"latitude": -1.255, "longitude": 36.845},
+        {"lat": -1.10, "lon": 36.82},
+        {"lat": None, "lng": 36.8},
+        "garbage",
+    ])
+    check = engine.check(path)
+    assert check.points == 3
+    assert check.red_zone_ids == ("red-1",)
+    assert check.outside_green == 1
+
+    assert not engine.check([]).violates
+    assert not ZoneEngine().check([(-1.28, 36.82)]).violates
+
+
+def test_kind_is_stored_by_value():
+    """Test that zone kinds bind and load as 'green'/'red', the values zones_kind_check allows"""
+    kind_type = Zone.__table__.c.kind.type
+    dialect = postgresql.dialect()
+    assert kind_type.bind_processor(dialect)(ZoneKind.RED) == "red"
+    assert kind_type.result_processor(dialect, None)("green") is ZoneKind.GREEN
+
+
+def test_zone_insert_passes_the_kind_check(scratch_engine):
+    """Test that a zone written through the model satisfies the migrated check constraint"""
+    with Session(scratch_engine) as session:
+        zone = Zone(kind=ZoneKind.RED, polygon=from_shape(box(36.84, -1.26, 36.85, -1.25), srid=4326))
+        session.add(zone)
+        try:
+            session.flush()
+            stored = session.execute(text("SELECT kind FROM zones WHERE id = :id"), {"id": str(zone.id)}).scalar()
+        finally:
+            session.rollback()
+    assert stored == "red"